@@ -0,0 +1,527 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Estatísticas agrupadas por ativo (formato ticker,quantidade)
+=============================================================
+Objetivo:
+  Processar arquivos com vários ativos misturados, uma linha
+  por registro no formato:
+
+    PETR4,300
+    VALE3,-5
+    ITUB4,120
+
+  e aplicar, a CADA ativo separadamente, as regras das Etapas
+  2 a 4, como se o arquivo tivesse sido dividido por ticker:
+    - métricas manuais dos válidos (> 0): média, máximo, mínimo;
+    - imputação: inválidos (≤ 0) recebem int(média dos válidos
+      do próprio ativo);
+    - sobre o vetor corrigido do ativo: mediana, desvio padrão e
+      remoção de outliers por média ± fator·σ.
+
+Agregação por hash, sem dicionário de listas:
+  Os tickers são fatorados em códigos inteiros (um dict
+  ticker → código e uma lista código → ticker); os registros
+  ficam em dois vetores contíguos (código, quantidade). As
+  somas exatas por grupo (n, Σx, Σx²) são acumuladas em vetores
+  indexados pelo código; com NumPy, uma ordenação estável por
+  (código, valor) e np.add.reduceat fazem isso em vetor, e a
+  mediana de cada grupo sai direto das posições centrais.
+  Dezenas de milhares de tickers custam apenas alguns vetores
+  do tamanho do número de tickers.
+
+Uso:
+  python3 agrupamento.py dados_tickers.txt
+  python3 agrupamento.py dados_tickers.txt --resumo resumo.csv --exibir 50
+=============================================================
+"""
+
+import argparse
+import mmap
+from array import array
+from operator import mul
+
+from escrita import TAMANHO_LOTE_ESCRITA, arquivo_atomico
+from estatisticas_exatas import desvio_padrao_exato
+from leitura import TAMANHO_BLOCO
+
+try:
+    import numpy as np  # Opcional: agregação por grupo vetorizada
+except ImportError:
+    np = None
+
+# Arquivos padrão deste modo
+ARQUIVO_ENTRADA          = "dados_tickers.txt"
+ARQUIVO_SAIDA_CORRIGIDOS = "dados_tickers_corrigidos.txt"
+ARQUIVO_SAIDA_FILTRADOS  = "dados_tickers_sem_outliers.txt"
+
+FATOR_OUTLIER = 2.0       # Mesmo critério de remover_outliers()
+GRUPOS_EXIBIDOS = 20      # Ativos exibidos no terminal (os demais vão para --resumo)
+
+_LIMITE_INT64 = 2 ** 63 - 1
+
+
+# ─────────────────────────────────────────────────────────────
+# LEITURA E FATORAÇÃO DOS TICKERS
+# ─────────────────────────────────────────────────────────────
+
+class Fatorador:
+    """
+    Atribui a cada ticker um código inteiro sequencial.
+    """
+
+    def __init__(self):
+        self.codigos = {}   # ticker (bytes, como lido) → código
+        self.tickers = []   # código → ticker (str)
+
+    def codigo(self, bruto: bytes) -> int:
+        codigo = self.codigos.get(bruto)
+        if codigo is None:
+            ticker = bruto.strip()
+            codigo = self.codigos.get(ticker)
+            if codigo is None:
+                codigo = len(self.tickers)
+                self.codigos[ticker] = codigo
+                self.tickers.append(ticker.decode("utf-8", errors="replace"))
+            self.codigos[bruto] = codigo  # Variantes com espaços viram apelidos
+        return codigo
+
+    def codigos_do_bloco(self, tickers: tuple):
+        """
+        Códigos de um bloco inteiro: registra só os tickers novos (na
+        ordem de primeira aparição) e converte o resto com buscas
+        diretas no dict.
+        """
+        novos = set(tickers).difference(self.codigos)
+        for bruto in tickers:
+            if not novos:
+                break
+            if bruto in novos:
+                self.codigo(bruto)
+                novos.discard(bruto)
+        return map(self.codigos.__getitem__, tickers)
+
+
+def _converter_bloco(linhas: list, primeira_linha: int, fatorador: Fatorador,
+                     codigos: array, valores: array, invalidas: list) -> None:
+    """
+    Converte um bloco de linhas 'ticker,quantidade'. O caminho
+    rápido trata o bloco inteiro de uma vez; se alguma linha for
+    vazia ou inválida, o bloco é refeito linha a linha.
+    """
+    try:
+        campos = [linha.split(b",") for linha in linhas]
+        # zip(*) cortaria campos extras em silêncio: exige exatamente 2 por linha
+        if set(map(len, campos)) != {2}:
+            raise ValueError
+        tickers, quantidades = zip(*campos)
+        if all(map(bytes.strip, tickers)):
+            bloco = array("q", map(int, quantidades))
+            codigos.extend(fatorador.codigos_do_bloco(tickers))
+            valores.extend(bloco)
+            return
+    except (ValueError, OverflowError):
+        pass
+
+    for deslocamento, linha in enumerate(linhas):
+        numero_linha = primeira_linha + deslocamento
+        if not linha.strip():
+            continue  # Ignora linhas vazias
+
+        ticker, virgula, quantidade = linha.partition(b",")
+        try:
+            if not virgula or not ticker.strip():
+                raise ValueError
+            numero = int(quantidade)
+        except ValueError:
+            # A primeira linha pode ser um cabeçalho (ex.: "ticker,quantidade")
+            if numero_linha > 1:
+                invalidas.append((numero_linha, linha.decode("utf-8", errors="replace").strip()))
+            continue
+
+        if not -_LIMITE_INT64 - 1 <= numero <= _LIMITE_INT64:
+            raise OverflowError(f"Linha {numero_linha}: valor {numero} fora do intervalo int64")
+        codigos.append(fatorador.codigo(ticker))
+        valores.append(numero)
+
+
+def ler_agrupado(nome_arquivo: str) -> tuple:
+    """
+    Lê um arquivo 'ticker,quantidade' via mmap, em blocos.
+
+    Retorna:
+        (tickers, codigos, valores, invalidas) (tuple):
+            tickers   (list) : código → ticker.
+            codigos   (array): código do ticker de cada registro ('q').
+            valores   (array): quantidade de cada registro ('q').
+            invalidas (list) : pares (numero_linha, conteudo) das
+                               linhas fora do formato.
+    """
+    fatorador = Fatorador()
+    codigos = array("q")
+    valores = array("q")
+    invalidas = []
+
+    with open(nome_arquivo, "rb") as arquivo:
+        try:
+            mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return fatorador.tickers, codigos, valores, invalidas  # Arquivo vazio
+
+    with mapa:
+        tamanho = len(mapa)
+        inicio = 0
+        proxima_linha = 1
+
+        while inicio < tamanho:
+            fim = mapa.find(b"\n", min(inicio + TAMANHO_BLOCO, tamanho) - 1)
+            if fim == -1:
+                fim = tamanho
+
+            linhas = mapa[inicio:fim].split(b"\n")
+            _converter_bloco(linhas, proxima_linha, fatorador, codigos, valores, invalidas)
+
+            proxima_linha = proxima_linha + len(linhas)
+            inicio = fim + 1
+
+    return fatorador.tickers, codigos, valores, invalidas
+
+
+# ─────────────────────────────────────────────────────────────
+# AGREGAÇÃO POR GRUPO
+# ─────────────────────────────────────────────────────────────
+
+def agrupar(tickers: list, codigos, valores, fator: float = FATOR_OUTLIER) -> dict:
+    """
+    Aplica as Etapas 2 a 4 a cada ativo, em uma agregação por grupo.
+
+    Parâmetros:
+        tickers (list)      : código → ticker (de ler_agrupado()).
+        codigos (sequência) : código do ticker de cada registro.
+        valores (sequência) : quantidade de cada registro.
+        fator   (float)     : multiplicador de σ para outliers.
+
+    Retorna:
+        resultado (dict):
+            'grupos'     (dict): colunas com um item por ativo —
+                                 'ticker', 'registros', 'validos',
+                                 'invalidos', 'media', 'maximo',
+                                 'minimo' (válidos, Etapa 2),
+                                 'substituto', 'media_corrigida',
+                                 'mediana', 'desvio',
+                                 'limite_inferior', 'limite_superior',
+                                 'removidos' (vetor corrigido, Etapas 3/4).
+            'corrigidos' (sequência): vetor com inválidos substituídos,
+                                      na ordem original.
+            'mantidos'   (sequência): máscara dos registros que não
+                                      são outliers do próprio ativo.
+    """
+    if np is not None and len(valores) > 0:
+        return _agrupar_numpy(tickers, codigos, valores, fator)
+    return _agrupar_python(tickers, codigos, valores, fator)
+
+
+def _montar_grupos(tickers: list, registros, validos, soma, soma_quadrados,
+                   minimo, maximo, fator: float) -> dict:
+    """
+    Deriva as métricas de cada ativo das somas exatas dos válidos.
+
+    Após substituir os k inválidos do ativo por m = int(média):
+      n = válidos + k,  Σx = soma + k·m,  Σx² = soma_quadrados + k·m²
+    """
+    grupos = {chave: [] for chave in (
+        "ticker", "registros", "validos", "invalidos", "media", "maximo", "minimo",
+        "substituto", "media_corrigida", "desvio", "limite_inferior", "limite_superior",
+    )}
+
+    for codigo, ticker in enumerate(tickers):
+        n_validos = validos[codigo]
+        media = soma[codigo] / n_validos if n_validos > 0 else 0.0
+        substituto = int(media)
+
+        n = registros[codigo]
+        k = n - n_validos
+        soma_corrigida = soma[codigo] + k * substituto
+        quadrados_corrigidos = soma_quadrados[codigo] + k * substituto * substituto
+        media_corrigida = soma_corrigida / n
+        desvio = desvio_padrao_exato(n, soma_corrigida, quadrados_corrigidos) if n >= 2 else 0.0
+
+        grupos["ticker"].append(ticker)
+        grupos["registros"].append(n)
+        grupos["validos"].append(n_validos)
+        grupos["invalidos"].append(k)
+        grupos["media"].append(media)
+        grupos["maximo"].append(maximo[codigo] if n_validos > 0 else None)
+        grupos["minimo"].append(minimo[codigo] if n_validos > 0 else None)
+        grupos["substituto"].append(substituto)
+        grupos["media_corrigida"].append(media_corrigida)
+        grupos["desvio"].append(desvio)
+        grupos["limite_inferior"].append(media_corrigida - fator * desvio)
+        grupos["limite_superior"].append(media_corrigida + fator * desvio)
+
+    return grupos
+
+
+def _mediana_ordenada(ordenados, inicio: int, n: int):
+    """
+    Mediana de um trecho já ordenado, igual a statistics.median().
+    """
+    meio = inicio + n // 2
+    if n % 2 == 1:
+        return ordenados[meio]
+    return (ordenados[meio - 1] + ordenados[meio]) / 2
+
+
+def _agrupar_python(tickers: list, codigos, valores, fator: float) -> dict:
+    """
+    Agregação por grupo sem NumPy: acumuladores em vetores
+    indexados pelo código do ticker, em uma passada.
+    """
+    grupos_total = len(tickers)
+    registros = array("q", bytes(8 * grupos_total))
+    validos = array("q", bytes(8 * grupos_total))
+    soma = [0] * grupos_total
+    soma_quadrados = [0] * grupos_total
+    minimo = [None] * grupos_total
+    maximo = [None] * grupos_total
+
+    # 1ª passada: somas exatas dos válidos de cada ativo
+    for codigo, valor in zip(codigos, valores):
+        registros[codigo] = registros[codigo] + 1
+        if valor > 0:
+            validos[codigo] = validos[codigo] + 1
+            soma[codigo] = soma[codigo] + valor
+            soma_quadrados[codigo] = soma_quadrados[codigo] + valor * valor
+            if minimo[codigo] is None or valor < minimo[codigo]:
+                minimo[codigo] = valor
+            if maximo[codigo] is None or valor > maximo[codigo]:
+                maximo[codigo] = valor
+
+    grupos = _montar_grupos(tickers, registros, validos, soma, soma_quadrados,
+                            minimo, maximo, fator)
+
+    # 2ª passada: imputação e máscara de outliers com os limites do ativo
+    substitutos = grupos["substituto"]
+    inferiores = grupos["limite_inferior"]
+    superiores = grupos["limite_superior"]
+    corrigidos = array("q", (valor if valor > 0 else substitutos[codigo]
+                             for codigo, valor in zip(codigos, valores)))
+    mantidos = [inferiores[codigo] <= valor <= superiores[codigo]
+                for codigo, valor in zip(codigos, corrigidos)]
+
+    removidos = [0] * grupos_total
+    for codigo, mantido in zip(codigos, mantidos):
+        if not mantido:
+            removidos[codigo] = removidos[codigo] + 1
+    grupos["removidos"] = removidos
+
+    # Mediana: ordena os índices por (código, valor) e lê o centro de cada grupo
+    ordem = sorted(range(len(corrigidos)), key=lambda i: (codigos[i], corrigidos[i]))
+    ordenados = [corrigidos[i] for i in ordem]
+    medianas = []
+    inicio = 0
+    for n in registros:
+        medianas.append(_mediana_ordenada(ordenados, inicio, n))
+        inicio = inicio + n
+    grupos["mediana"] = medianas
+
+    return {"grupos": grupos, "corrigidos": corrigidos, "mantidos": mantidos}
+
+
+def _agrupar_numpy(tickers: list, codigos, valores, fator: float) -> dict:
+    """
+    Agregação por grupo com NumPy: ordenação por (código, valor) e
+    somas por trecho com np.add.reduceat, em int64 exato.
+    """
+    codigos = np.asarray(codigos, dtype=np.int64)
+    valores = np.asarray(valores, dtype=np.int64)
+    grupos_total = len(tickers)
+
+    validos_mascara = valores > 0
+    registros = np.bincount(codigos, minlength=grupos_total)
+    validos = np.bincount(codigos, weights=validos_mascara,
+                          minlength=grupos_total).astype(np.int64)
+
+    # Válidos ordenados por (código, valor): somas, mínimo e máximo por trecho
+    apenas_validos = np.flatnonzero(validos_mascara)
+    ordem = np.lexsort((valores[apenas_validos], codigos[apenas_validos]))
+    ordenados = valores[apenas_validos][ordem]
+    com_validos = np.flatnonzero(validos > 0)
+    inicios = np.concatenate(([0], np.cumsum(validos)[:-1]))[com_validos]
+
+    soma = [0] * grupos_total
+    soma_quadrados = [0] * grupos_total
+    minimo = [None] * grupos_total
+    maximo = [None] * grupos_total
+    if len(ordenados) > 0:
+        maior_absoluto = max(abs(int(ordenados.max())), 1)
+        lista = None
+        fins = np.append(inicios[1:], len(ordenados)).tolist()
+        if len(ordenados) * maior_absoluto <= _LIMITE_INT64:
+            somas = np.add.reduceat(ordenados, inicios).tolist()
+        else:
+            # Σx poderia estourar int64: soma exata em inteiros do Python
+            lista = ordenados.tolist()
+            somas = [sum(lista[a:b]) for a, b in zip(inicios.tolist(), fins)]
+        if len(ordenados) * maior_absoluto * maior_absoluto <= _LIMITE_INT64:
+            quadrados = np.add.reduceat(ordenados * ordenados, inicios).tolist()
+        else:
+            # Σx² poderia estourar int64: idem
+            lista = ordenados.tolist() if lista is None else lista
+            quadrados = [sum(map(mul, lista[a:b], lista[a:b])) for a, b in zip(inicios.tolist(), fins)]
+        fins = np.append(inicios[1:], len(ordenados)) - 1
+        for codigo, total, total_quadrados, menor, maior in zip(
+                com_validos.tolist(), somas, quadrados,
+                ordenados[inicios].tolist(), ordenados[fins].tolist()):
+            soma[codigo] = total
+            soma_quadrados[codigo] = total_quadrados
+            minimo[codigo] = menor
+            maximo[codigo] = maior
+
+    grupos = _montar_grupos(tickers, registros.tolist(), validos.tolist(), soma,
+                            soma_quadrados, minimo, maximo, fator)
+
+    # Imputação e máscara de outliers, em vetor, com os valores de cada ativo
+    substitutos = np.asarray(grupos["substituto"], dtype=np.int64)
+    corrigidos = np.where(validos_mascara, valores, substitutos[codigos])
+    inferiores = np.asarray(grupos["limite_inferior"])[codigos]
+    superiores = np.asarray(grupos["limite_superior"])[codigos]
+    mantidos = (corrigidos >= inferiores) & (corrigidos <= superiores)
+    grupos["removidos"] = np.bincount(codigos[~mantidos], minlength=grupos_total).tolist()
+
+    # Mediana do vetor corrigido: posições centrais de cada grupo ordenado
+    ordenados = corrigidos[np.lexsort((corrigidos, codigos))]
+    inicios = np.concatenate(([0], np.cumsum(registros)[:-1]))
+    meio = inicios + registros // 2
+    pares = registros % 2 == 0
+    centrais = ordenados[meio]
+    anteriores = ordenados[np.where(pares, meio - 1, meio)]
+    grupos["mediana"] = [
+        (a + b) / 2 if par else b
+        for a, b, par in zip(anteriores.tolist(), centrais.tolist(), pares.tolist())
+    ]
+
+    return {"grupos": grupos, "corrigidos": corrigidos, "mantidos": mantidos}
+
+
+# ─────────────────────────────────────────────────────────────
+# GRAVAÇÃO E EXIBIÇÃO
+# ─────────────────────────────────────────────────────────────
+
+def salvar_agrupado(nome_arquivo: str, tickers: list, codigos, valores, mascara=None) -> int:
+    """
+    Grava registros 'ticker,quantidade' (apenas os da máscara, se houver),
+    em lotes e de forma atômica (escrita.arquivo_atomico).
+    Retorna a quantidade de registros gravados.
+    """
+    codigos = codigos.tolist() if hasattr(codigos, "tolist") else codigos
+    valores = valores.tolist() if hasattr(valores, "tolist") else valores
+    if mascara is not None:
+        mascara = mascara.tolist() if hasattr(mascara, "tolist") else mascara
+        pares = [(codigo, valor) for codigo, valor, dentro in zip(codigos, valores, mascara) if dentro]
+    else:
+        pares = list(zip(codigos, valores))
+
+    with arquivo_atomico(nome_arquivo) as arquivo:
+        for inicio in range(0, len(pares), TAMANHO_LOTE_ESCRITA):
+            lote = pares[inicio:inicio + TAMANHO_LOTE_ESCRITA]
+            arquivo.write("".join(f"{tickers[codigo]},{valor}\n"
+                                  for codigo, valor in lote).encode("utf-8"))
+    return len(pares)
+
+
+def salvar_resumo(nome_arquivo: str, grupos: dict) -> None:
+    """
+    Grava as métricas de todos os ativos em CSV (uma linha por ativo),
+    em lotes e de forma atômica (escrita.arquivo_atomico).
+    """
+    colunas = list(grupos)
+    linhas = list(zip(*(grupos[coluna] for coluna in colunas)))
+    with arquivo_atomico(nome_arquivo) as arquivo:
+        arquivo.write((",".join(colunas) + "\n").encode("utf-8"))
+        for inicio in range(0, len(linhas), TAMANHO_LOTE_ESCRITA):
+            lote = linhas[inicio:inicio + TAMANHO_LOTE_ESCRITA]
+            arquivo.write("".join(",".join("" if valor is None else str(valor) for valor in linha) + "\n"
+                                  for linha in lote).encode("utf-8"))
+
+
+def exibir_grupos(grupos: dict, limite: int = GRUPOS_EXIBIDOS) -> None:
+    """
+    Exibe as métricas dos primeiros 'limite' ativos (na ordem de
+    primeira aparição no arquivo).
+    """
+    total = len(grupos["ticker"])
+    print("\n" + "=" * 100)
+    print(f"  {'Ticker':<10}{'Regs':>8}{'Inval':>7}{'Média':>11}{'Mín':>8}{'Máx':>9}"
+          f"{'Mediana':>10}{'Desvio':>10}{'Lim.inf':>10}{'Lim.sup':>10}{'Outl':>6}")
+    print("=" * 100)
+    for indice in range(min(total, limite)):
+        minimo = grupos["minimo"][indice]
+        maximo = grupos["maximo"][indice]
+        print(f"  {grupos['ticker'][indice]:<10}{grupos['registros'][indice]:>8}"
+              f"{grupos['invalidos'][indice]:>7}{grupos['media'][indice]:>11.2f}"
+              f"{'-' if minimo is None else minimo:>8}{'-' if maximo is None else maximo:>9}"
+              f"{grupos['mediana'][indice]:>10.2f}{grupos['desvio'][indice]:>10.2f}"
+              f"{grupos['limite_inferior'][indice]:>10.2f}{grupos['limite_superior'][indice]:>10.2f}"
+              f"{grupos['removidos'][indice]:>6}")
+    if total > limite:
+        print(f"  ... e mais {total - limite} ativo(s) (use --resumo para gravar todos).")
+    print("=" * 100)
+
+
+# ─────────────────────────────────────────────────────────────
+# Ponto de entrada principal do programa
+# ─────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estatísticas agrupadas por ativo (ticker,quantidade)")
+    parser.add_argument("entrada", nargs="?", default=ARQUIVO_ENTRADA,
+                        help=f"arquivo 'ticker,quantidade' (padrão: {ARQUIVO_ENTRADA})")
+    parser.add_argument("--corrigidos", default=ARQUIVO_SAIDA_CORRIGIDOS,
+                        help="arquivo com os inválidos substituídos pela média do ativo")
+    parser.add_argument("--filtrados", default=ARQUIVO_SAIDA_FILTRADOS,
+                        help="arquivo sem os outliers de cada ativo")
+    parser.add_argument("--fator", type=float, default=FATOR_OUTLIER,
+                        help=f"multiplicador de σ para outliers (padrão: {FATOR_OUTLIER})")
+    parser.add_argument("--resumo", default=None, help="grava as métricas de todos os ativos em CSV")
+    parser.add_argument("--exibir", type=int, default=GRUPOS_EXIBIDOS,
+                        help=f"ativos exibidos no terminal (padrão: {GRUPOS_EXIBIDOS})")
+    argumentos = parser.parse_args()
+
+    print("=" * 60)
+    print("  ESTATÍSTICAS POR ATIVO")
+    print("=" * 60)
+
+    try:
+        tickers, codigos, valores, invalidas = ler_agrupado(argumentos.entrada)
+    except FileNotFoundError:
+        print(f"✘ Arquivo '{argumentos.entrada}' não encontrado.")
+        raise SystemExit(1)
+    except OverflowError as erro:
+        print(f"✘ {erro}")
+        raise SystemExit(1)
+
+    for numero_linha, linha in invalidas:
+        print(f"  ✘ Linha {numero_linha} inválida ignorada: '{linha}'")
+    print(f"✔ {len(valores)} registro(s) de {len(tickers)} ativo(s) lido(s) de '{argumentos.entrada}'.")
+
+    if len(valores) == 0:
+        print("Nenhum dado disponível. Encerrando.")
+    else:
+        resultado = agrupar(tickers, codigos, valores, argumentos.fator)
+        grupos = resultado["grupos"]
+        exibir_grupos(grupos, argumentos.exibir)
+
+        substituidos = sum(grupos["invalidos"])
+        removidos = sum(grupos["removidos"])
+        print(f"\n  ⚠ {substituidos} valor(es) inválido(s) substituído(s) pela média do ativo.")
+        print(f"  ⚠ {removidos} outlier(s) removido(s).")
+
+        gravados = salvar_agrupado(argumentos.corrigidos, tickers, codigos, resultado["corrigidos"])
+        print(f"\n✔ Arquivo salvo: '{argumentos.corrigidos}' ({gravados} registro(s)).")
+        gravados = salvar_agrupado(argumentos.filtrados, tickers, codigos,
+                                   resultado["corrigidos"], resultado["mantidos"])
+        print(f"✔ Arquivo salvo: '{argumentos.filtrados}' ({gravados} registro(s)).")
+
+        if argumentos.resumo:
+            salvar_resumo(argumentos.resumo, grupos)
+            print(f"✔ Resumo salvo: '{argumentos.resumo}' ({len(tickers)} ativo(s)).")
@@ -0,0 +1,366 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Suíte de benchmarks das Etapas 2, 3 e 4
+=============================================================
+Objetivo:
+  Medir, de forma reprodutível, o tempo e o pico de memória de
+  cada função das etapas, isoladamente e de ponta a ponta, sobre
+  arquivos sintéticos (gerador_sintetico.py) de tamanhos
+  crescentes. O resultado é gravado em JSON; com --comparar, um
+  resultado anterior serve de referência e as funções que
+  ficaram mais lentas (ou gastaram mais memória) além da
+  tolerância são apontadas como regressão.
+
+Medições (por função e por tamanho):
+  - tempo: melhor e mediana de N repetições (time.perf_counter);
+  - memória: pico de alocações Python em uma execução separada
+    (tracemalloc), para não distorcer a medição de tempo.
+  As mensagens impressas pelas funções vão para os.devnull:
+  o custo de formatá-las continua sendo medido.
+
+Uso:
+  python3 benchmark.py --saida base.json
+  python3 benchmark.py --tamanhos 1e3 1e5 1e6 --comparar base.json
+  python3 benchmark.py --tamanhos 1e8 --repeticoes 1 --sem-memoria --pasta /dados/bench
+=============================================================
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import etapa2_processamento as etapa2
+import etapa3_estatisticas as etapa3
+from gerador_sintetico import SEMENTE, TAXA_INVALIDOS, TAXA_OUTLIERS, gerar_arquivo
+from instrumentacao import Instrumentacao
+from relatorio import Relatorio
+
+VERSAO_RESULTADO = 1
+
+TAMANHOS_PADRAO = (10**3, 10**4, 10**5, 10**6)
+REPETICOES = 3
+TOLERANCIA = 0.10  # 10% acima da referência conta como regressão
+
+# Diferenças menores que estas são ruído de medição, nunca regressão
+TEMPO_MINIMO_COMPARAVEL = 0.001       # segundos
+MEMORIA_MINIMA_COMPARAVEL = 64 * 1024  # bytes
+
+
+# ─────────────────────────────────────────────────────────────
+# MEDIÇÃO
+# ─────────────────────────────────────────────────────────────
+
+def _executar_silenciosamente(funcao, argumentos: tuple):
+    """
+    Executa a função com a saída padrão desviada para os.devnull.
+    """
+    with open(os.devnull, "w", encoding="utf-8") as nulo, contextlib.redirect_stdout(nulo):
+        return funcao(*argumentos)
+
+
+def medir(funcao, argumentos: tuple = (), repeticoes: int = REPETICOES,
+          memoria: bool = True) -> dict:
+    """
+    Mede o tempo (e, opcionalmente, o pico de memória) de uma função.
+
+    Parâmetros:
+        funcao     (callable): função a medir.
+        argumentos (tuple)   : argumentos posicionais da função.
+        repeticoes (int)     : execuções cronometradas.
+        memoria    (bool)    : se True, faz uma execução extra sob tracemalloc.
+
+    Retorna:
+        medicao (dict): 'tempo_minimo', 'tempo_mediano' (segundos),
+                        'repeticoes' e 'pico_memoria' (bytes, ou None).
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        _executar_silenciosamente(funcao, argumentos)
+        tempos.append(time.perf_counter() - inicio)
+
+    pico = None
+    if memoria:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            _executar_silenciosamente(funcao, argumentos)
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "tempo_minimo":  min(tempos),
+        "tempo_mediano": statistics.median(tempos),
+        "repeticoes":    repeticoes,
+        "pico_memoria":  pico,
+    }
+
+
+# ─────────────────────────────────────────────────────────────
+# CENÁRIOS
+# ─────────────────────────────────────────────────────────────
+
+def executar_ponta_a_ponta(arquivo_entrada: str, pasta: str) -> None:
+    """
+    Reproduz o fluxo das Etapas 2, 3 e 4 sobre um arquivo, com os
+    artefatos intermediários gravados em 'pasta'. As Etapas 3 e 4
+    rodam pela mesma função do programa (etapa3.executar_padrao()),
+    com a instrumentação desativada, como na execução padrão.
+    """
+    arquivo_corrigido = os.path.join(pasta, "ponta_corrigidos.txt")
+    arquivo_final = os.path.join(pasta, "ponta_sem_outliers.txt")
+
+    # Etapa 2
+    dados = etapa2.ler_arquivo(arquivo_entrada)
+    agregados = etapa2.calcular_agregados(dados)
+    corrigidos = etapa2.substituir_invalidos(dados, agregados["media"])
+    etapa2.exibir_resultados(dados, agregados["media"], agregados["maximo"], agregados["minimo"])
+    etapa2.salvar_arquivo(corrigidos, arquivo_corrigido)
+
+    # Etapas 3 e 4
+    etapa3.executar_padrao(arquivo_corrigido, arquivo_final,
+                           Instrumentacao("etapa3", ativa=False), Relatorio("etapa3"))
+
+
+def medir_tamanho(arquivo: str, pasta: str, repeticoes: int = REPETICOES,
+                  memoria: bool = True) -> dict:
+    """
+    Mede cada função das etapas e o fluxo completo sobre um arquivo.
+
+    As entradas de cada função são preparadas fora da medição, com
+    as funções anteriores do fluxo, exatamente como no programa.
+
+    Retorna:
+        medicoes (dict): nome da função → medição (ver medir()).
+    """
+    # Entradas intermediárias, calculadas uma única vez
+    dados = _executar_silenciosamente(etapa2.ler_arquivo, (arquivo,))
+    media_validos = etapa2.calcular_media_manual(dados)
+    corrigidos = _executar_silenciosamente(etapa2.substituir_invalidos, (dados, media_validos))
+    media = etapa3.calcular_media_manual(corrigidos)
+    sem_outliers = _executar_silenciosamente(etapa3.remover_outliers, (corrigidos,))
+    arquivo_saida = os.path.join(pasta, "saida_benchmark.txt")
+
+    # Arquivo corrigido como o da Etapa 2, lido pela Etapa 3
+    arquivo_corrigido = os.path.join(pasta, "corrigidos_benchmark.txt")
+    arquivo_corrigido_saida = os.path.join(pasta, "corrigidos_benchmark_saida.txt")
+    _executar_silenciosamente(etapa2.salvar_arquivo, (corrigidos, arquivo_corrigido))
+
+    cenarios = {
+        "etapa2.ler_arquivo":                    (etapa2.ler_arquivo, (arquivo,)),
+        "etapa2.calcular_media_manual":          (etapa2.calcular_media_manual, (dados,)),
+        "etapa2.substituir_invalidos":           (etapa2.substituir_invalidos, (dados, media_validos)),
+        "etapa2.salvar_arquivo":                 (etapa2.salvar_arquivo, (corrigidos, arquivo_corrigido_saida)),
+        "etapa3.ler_arquivo":                    (etapa3.ler_arquivo, (arquivo_corrigido,)),
+        "etapa3.calcular_media_manual":          (etapa3.calcular_media_manual, (corrigidos,)),
+        "etapa3.calcular_desvio_padrao_manual":  (etapa3.calcular_desvio_padrao_manual, (corrigidos, media)),
+        "etapa3.calcular_e_exibir_estatisticas": (etapa3.calcular_e_exibir_estatisticas, (corrigidos,)),
+        "etapa3.remover_outliers":               (etapa3.remover_outliers, (corrigidos,)),
+        "etapa3.exibir_distribuicao_final":      (etapa3.exibir_distribuicao_final, (sem_outliers,)),
+        "etapa3.salvar_arquivo":                 (etapa3.salvar_arquivo, (sem_outliers, arquivo_saida)),
+        "ponta_a_ponta":                         (executar_ponta_a_ponta, (arquivo, pasta)),
+    }
+
+    medicoes = {}
+    for nome, (funcao, argumentos) in cenarios.items():
+        medicoes[nome] = medir(funcao, argumentos, repeticoes, memoria)
+        print(f"    {nome:<38} {medicoes[nome]['tempo_mediano']:10.4f} s")
+    return medicoes
+
+
+def arquivo_sintetico(pasta: str, linhas: int, taxa_invalidos: float,
+                      taxa_outliers: float, semente: int) -> str:
+    """
+    Caminho do arquivo sintético com esses parâmetros, gerado apenas
+    se ainda não existir na pasta (gerar 10⁸ linhas leva minutos).
+    """
+    nome = f"sintetico_{linhas}_{semente}_{taxa_invalidos:g}_{taxa_outliers:g}.txt"
+    caminho = os.path.join(pasta, nome)
+    if not os.path.exists(caminho):
+        gerar_arquivo(caminho, linhas, taxa_invalidos, taxa_outliers, semente)
+    return caminho
+
+
+def executar_benchmark(tamanhos=TAMANHOS_PADRAO, pasta: str = None,
+                       repeticoes: int = REPETICOES, memoria: bool = True,
+                       taxa_invalidos: float = TAXA_INVALIDOS,
+                       taxa_outliers: float = TAXA_OUTLIERS,
+                       semente: int = SEMENTE) -> dict:
+    """
+    Executa a suíte para cada tamanho e devolve o resultado completo.
+
+    Se 'pasta' não for informada, os arquivos sintéticos e as saídas
+    ficam em uma pasta temporária, removida ao final.
+
+    Retorna:
+        resultado (dict): 'versao', 'ambiente', 'parametros' e
+                          'medicoes' (tamanho → função → medição).
+    """
+    resultado = {
+        "versao": VERSAO_RESULTADO,
+        "ambiente": {
+            "python":     platform.python_version(),
+            "plataforma": platform.platform(),
+            "numpy":      etapa2.np is not None,
+        },
+        "parametros": {
+            "tamanhos":       list(tamanhos),
+            "repeticoes":     repeticoes,
+            "taxa_invalidos": taxa_invalidos,
+            "taxa_outliers":  taxa_outliers,
+            "semente":        semente,
+        },
+        "medicoes": {},
+    }
+
+    with contextlib.ExitStack() as pilha:
+        if pasta is None:
+            pasta = pilha.enter_context(tempfile.TemporaryDirectory(prefix="benchmark_"))
+        else:
+            os.makedirs(pasta, exist_ok=True)
+
+        for linhas in tamanhos:
+            print(f"\n  {linhas} linha(s)")
+            arquivo = arquivo_sintetico(pasta, linhas, taxa_invalidos, taxa_outliers, semente)
+            resultado["medicoes"][str(linhas)] = medir_tamanho(arquivo, pasta, repeticoes, memoria)
+
+    return resultado
+
+
+# ─────────────────────────────────────────────────────────────
+# COMPARAÇÃO COM A REFERÊNCIA
+# ─────────────────────────────────────────────────────────────
+
+def comparar(atual: dict, referencia: dict, tolerancia: float = TOLERANCIA) -> list:
+    """
+    Compara dois resultados e lista as regressões.
+
+    Uma regressão é um tempo mediano (ou pico de memória) maior que
+    o da referência por mais de 'tolerancia', para o mesmo tamanho
+    e a mesma função. Diferenças absolutas abaixo do ruído de
+    medição são ignoradas.
+
+    Retorna:
+        regressoes (list): dicts com 'tamanho', 'funcao', 'metrica',
+                           'referencia', 'atual' e 'variacao'.
+    """
+    regressoes = []
+    metricas = (
+        ("tempo_mediano", TEMPO_MINIMO_COMPARAVEL),
+        ("pico_memoria", MEMORIA_MINIMA_COMPARAVEL),
+    )
+
+    for tamanho, funcoes in atual["medicoes"].items():
+        base_tamanho = referencia.get("medicoes", {}).get(tamanho, {})
+        for funcao, medicao in funcoes.items():
+            base = base_tamanho.get(funcao)
+            if base is None:
+                continue
+            for metrica, minimo_absoluto in metricas:
+                valor, valor_base = medicao.get(metrica), base.get(metrica)
+                if valor is None or not valor_base:
+                    continue
+                if valor - valor_base < minimo_absoluto:
+                    continue
+                variacao = valor / valor_base - 1
+                if variacao > tolerancia:
+                    regressoes.append({
+                        "tamanho":    int(tamanho),
+                        "funcao":     funcao,
+                        "metrica":    metrica,
+                        "referencia": valor_base,
+                        "atual":      valor,
+                        "variacao":   variacao,
+                    })
+
+    return regressoes
+
+
+def exibir_regressoes(regressoes: list) -> None:
+    """
+    Exibe as regressões encontradas na comparação.
+    """
+    if not regressoes:
+        print("✔ Nenhuma regressão em relação à referência.")
+        return
+
+    print(f"✘ {len(regressoes)} regressão(ões) em relação à referência:")
+    for regressao in regressoes:
+        print(f"  ⚠ {regressao['tamanho']:>10} {regressao['funcao']:<38} "
+              f"{regressao['metrica']:<14} {regressao['referencia']:.4g} → "
+              f"{regressao['atual']:.4g} (+{regressao['variacao']:.0%})")
+
+
+# ─────────────────────────────────────────────────────────────
+# Ponto de entrada principal do programa
+# ─────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks das Etapas 2, 3 e 4")
+    parser.add_argument("--tamanhos", type=float, nargs="+", default=TAMANHOS_PADRAO,
+                        help="quantidades de linhas (aceita notação como 1e6)")
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES,
+                        help=f"execuções cronometradas por função (padrão: {REPETICOES})")
+    parser.add_argument("--sem-memoria", action="store_true",
+                        help="não mede o pico de memória (evita a execução extra)")
+    parser.add_argument("--invalidos", type=float, default=TAXA_INVALIDOS,
+                        help="fração de valores ≤ 0 nos dados sintéticos")
+    parser.add_argument("--outliers", type=float, default=TAXA_OUTLIERS,
+                        help="fração de outliers nos dados sintéticos")
+    parser.add_argument("--semente", type=int, default=SEMENTE, help="semente do gerador")
+    parser.add_argument("--pasta", default=None,
+                        help="pasta para reaproveitar os arquivos sintéticos (padrão: temporária)")
+    parser.add_argument("--saida", default=None, help="grava o resultado em JSON neste arquivo")
+    parser.add_argument("--comparar", default=None, metavar="REFERENCIA",
+                        help="resultado JSON anterior usado como referência")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA,
+                        help=f"aumento relativo aceito antes de apontar regressão (padrão: {TOLERANCIA})")
+    argumentos = parser.parse_args()
+
+    referencia = None
+    if argumentos.comparar:
+        try:
+            with open(argumentos.comparar, "r", encoding="utf-8") as arquivo:
+                referencia = json.load(arquivo)
+        except (OSError, ValueError) as erro:
+            print(f"✘ Referência inválida: {erro}")
+            sys.exit(2)
+
+    print("=" * 60)
+    print("  BENCHMARK – Etapas 2, 3 e 4")
+    print("=" * 60)
+
+    resultado = executar_benchmark(
+        [int(tamanho) for tamanho in argumentos.tamanhos],
+        argumentos.pasta,
+        argumentos.repeticoes,
+        not argumentos.sem_memoria,
+        argumentos.invalidos,
+        argumentos.outliers,
+        argumentos.semente,
+    )
+
+    if argumentos.saida:
+        with open(argumentos.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, indent=2)
+        print(f"\n✔ Resultado gravado em '{argumentos.saida}'.")
+    else:
+        print()
+        print(json.dumps(resultado, indent=2))
+
+    if referencia is not None:
+        print()
+        regressoes = comparar(resultado, referencia, argumentos.tolerancia)
+        exibir_regressoes(regressoes)
+        if regressoes:
+            sys.exit(1)
@@ -0,0 +1,215 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Leitura direta de arquivos comprimidos (gzip e xz)
+=============================================================
+Objetivo:
+  Ler os extratos arquivados como .gz ou .xz sem descomprimi-los
+  antes para o disco: o conteúdo é decodificado em pedaços e
+  entregue direto ao conversor de linhas (leitura.py).
+
+Detecção:
+  Pelos bytes mágicos do início do arquivo, e não pela extensão:
+    gzip: 1f 8b
+    xz  : fd 37 7a 58 5a 00  ("\\xfd7zXZ\\x00")
+
+gzip com vários membros:
+  Arquivos concatenados (cat a.gz b.gz) ou gravados em membros
+  (escrita.py, bgzip, pigz --independent) contêm vários membros
+  independentes. O primeiro é decodificado em fluxo, na thread
+  atual; os seguintes são decodificados em paralelo por threads
+  (o zlib libera o GIL durante a descompressão).
+
+  O gzip não guarda onde cada membro começa. Por isso, cada
+  ocorrência de 1f 8b 08 é um candidato: as threads tentam
+  decodificar a partir de cada candidato, e só são aproveitados
+  os membros que começam exatamente onde o anterior terminou.
+  Candidatos falsos (a sequência dentro dos dados comprimidos)
+  falham em poucos bytes ou são descartados.
+
+Memória:
+  No máximo 2 × trabalhadores membros decodificados aguardam a
+  vez de serem entregues.
+=============================================================
+"""
+
+import lzma
+import mmap
+import os
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from escrita import COMPRESSOES
+
+# Bytes mágicos de cada formato de compressão
+MAGICOS = {
+    b"\x1f\x8b": "gzip",
+    b"\xfd7zXZ\x00": "xz",
+}
+TAMANHO_MAGICO = max(len(magico) for magico in MAGICOS)
+
+INICIO_MEMBRO_GZIP = b"\x1f\x8b\x08"  # Mágico + método deflate
+JANELA_GZIP = 16 + zlib.MAX_WBITS     # Cabeçalho e rodapé gzip
+
+# Bytes comprimidos entregues ao descompressor por chamada
+PASSO_DESCOMPRESSAO = 1 << 20  # 1 MiB
+
+
+def detectar_compressao(nome_arquivo: str):
+    """
+    Compressão do arquivo pelos bytes mágicos ("gzip", "xz" ou None).
+    """
+    with open(nome_arquivo, "rb") as arquivo:
+        inicio = arquivo.read(TAMANHO_MAGICO)
+    for magico, compressao in MAGICOS.items():
+        if inicio.startswith(magico):
+            return compressao
+    return None
+
+
+def iterar_descomprimido(nome_arquivo: str, compressao: str, trabalhadores: int = None):
+    """
+    Descomprime o arquivo em pedaços, sem gravar nada em disco.
+
+    Parâmetros:
+        nome_arquivo  (str): caminho do arquivo comprimido.
+        compressao    (str): "gzip" ou "xz" (ver detectar_compressao()).
+        trabalhadores (int): threads para os membros gzip seguintes
+                             ao primeiro (padrão: número de CPUs).
+
+    Produz:
+        pedaco (bytes): trecho seguinte do conteúdo descomprimido.
+
+    Levanta:
+        ValueError: arquivo corrompido ou truncado.
+    """
+    if compressao not in COMPRESSOES:
+        raise ValueError(f"compressão desconhecida: {compressao!r} (use um de {COMPRESSOES})")
+
+    try:
+        if compressao == "xz":
+            # O lzma já trata vários streams e o preenchimento entre eles
+            with lzma.open(nome_arquivo, "rb") as arquivo:
+                for pedaco in iter(lambda: arquivo.read(PASSO_DESCOMPRESSAO), b""):
+                    yield pedaco
+            return
+
+        with open(nome_arquivo, "rb") as arquivo:
+            with mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                yield from _iterar_gzip(mapa, trabalhadores or os.cpu_count() or 1)
+    except (zlib.error, lzma.LZMAError, EOFError) as erro:
+        raise ValueError(f"Arquivo {compressao} '{nome_arquivo}' inválido: {erro}") from erro
+
+
+# ─────────────────────────────────────────────────────────────
+# gzip: membro a membro
+# ─────────────────────────────────────────────────────────────
+
+def _decodificar_membro(mapa, inicio: int):
+    """
+    Decodifica o membro gzip que começa em 'inicio', em pedaços.
+
+    Produz os pedaços descomprimidos e retorna (via StopIteration)
+    a posição logo após o fim do membro.
+
+    Levanta:
+        zlib.error: dados inválidos a partir de 'inicio'.
+        EOFError  : o arquivo termina no meio do membro.
+    """
+    descompressor = zlib.decompressobj(JANELA_GZIP)
+    posicao = inicio
+
+    while not descompressor.eof:
+        entrada = mapa[posicao:posicao + PASSO_DESCOMPRESSAO]
+        if not entrada:
+            raise EOFError("arquivo gzip truncado: o último membro está incompleto")
+        posicao = posicao + len(entrada)
+        pedaco = descompressor.decompress(entrada)
+        if pedaco:
+            yield pedaco
+
+    return posicao - len(descompressor.unused_data)
+
+
+def _tentar_membro(mapa, inicio: int):
+    """
+    Tarefa das threads: decodifica um candidato inteiro.
+
+    Retorna:
+        (fim, dados) (tuple), ou None se não houver um membro
+        válido começando em 'inicio'.
+    """
+    pedacos = []
+    membro = _decodificar_membro(mapa, inicio)
+    try:
+        while True:
+            pedacos.append(next(membro))
+    except StopIteration as fim:
+        return fim.value, b"".join(pedacos)
+    except (zlib.error, EOFError):
+        return None
+
+
+def _candidatos(mapa, inicio: int):
+    """
+    Posições a partir de 'inicio' onde um membro gzip pode começar.
+    """
+    posicao = mapa.find(INICIO_MEMBRO_GZIP, inicio)
+    while posicao != -1:
+        yield posicao
+        posicao = mapa.find(INICIO_MEMBRO_GZIP, posicao + 1)
+
+
+def _verificar_final(mapa, posicao: int) -> None:
+    """
+    Depois do último membro só pode haver preenchimento com zeros
+    (mesma regra do módulo gzip).
+    """
+    resto = mapa[posicao:]
+    if resto.strip(b"\x00"):
+        raise zlib.error(f"dados inválidos após o último membro gzip (byte {posicao})")
+
+
+def _iterar_gzip(mapa, trabalhadores: int):
+    tamanho = len(mapa)
+    candidatos = _candidatos(mapa, 1)
+    pendentes = deque()
+
+    with ThreadPoolExecutor(max_workers=trabalhadores) as executor:
+
+        def abastecer():
+            while len(pendentes) < 2 * trabalhadores:
+                posicao = next(candidatos, None)
+                if posicao is None:
+                    return
+                pendentes.append((posicao, executor.submit(_tentar_membro, mapa, posicao)))
+
+        try:
+            # 1º membro em fluxo, enquanto as threads adiantam os seguintes
+            abastecer()
+            proximo = yield from _decodificar_membro(mapa, 0)
+
+            while proximo < tamanho:
+                while pendentes and pendentes[0][0] < proximo:
+                    pendentes.popleft()[1].cancel()  # Candidato falso, dentro de um membro
+                    abastecer()
+                if not pendentes or pendentes[0][0] != proximo:
+                    break  # Nenhum membro começa aqui
+
+                _, futuro = pendentes.popleft()
+                resultado = futuro.result()
+                abastecer()
+                if resultado is None:
+                    # Membro real corrompido: refaz em fluxo para levantar o erro
+                    proximo = yield from _decodificar_membro(mapa, proximo)
+                    continue
+                proximo, dados = resultado
+                if dados:
+                    yield dados
+        finally:
+            # Também quando o leitor para no meio (close() do gerador)
+            for _, futuro in pendentes:
+                futuro.cancel()
+
+    _verificar_final(mapa, proximo)
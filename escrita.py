@@ -0,0 +1,199 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Gravação atômica e em lote dos artefatos
+=============================================================
+Objetivo:
+  Gravar vetores de inteiros (um por linha) sem as duas falhas
+  da gravação linha a linha:
+    - custo: em vez de um str() e um write() por número, os
+      valores são formatados em lotes grandes ("\\n".join em C)
+      e cada lote é gravado com uma única chamada;
+    - consistência: o conteúdo vai para um arquivo temporário na
+      mesma pasta, que só substitui o destino (os.replace, atômico)
+      depois de completo. Uma interrupção no meio deixa o arquivo
+      anterior intacto, nunca um arquivo truncado.
+
+Compressão opcional (gzip ou xz):
+  Escolhida pelo parâmetro 'compressao' ou pela extensão do
+  destino (.gz, .xz). A compressão roda em uma thread separada:
+  enquanto ela comprime um lote (zlib e lzma liberam o GIL), a
+  thread principal já formata o seguinte.
+
+  O gzip é gravado em membros independentes (um a cada
+  LOTES_POR_MEMBRO lotes), que qualquer leitor gzip lê como um
+  único fluxo e que descompressao.py decodifica em paralelo.
+=============================================================
+"""
+
+import contextlib
+import gzip
+import lzma
+import os
+import queue
+import stat
+import tempfile
+import threading
+
+COMPRESSOES = ("gzip", "xz")
+EXTENSOES_COMPRESSAO = {".gz": "gzip", ".xz": "xz"}
+
+TAMANHO_LOTE_ESCRITA = 1 << 16   # Valores formatados por lote
+LOTES_EM_ESPERA = 4              # Lotes formatados aguardando a compressão
+NIVEL_GZIP = 6                   # Equilíbrio entre tempo e tamanho
+NIVEL_XZ = 6
+LOTES_POR_MEMBRO = 16            # ≈ 1 milhão de valores por membro gzip
+
+
+def compressao_do_nome(nome_arquivo: str):
+    """
+    Compressão indicada pela extensão do arquivo ("gzip", "xz" ou None).
+    """
+    return EXTENSOES_COMPRESSAO.get(os.path.splitext(nome_arquivo)[1].lower())
+
+
+def nome_comprimido(nome_arquivo: str, compressao: str) -> str:
+    """
+    Acrescenta ao nome a extensão da compressão (".gz" ou ".xz"),
+    se ele ainda não a tiver.
+    """
+    if compressao is None or compressao_do_nome(nome_arquivo) == compressao:
+        return nome_arquivo
+    for extensao, tipo in EXTENSOES_COMPRESSAO.items():
+        if tipo == compressao:
+            return nome_arquivo + extensao
+    raise ValueError(f"compressão desconhecida: {compressao!r} (use um de {COMPRESSOES})")
+
+
+def _permissoes_destino(nome_arquivo: str) -> int:
+    """
+    Permissões do arquivo final: as do destino, se já existir; senão,
+    as que open() usaria (0o666 menos a umask).
+    """
+    try:
+        return stat.S_IMODE(os.stat(nome_arquivo).st_mode)
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+@contextlib.contextmanager
+def arquivo_atomico(nome_arquivo: str, sincronizar: bool = False):
+    """
+    Abre (em modo binário) um temporário na pasta do destino e, se
+    o bloco terminar sem erro, o renomeia para 'nome_arquivo'. Em
+    caso de erro, o temporário é removido e o destino não muda.
+
+    Parâmetros:
+        nome_arquivo (str) : caminho final.
+        sincronizar  (bool): chama fsync antes da troca, para que o
+                             conteúdo sobreviva também a uma queda
+                             de energia (mais lento).
+    """
+    pasta = os.path.dirname(os.path.abspath(nome_arquivo))
+    descritor, temporario = tempfile.mkstemp(
+        dir=pasta, prefix="." + os.path.basename(nome_arquivo) + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(descritor, "wb") as arquivo:
+            yield arquivo
+            arquivo.flush()
+            if sincronizar:
+                os.fsync(arquivo.fileno())
+        os.chmod(temporario, _permissoes_destino(nome_arquivo))
+        os.replace(temporario, nome_arquivo)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temporario)
+        raise
+
+
+def formatar_lotes(valores, tamanho_lote: int = TAMANHO_LOTE_ESCRITA):
+    """
+    Formata os inteiros em lotes de texto (um valor por linha).
+
+    Produz:
+        lote (bytes): até 'tamanho_lote' linhas, terminadas em "\\n".
+    """
+    for inicio in range(0, len(valores), tamanho_lote):
+        trecho = valores[inicio:inicio + tamanho_lote]
+        yield ("\n".join(map(str, trecho)) + "\n").encode("ascii")
+
+
+def _abrir_compressor(arquivo, compressao: str):
+    if compressao == "gzip":
+        return gzip.GzipFile(fileobj=arquivo, mode="wb", compresslevel=NIVEL_GZIP, mtime=0)
+    return lzma.LZMAFile(arquivo, mode="wb", preset=NIVEL_XZ)
+
+
+def _gravar_comprimido(arquivo, lotes, compressao: str) -> None:
+    """
+    Comprime os lotes em uma thread separada, enquanto a thread
+    atual continua formatando os próximos.
+    """
+    fila = queue.Queue(maxsize=LOTES_EM_ESPERA)
+    erros = []
+
+    def comprimir():
+        terminou = False
+        try:
+            compressor = _abrir_compressor(arquivo, compressao)
+            lotes_no_membro = 0
+            while True:
+                lote = fila.get()
+                if lote is None:
+                    terminou = True
+                    break
+                if compressao == "gzip" and lotes_no_membro == LOTES_POR_MEMBRO:
+                    compressor.close()  # Fecha o membro; o arquivo continua aberto
+                    compressor = _abrir_compressor(arquivo, compressao)
+                    lotes_no_membro = 0
+                compressor.write(lote)
+                lotes_no_membro = lotes_no_membro + 1
+            compressor.close()
+        except BaseException as erro:  # Repassado à thread principal
+            erros.append(erro)
+            # Esvazia a fila para não bloquear quem ainda está produzindo
+            while not terminou:
+                terminou = fila.get() is None
+
+    compressora = threading.Thread(target=comprimir, name="compressao", daemon=True)
+    compressora.start()
+    try:
+        for lote in lotes:
+            if erros:
+                break
+            fila.put(lote)
+    finally:
+        fila.put(None)
+        compressora.join()
+
+    if erros:
+        raise erros[0]
+
+
+def gravar_inteiros(valores, nome_arquivo: str, compressao: str = None,
+                    sincronizar: bool = False) -> None:
+    """
+    Grava inteiros em texto, um por linha, de forma atômica.
+
+    Parâmetros:
+        valores      (sequência): inteiros (list, array('q'), memoryview...).
+        nome_arquivo (str)      : caminho de saída.
+        compressao   (str)      : "gzip", "xz" ou None (padrão: pela
+                                  extensão do arquivo).
+        sincronizar  (bool)     : fsync antes da troca atômica.
+    """
+    if compressao is None:
+        compressao = compressao_do_nome(nome_arquivo)
+    elif compressao not in COMPRESSOES:
+        raise ValueError(f"compressão desconhecida: {compressao!r} (use um de {COMPRESSOES})")
+
+    with arquivo_atomico(nome_arquivo, sincronizar) as arquivo:
+        lotes = formatar_lotes(valores)
+        if compressao is None:
+            for lote in lotes:
+                arquivo.write(lote)
+        else:
+            _gravar_comprimido(arquivo, lotes, compressao)
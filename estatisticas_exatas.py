@@ -0,0 +1,192 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Estatísticas exatas para dados inteiros
+=============================================================
+Objetivo:
+  Calcular média, variância e desvio padrão de vetores de
+  inteiros a partir de UMA agregação (n, Σx, Σx²), com inteiros
+  de precisão arbitrária do Python, em vez de chamar
+  statistics.mean(), statistics.variance() e statistics.stdev(),
+  que convertem cada valor em fração e percorrem os dados uma
+  vez por chamada.
+
+Os resultados são idênticos, bit a bit, aos do módulo
+statistics para dados inteiros:
+  média     = Σx / n
+  variância = (n·Σx² − (Σx)²) / (n·(n − 1))
+  desvio    = √variância, com arredondamento correto
+=============================================================
+"""
+
+import math
+import statistics
+import sys
+from fractions import Fraction
+from operator import mul
+
+try:
+    import numpy as np  # Opcional: soma em blocos int64
+except ImportError:
+    np = None
+
+# A partir deste tamanho as somas usam o backend NumPy (se instalado)
+LIMIAR_NUMPY = 100_000
+
+# Largura usada no arredondamento da raiz (mesma de statistics)
+_LARGURA_RAIZ = 2 * sys.float_info.mant_dig + 3
+
+_LIMITE_INT64 = 2 ** 63 - 1
+
+# Abaixo de tantos termos por bloco, somar bloco a bloco vira uma
+# chamada NumPy por poucos valores; a soma dividida é mais rápida
+BLOCO_MINIMO = 4096
+
+# Termos por soma dividida: as partes baixas (< 2³²) somam < 2⁶³
+_BLOCO_DIVIDIDO = 1 << 31
+
+
+def calcular_somas(valores) -> tuple:
+    """
+    Calcula (n, Σx, Σx²) exatamente, em uma agregação.
+
+    Parâmetros:
+        valores (sequência): inteiros (list, array('q'), memoryview, ndarray...).
+
+    Retorna:
+        (n, soma, soma_quadrados) (tuple): inteiros do Python.
+    """
+    if np is not None and (len(valores) >= LIMIAR_NUMPY or isinstance(valores, np.ndarray)):
+        return _somas_numpy(valores)  # Vetores NumPy nunca somam elemento a elemento
+
+    return len(valores), sum(valores), sum(map(mul, valores, valores))
+
+
+def _somas_numpy(valores) -> tuple:
+    """
+    Backend NumPy de calcular_somas(): soma em blocos int64 que
+    comprovadamente não estouram, ou em partes de 32 bits quando os
+    blocos seriam pequenos demais (soma_exata_int64()). Se os
+    quadrados não couberem em int64, Σx² é promovida para inteiros
+    do Python.
+    """
+    vetor = np.asarray(valores, dtype=np.int64)
+    n = int(vetor.size)
+    if n == 0:
+        return 0, 0, 0
+
+    maior_absoluto = max(abs(int(vetor.max())), abs(int(vetor.min())), 1)
+
+    # Σx: blocos tais que (bloco × |x|máx) cabe em int64
+    soma = soma_exata_int64(vetor, maior_absoluto)
+
+    # Σx²: idem para (bloco × x²máx); senão, promove para int do Python
+    quadrado_maximo = maior_absoluto * maior_absoluto
+    if quadrado_maximo > _LIMITE_INT64:
+        lista = vetor.tolist()
+        return n, soma, sum(map(mul, lista, lista))
+
+    bloco = _LIMITE_INT64 // quadrado_maximo
+    if bloco < BLOCO_MINIMO:
+        return n, soma, soma_exata_int64(vetor * vetor, quadrado_maximo)
+
+    soma_quadrados = 0
+    for inicio in range(0, n, bloco):
+        trecho = vetor[inicio:inicio + bloco]
+        soma_quadrados = soma_quadrados + int(np.dot(trecho, trecho))
+
+    return n, soma, soma_quadrados
+
+
+def soma_exata_int64(termos, maior_termo: int) -> int:
+    """
+    Σ exata de um vetor NumPy int64 cujos termos têm |t| ≤ maior_termo.
+
+    Se ao menos BLOCO_MINIMO termos cabem em um bloco sem estourar
+    o int64, soma bloco a bloco. Senão, divide cada termo em parte
+    alta e baixa de 32 bits (t = alta·2³² + baixa, com 0 ≤ baixa <
+    2³²) e soma as partes em int64, que não estouram até 2³¹ termos.
+    """
+    bloco = _LIMITE_INT64 // max(maior_termo, 1)
+    soma = 0
+    if bloco >= BLOCO_MINIMO:
+        for inicio in range(0, len(termos), bloco):
+            soma = soma + int(termos[inicio:inicio + bloco].sum(dtype=np.int64))
+        return soma
+
+    for inicio in range(0, len(termos), _BLOCO_DIVIDIDO):
+        trecho = termos[inicio:inicio + _BLOCO_DIVIDIDO]
+        alta = int(np.right_shift(trecho, 32).sum(dtype=np.int64))
+        baixa = int(np.bitwise_and(trecho, 0xFFFFFFFF).sum(dtype=np.int64))
+        soma = soma + (alta << 32) + baixa
+    return soma
+
+
+def media_exata(n: int, soma: int):
+    """
+    Média a partir de (n, Σx), igual a statistics.mean():
+    int quando a divisão é exata, float corretamente arredondado
+    nos demais casos.
+    """
+    if n < 1:
+        raise statistics.StatisticsError("mean requires at least one data point")
+    if soma % n == 0:
+        return soma // n
+    return soma / n
+
+
+def _variancia_fracao(n: int, soma: int, soma_quadrados: int) -> Fraction:
+    """
+    Variância amostral exata, como fração irredutível.
+    """
+    return Fraction(n * soma_quadrados - soma * soma, n * (n - 1))
+
+
+def variancia_exata(n: int, soma: int, soma_quadrados: int):
+    """
+    Variância amostral a partir de (n, Σx, Σx²), igual a
+    statistics.variance() para dados inteiros.
+    """
+    if n < 2:
+        raise statistics.StatisticsError("variance requires at least two data points")
+
+    variancia = _variancia_fracao(n, soma, soma_quadrados)
+    if variancia.denominator == 1:
+        return variancia.numerator
+    return float(variancia)
+
+
+def desvio_padrao_exato(n: int, soma: int, soma_quadrados: int) -> float:
+    """
+    Desvio padrão amostral a partir de (n, Σx, Σx²), igual a
+    statistics.stdev(): raiz da fração exata, corretamente arredondada.
+    """
+    if n < 2:
+        raise statistics.StatisticsError("stdev requires at least two data points")
+
+    variancia = _variancia_fracao(n, soma, soma_quadrados)
+    return _raiz_de_fracao(variancia.numerator, variancia.denominator)
+
+
+def _raiz_de_fracao(numerador: int, denominador: int) -> float:
+    """
+    √(numerador / denominador) como float corretamente arredondado.
+    Calcula a raiz inteira com bits de sobra e arredondamento para
+    ímpar, e deixa a conversão final para float fazer o arredondamento.
+    """
+    q = (numerador.bit_length() - denominador.bit_length() - _LARGURA_RAIZ) // 2
+    if q >= 0:
+        raiz = _raiz_inteira_impar(numerador, denominador << 2 * q) << q
+        escala = 1
+    else:
+        raiz = _raiz_inteira_impar(numerador << -2 * q, denominador)
+        escala = 1 << -q
+    return raiz / escala
+
+
+def _raiz_inteira_impar(numerador: int, denominador: int) -> int:
+    """
+    Raiz inteira de numerador / denominador, arredondada para ímpar.
+    """
+    raiz = math.isqrt(numerador // denominador)
+    return raiz | (raiz * raiz * denominador != numerador)
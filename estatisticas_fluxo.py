@@ -0,0 +1,244 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Modo fluxo – estatísticas online (Welford) com memória constante
+=============================================================
+Objetivo:
+  Calcular média e desvio padrão em UMA passada pelo arquivo,
+  sem manter o vetor como lista de inteiros do Python, e remover
+  os outliers (critério ±2σ da Etapa 4) em uma segunda passada,
+  gravando o resultado à medida que o arquivo é percorrido.
+
+Algoritmo de Welford (atualização por valor):
+  n     = n + 1
+  delta = x - média
+  média = média + delta / n
+  M2    = M2 + delta * (x - média)
+  variância amostral = M2 / (n - 1)
+
+Blocos inteiros são incorporados pela fórmula de combinação de
+Chan et al., que generaliza a atualização de Welford para dois
+acumuladores (e também é usada para juntar resultados parciais).
+=============================================================
+"""
+
+import math
+from operator import mul
+
+from escrita import arquivo_atomico
+from leitura import iterar_blocos
+from relatorio import LIMITE_AMOSTRA, AmostraLimitada
+
+
+class AcumuladorWelford:
+    """
+    Acumulador online de contagem, média, M2, mínimo e máximo.
+    Ocupa memória constante, independentemente do volume de dados.
+    """
+
+    def __init__(self):
+        self.contagem = 0
+        self.media = 0.0
+        self.m2 = 0.0       # Soma dos quadrados dos desvios
+        self.minimo = None
+        self.maximo = None
+
+    def adicionar(self, valor: int) -> None:
+        """
+        Incorpora um único valor (atualização de Welford).
+        """
+        self.contagem = self.contagem + 1
+        delta = valor - self.media
+        self.media = self.media + delta / self.contagem
+        self.m2 = self.m2 + delta * (valor - self.media)
+
+        if self.minimo is None or valor < self.minimo:
+            self.minimo = valor
+        if self.maximo is None or valor > self.maximo:
+            self.maximo = valor
+
+    def adicionar_bloco(self, bloco) -> None:
+        """
+        Incorpora um bloco de inteiros de uma vez.
+        Soma e soma dos quadrados do bloco são exatas (int do Python);
+        o bloco é então combinado ao acumulador pela fórmula de Chan.
+        """
+        n = len(bloco)
+        if n == 0:
+            return
+
+        soma = sum(bloco)
+        soma_quadrados = sum(map(mul, bloco, bloco))
+
+        parcial = AcumuladorWelford()
+        parcial.contagem = n
+        parcial.media = soma / n
+        parcial.m2 = (n * soma_quadrados - soma * soma) / n
+        parcial.minimo = min(bloco)
+        parcial.maximo = max(bloco)
+
+        self.combinar(parcial)
+
+    def combinar(self, outro: "AcumuladorWelford") -> None:
+        """
+        Junta outro acumulador a este (fórmula de Chan et al.).
+        """
+        if outro.contagem == 0:
+            return
+        if self.contagem == 0:
+            self.contagem = outro.contagem
+            self.media = outro.media
+            self.m2 = outro.m2
+            self.minimo = outro.minimo
+            self.maximo = outro.maximo
+            return
+
+        total = self.contagem + outro.contagem
+        delta = outro.media - self.media
+        self.media = self.media + delta * outro.contagem / total
+        self.m2 = self.m2 + outro.m2 + delta * delta * self.contagem * outro.contagem / total
+        self.contagem = total
+
+        if outro.minimo < self.minimo:
+            self.minimo = outro.minimo
+        if outro.maximo > self.maximo:
+            self.maximo = outro.maximo
+
+    @property
+    def variancia(self) -> float:
+        """Variância amostral (divisor n - 1); 0.0 com menos de 2 valores."""
+        if self.contagem < 2:
+            return 0.0
+        return self.m2 / (self.contagem - 1)
+
+    @property
+    def desvio_padrao(self) -> float:
+        """Desvio padrão amostral; 0.0 com menos de 2 valores."""
+        return math.sqrt(self.variancia)
+
+
+def acumular_arquivo(nome_arquivo: str, esboco=None) -> AcumuladorWelford:
+    """
+    Primeira passada: percorre o arquivo em blocos e acumula as
+    estatísticas, sem guardar os valores. Se um esboço de quantis
+    (quantis.EsbocoQuantis) for informado, ele também é alimentado.
+    """
+    acumulador = AcumuladorWelford()
+    for bloco in iterar_blocos(nome_arquivo):
+        acumulador.adicionar_bloco(bloco)
+        if esboco is not None:
+            esboco.adicionar_bloco(bloco)
+    return acumulador
+
+
+def filtrar_outliers_fluxo(arquivo_entrada: str, arquivo_saida: str,
+                           limite_inferior: float, limite_superior: float,
+                           amostra: AmostraLimitada = None) -> tuple:
+    """
+    Percorre o arquivo em blocos e grava apenas os valores dentro
+    de [limite_inferior, limite_superior]. A saída é gravada de
+    forma atômica (escrita.py): só substitui o arquivo anterior
+    depois de completa.
+
+    Os outliers não são exibidos um a um: se 'amostra' for
+    informada, recebe os pares (índice, valor) removidos (guarda
+    só os primeiros, mas conta todos).
+
+    Retorna:
+        (removidos, mantidos) (tuple): contagens de registros.
+    """
+    if amostra is None:
+        amostra = AmostraLimitada(0)  # Apenas conta
+    removidos_antes = amostra.total
+    mantidos = 0
+    indice = 0
+
+    with arquivo_atomico(arquivo_saida) as saida:
+        for bloco in iterar_blocos(arquivo_entrada):
+            filtrado = []
+            for valor in bloco:
+                if valor > limite_superior or valor < limite_inferior:
+                    amostra.adicionar((indice, valor))
+                else:
+                    filtrado.append(valor)
+                indice = indice + 1
+
+            if filtrado:
+                saida.write(("\n".join(map(str, filtrado)) + "\n").encode("ascii"))
+                mantidos = mantidos + len(filtrado)
+
+    return amostra.total - removidos_antes, mantidos
+
+
+def iterar_outliers_fluxo(arquivo_entrada: str, limite_inferior: float,
+                          limite_superior: float):
+    """
+    Percorre o arquivo em blocos e produz os pares (índice, valor)
+    dos valores fora de [limite_inferior, limite_superior], para
+    gravar a lista completa dos removidos sem carregar o vetor.
+    """
+    indice = 0
+    for bloco in iterar_blocos(arquivo_entrada):
+        for valor in bloco:
+            if valor > limite_superior or valor < limite_inferior:
+                yield indice, valor
+            indice = indice + 1
+
+
+def remover_outliers_fluxo(arquivo_entrada: str, arquivo_saida: str, fator: float = 2.0,
+                           esboco=None, exibir: bool = True,
+                           limite_amostra: int = LIMITE_AMOSTRA) -> dict:
+    """
+    Remove outliers (valor fora de média ± fator × desvio padrão)
+    em duas passadas sobre o arquivo, com memória constante.
+
+    Em vez de um aviso por valor, exibe o total removido e uma
+    amostra limitada (índice, valor) dos outliers.
+
+    Parâmetros:
+        arquivo_entrada (str)  : arquivo de entrada (texto ou .bin).
+        arquivo_saida   (str)  : arquivo texto de saída, sem outliers.
+        fator           (float): número de desvios padrão (padrão: 2).
+        esboco  (EsbocoQuantis): opcional; recebe os valores na 1ª passada.
+        exibir          (bool) : exibe limites, totais e a amostra.
+        limite_amostra  (int)  : outliers guardados na amostra.
+
+    Retorna:
+        resumo (dict): média, desvio, limites, contagens de registros
+                       removidos e mantidos e a amostra dos removidos.
+    """
+    # 1ª passada: média e desvio padrão (Welford)
+    acumulador = acumular_arquivo(arquivo_entrada, esboco)
+
+    media  = acumulador.media
+    desvio = acumulador.desvio_padrao
+
+    limite_superior = media + fator * desvio
+    limite_inferior = media - fator * desvio
+
+    if exibir:
+        print(f"\n  Média          : {media:.2f}")
+        print(f"  Desvio Padrão  : {desvio:.2f}")
+        print(f"  Limite superior: {limite_superior:.2f}")
+        print(f"  Limite inferior: {limite_inferior:.2f}")
+
+    # 2ª passada: filtra e grava bloco a bloco
+    amostra = AmostraLimitada(limite_amostra)
+    removidos, mantidos = filtrar_outliers_fluxo(arquivo_entrada, arquivo_saida,
+                                                 limite_inferior, limite_superior, amostra)
+
+    if exibir:
+        if removidos > 0:
+            print(f"\n  ⚠ Outliers removidos (índice, valor): {amostra.texto()}")
+        print(f"\n  Total removido : {removidos} outlier(s)")
+        print(f"  Registros finais: {mantidos}")
+
+    return {
+        "media":           media,
+        "desvio":          desvio,
+        "limite_superior": limite_superior,
+        "limite_inferior": limite_inferior,
+        "removidos":       removidos,
+        "mantidos":        mantidos,
+        "amostra":         amostra,
+    }
@@ -4,11 +4,16 @@ SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
 Etapa 1 – Coleta e Persistência
 =============================================================
 Objetivo:
-  Ler números inteiros via input(), armazená-los em uma lista
-  usando append() e salvar em arquivo texto (um número por linha).
+  Ler números inteiros via input(), armazená-los em um vetor
+  compacto de int64 (array('q'), ver vetor.py) usando append() e
+  salvar em arquivo texto (um número por linha).
+  No modo lote (--lote), os inteiros vêm de arquivos ou da
+  entrada padrão e são validados e gravados em blocos grandes.
+  No modo servidor (--servidor), vários produtores enviam
+  inteiros por TCP/Unix socket ao mesmo tempo (servidor_coleta.py).
 
 Conceitos utilizados:
-  - List e append()
+  - Vetor compacto array('q') e append()
   - Laço for / while
   - Condicionais if/elif/else
   - Manipulação de arquivos com open() / with open()
@@ -17,22 +22,38 @@ Conceitos utilizados:
 =============================================================
 """
 
+import argparse
+import asyncio
+import sys
+from array import array
+
+from escrita import arquivo_atomico, gravar_inteiros
+from formato_binario import salvar_binario
+from servidor_coleta import ServidorColeta
+from vetor import verificar_int64, vetor_vazio
+
 # Nome do arquivo de saída onde os dados serão persistidos
 ARQUIVO_SAIDA = "dados_acoes.txt"
+ARQUIVO_SAIDA_BINARIO = "dados_acoes.bin"  # Usado com --binario
 
+# Modo lote: tamanho dos blocos lidos/gravados e tamanho da amostra de rejeitados
+TAMANHO_BLOCO_LOTE = 1 << 22  # 4 MiB
+LIMITE_AMOSTRA_REJEITADOS = 10
 
-def coletar_dados() -> list:
+
+def coletar_dados():
     """
     Lê números inteiros fornecidos pelo usuário via teclado.
 
     O usuário pode digitar quantos valores quiser.
     Para encerrar, basta digitar 'fim'.
-    Entradas inválidas (não numéricas) são ignoradas com aviso.
+    Entradas inválidas (não numéricas ou fora do intervalo int64)
+    são ignoradas com aviso.
 
     Retorna:
-        lista_numeros (list): lista de inteiros coletados.
+        lista_numeros (array): vetor int64 com os inteiros coletados.
     """
-    lista_numeros = []  # Lista que armazenará os valores coletados
+    lista_numeros = vetor_vazio()  # Vetor compacto (ver vetor.py) que armazenará os valores
 
     print("=" * 55)
     print("  COLETA DE DADOS – Quantidade de Ações Compradas")
@@ -50,17 +71,20 @@ def coletar_dados() -> list:
 
         # Tenta converter a entrada para inteiro
         try:
-            numero = int(entrada)
-            lista_numeros.append(numero)  # Adiciona à lista usando append()
+            numero = verificar_int64(int(entrada))
+            lista_numeros.append(numero)  # Adiciona ao vetor usando append()
             print(f"  ✔ Valor {numero} adicionado. Total: {len(lista_numeros)} registro(s).")
         except ValueError:
             # Entrada não é um número inteiro válido
             print(f"  ✘ '{entrada}' não é um número inteiro válido. Tente novamente.")
+        except OverflowError as erro:
+            # Inteiro grande demais para as etapas seguintes
+            print(f"  ✘ {erro}. Tente novamente.")
 
     return lista_numeros
 
 
-def salvar_dados(lista_numeros: list, nome_arquivo: str) -> None:
+def salvar_dados(lista_numeros: list, nome_arquivo: str, binario: bool = False) -> None:
     """
     Salva a lista de inteiros em um arquivo texto.
     Cada número é gravado em uma linha separada.
@@ -68,27 +92,168 @@ def salvar_dados(lista_numeros: list, nome_arquivo: str) -> None:
     Parâmetros:
         lista_numeros (list): lista de inteiros a salvar.
         nome_arquivo  (str) : caminho/nome do arquivo de saída.
+        binario       (bool): grava no formato binário (formato_binario.py).
     """
     # Verifica se há dados para salvar
     if len(lista_numeros) == 0:
         print("\nNenhum dado para salvar. Encerrando.")
         return
 
-    # Abre o arquivo em modo escrita ('w') usando with open()
-    # O with garante que o arquivo será fechado corretamente
+    # Grava em um temporário e só então substitui o destino
+    # (escrita.py): uma interrupção não deixa o arquivo truncado
     try:
-        with open(nome_arquivo, "w", encoding="utf-8") as arquivo:
-            for numero in lista_numeros:
-                arquivo.write(str(numero) + "\n")  # Um número por linha
+        if binario:
+            salvar_binario(lista_numeros, nome_arquivo)
+        else:
+            gravar_inteiros(lista_numeros, nome_arquivo)  # Um número por linha
 
         print(f"\n✔ {len(lista_numeros)} valor(es) salvo(s) em '{nome_arquivo}'.")
-    except IOError as erro:
+    except (IOError, OverflowError) as erro:
         print(f"\n✘ Erro ao salvar o arquivo: {erro}")
 
 
+# ─────────────────────────────────────────────────────────────
+# MODO LOTE (entrada não interativa)
+# ─────────────────────────────────────────────────────────────
+
+def _validar_bloco(linhas: list, primeira_linha: int, resumo: dict) -> array:
+    """
+    Valida um bloco de linhas (bytes) com as mesmas regras de
+    coletar_dados(): cada linha deve ser um inteiro; linhas vazias
+    são ignoradas e valores fora do intervalo int64, que as etapas
+    seguintes não conseguem armazenar, são rejeitados. O bloco é
+    convertido de uma vez; só se houver erro ele é refeito linha a
+    linha, contando os rejeitados e guardando uma amostra limitada
+    deles.
+    """
+    try:
+        return array("q", map(int, linhas))
+    except (ValueError, OverflowError):
+        pass
+
+    bloco = array("q")
+    for deslocamento, linha in enumerate(linhas):
+        linha = linha.strip()
+        if not linha:
+            continue
+        try:
+            bloco.append(int(linha))
+        except (ValueError, OverflowError):
+            resumo["rejeitados"] = resumo["rejeitados"] + 1
+            if len(resumo["amostra_rejeitados"]) < LIMITE_AMOSTRA_REJEITADOS:
+                texto = linha.decode("utf-8", errors="replace")
+                resumo["amostra_rejeitados"].append((primeira_linha + deslocamento, texto))
+    return bloco
+
+
+def _ler_blocos_de_linhas(fluxo):
+    """
+    Lê um fluxo binário em blocos grandes e produz listas de linhas
+    completas; o pedaço final de cada bloco é levado para o próximo.
+    """
+    resto = b""
+    while True:
+        dados = fluxo.read(TAMANHO_BLOCO_LOTE)
+        if not dados:
+            break
+        dados = resto + dados
+        corte = dados.rfind(b"\n")
+        if corte == -1:
+            resto = dados
+            continue
+        resto = dados[corte + 1:]
+        yield dados[:corte].split(b"\n")
+    if resto:
+        yield [resto]
+
+
+def ingerir_lote(fontes: list, nome_arquivo: str, anexar: bool = False,
+                 binario: bool = False) -> dict:
+    """
+    Ingestão não interativa: lê inteiros (um por linha) da entrada
+    padrão ou de arquivos, em blocos grandes, e grava os válidos no
+    arquivo de saída com escritas grandes e bufferizadas. As fontes
+    são abertas antes da saída, e a sobrescrita é atômica (escrita.py).
+
+    Parâmetros:
+        fontes       (list): caminhos de arquivos; vazia ou "-" = entrada padrão.
+        nome_arquivo (str) : arquivo de saída.
+        anexar       (bool): acrescenta ao final em vez de sobrescrever (texto).
+        binario      (bool): grava no formato binário (formato_binario.py).
+
+    Retorna:
+        resumo (dict): 'aceitos', 'rejeitados' e 'amostra_rejeitados'
+                       (até LIMITE_AMOSTRA_REJEITADOS pares (linha, conteúdo)).
+    """
+    resumo = {"aceitos": 0, "rejeitados": 0, "amostra_rejeitados": []}
+    fluxos = []
+
+    try:
+        # Todas as fontes são abertas antes de tocar no arquivo de saída:
+        # uma fonte inexistente não apaga os dados já gravados
+        for fonte in fontes or ["-"]:
+            fluxos.append(sys.stdin.buffer if fonte == "-" else open(fonte, "rb"))
+
+        if binario:
+            acumulado = array("q")
+            for bloco in _blocos_validos(fluxos, resumo):
+                acumulado.extend(bloco)
+            salvar_binario(acumulado, nome_arquivo)
+            return resumo
+
+        # Sobrescrita atômica: o destino só é trocado se a ingestão terminar
+        if anexar:
+            destino = open(nome_arquivo, "ab", buffering=TAMANHO_BLOCO_LOTE)
+        else:
+            destino = arquivo_atomico(nome_arquivo)
+        with destino as saida:
+            for bloco in _blocos_validos(fluxos, resumo):
+                if bloco:
+                    saida.write(("\n".join(map(str, bloco)) + "\n").encode("utf-8"))
+    finally:
+        for fluxo in fluxos:
+            if fluxo is not sys.stdin.buffer:
+                fluxo.close()
+
+    return resumo
+
+
+def _blocos_validos(fluxos: list, resumo: dict):
+    """
+    Produz os blocos de inteiros válidos de cada fluxo, em ordem,
+    atualizando as contagens do resumo.
+    """
+    for fluxo in fluxos:
+        proxima_linha = 1
+        for linhas in _ler_blocos_de_linhas(fluxo):
+            bloco = _validar_bloco(linhas, proxima_linha, resumo)
+            proxima_linha = proxima_linha + len(linhas)
+            resumo["aceitos"] = resumo["aceitos"] + len(bloco)
+            yield bloco
+
+
+def exibir_resumo_lote(resumo: dict, nome_arquivo: str) -> None:
+    """
+    Exibe o resultado da ingestão em lote: contagens e uma amostra
+    dos valores rejeitados (em vez de uma linha por valor).
+    """
+    print("\n" + "=" * 55)
+    print("  RESUMO DA INGESTÃO EM LOTE")
+    print("=" * 55)
+    print(f"  Aceitos    : {resumo['aceitos']}")
+    print(f"  Rejeitados : {resumo['rejeitados']}")
+    for numero_linha, conteudo in resumo["amostra_rejeitados"]:
+        print(f"    ✘ linha {numero_linha}: '{conteudo}'")
+    if resumo["rejeitados"] > len(resumo["amostra_rejeitados"]):
+        print(f"    ... e mais {resumo['rejeitados'] - len(resumo['amostra_rejeitados'])}")
+    print("=" * 55)
+    print(f"\n✔ {resumo['aceitos']} valor(es) salvo(s) em '{nome_arquivo}'.")
+
+
 def exibir_resumo(lista_numeros: list) -> None:
     """
-    Exibe um resumo dos dados coletados antes de salvar.
+    Exibe um resumo dos dados coletados antes de salvar: o total
+    e as pontas da lista (a lista completa vai para o arquivo).
 
     Parâmetros:
         lista_numeros (list): lista de inteiros coletados.
@@ -103,7 +268,8 @@ def exibir_resumo(lista_numeros: list) -> None:
     print("  RESUMO DA COLETA")
     print("=" * 55)
     print(f"  Total de registros : {total}")
-    print(f"  Dados coletados    : {lista_numeros}")
+    print(f"  Primeiros 5        : {list(lista_numeros[:5])}")
+    print(f"  Últimos 5          : {list(lista_numeros[-5:])}")
     print("=" * 55)
 
 
@@ -111,13 +277,56 @@ def exibir_resumo(lista_numeros: list) -> None:
 # Ponto de entrada principal do programa
 # ─────────────────────────────────────────────────────────────
 if __name__ == "__main__":
-    # 1. Coleta os dados via teclado
-    dados = coletar_dados()
+    parser = argparse.ArgumentParser(description="Etapa 1 – Coleta e Persistência")
+    parser.add_argument("--binario", action="store_true",
+                        help=f"grava em '{ARQUIVO_SAIDA_BINARIO}' no formato binário")
+    parser.add_argument("--lote", nargs="*", metavar="ARQUIVO",
+                        help="ingestão não interativa dos arquivos indicados "
+                             "(sem arquivos ou '-' = entrada padrão)")
+    parser.add_argument("--anexar", action="store_true",
+                        help="no modo lote, acrescenta ao arquivo de saída em vez de sobrescrevê-lo")
+    parser.add_argument("--servidor", action="store_true",
+                        help="aceita inteiros de vários produtores via TCP/Unix socket")
+    parser.add_argument("--host", default="127.0.0.1", help="endereço do modo servidor")
+    parser.add_argument("--porta", type=int, default=9500, help="porta TCP do modo servidor")
+    parser.add_argument("--unix", metavar="CAMINHO", help="usa um Unix socket em vez de TCP")
+    parser.add_argument("--fsync", action="store_true",
+                        help="no modo servidor, força fsync a cada gravação em grupo")
+    argumentos = parser.parse_args()
+
+    if argumentos.servidor and (argumentos.lote is not None or argumentos.binario):
+        parser.error("--servidor não pode ser combinado com --lote ou --binario")
+    if argumentos.anexar and (argumentos.lote is None or argumentos.binario):
+        parser.error("--anexar só se aplica ao modo --lote em texto")
+
+    arquivo_saida = ARQUIVO_SAIDA_BINARIO if argumentos.binario else ARQUIVO_SAIDA
+
+    if argumentos.servidor:
+        # Modo servidor: acrescenta a dados_acoes.txt o que os produtores enviarem
+        servidor = ServidorColeta(ARQUIVO_SAIDA, fsync=argumentos.fsync)
+        try:
+            asyncio.run(servidor.executar(argumentos.host, argumentos.porta, argumentos.unix))
+        except KeyboardInterrupt:
+            pass
+        totais = servidor.totais
+        print(f"\n✔ Servidor encerrado: {totais['conexoes']} conexão(ões), "
+              f"{totais['aceitos']} aceito(s), {totais['rejeitados']} rejeitado(s).")
+    elif argumentos.lote is not None:
+        # Modo lote: lê de arquivos/pipe em blocos, sem input() nem print por valor
+        try:
+            resumo = ingerir_lote(argumentos.lote, arquivo_saida,
+                                  anexar=argumentos.anexar, binario=argumentos.binario)
+            exibir_resumo_lote(resumo, arquivo_saida)
+        except OSError as erro:
+            print(f"\n✘ Erro na ingestão: {erro}")
+    else:
+        # 1. Coleta os dados via teclado
+        dados = coletar_dados()
 
-    # 2. Exibe um resumo do que foi coletado
-    exibir_resumo(dados)
+        # 2. Exibe um resumo do que foi coletado
+        exibir_resumo(dados)
 
-    # 3. Salva os dados no arquivo de saída
-    salvar_dados(dados, ARQUIVO_SAIDA)
+        # 3. Salva os dados no arquivo de saída
+        salvar_dados(dados, arquivo_saida, binario=argumentos.binario)
 
     print("\nEtapa 1 concluída. Execute 'etapa2_processamento.py' para continuar.\n")
@@ -10,7 +10,7 @@ Objetivo:
   o vetor corrigido em novo arquivo.
 
 Conceitos utilizados:
-  - List e append()
+  - Vetor compacto array('q') e append() (ver vetor.py)
   - Laços for e acumuladores manuais
   - Condicionais if/elif/else
   - Manipulação de arquivos com with open()
@@ -19,59 +19,106 @@ Conceitos utilizados:
 =============================================================
 """
 
+import argparse
+
+from escrita import gravar_inteiros
+from formato_binario import salvar_binario
+from incremental import atualizar_checkpoint
+from instrumentacao import FORMATOS as FORMATOS_METRICAS, Instrumentacao, bytes_do_arquivo
+from leitura import carregar_inteiros
+from relatorio import LIMITE_AMOSTRA, AmostraLimitada
+from vetor import vetor_vazio
+
+try:
+    import numpy as np  # Opcional: acelera a agregação em vetores grandes
+except ImportError:
+    np = None
+
 # Arquivos utilizados nesta etapa
 ARQUIVO_ENTRADA = "dados_acoes.txt"       # Gerado pela Etapa 1
 ARQUIVO_SAIDA   = "dados_corrigidos.txt"  # Gerado por esta etapa
 
+# Artefatos equivalentes no formato binário (usados com --binario)
+ARQUIVO_ENTRADA_BINARIO = "dados_acoes.bin"
+ARQUIVO_SAIDA_BINARIO   = "dados_corrigidos.bin"
+
+# A partir deste tamanho a agregação usa o backend NumPy (se instalado)
+LIMIAR_NUMPY = 100_000
+
+# Quantas linhas inválidas são exibidas; as demais são apenas contadas
+LIMITE_AMOSTRA_INVALIDAS = LIMITE_AMOSTRA
+
 
 # ─────────────────────────────────────────────────────────────
 # FUNÇÕES DE LEITURA E ESCRITA
 # ─────────────────────────────────────────────────────────────
 
-def ler_arquivo(nome_arquivo: str) -> list:
+def exibir_invalidas(invalidas: list) -> int:
+    """
+    Exibe as primeiras LIMITE_AMOSTRA_INVALIDAS linhas inválidas
+    (numero_linha, conteudo) e a contagem das demais.
+
+    Retorna:
+        total (int): quantidade de linhas inválidas.
+    """
+    amostra = AmostraLimitada(LIMITE_AMOSTRA_INVALIDAS)
+    for numero_linha, linha in invalidas:
+        amostra.adicionar((numero_linha, linha))
+    for numero_linha, linha in amostra.itens:
+        print(f"  ✘ Linha {numero_linha} inválida ignorada: '{linha}'")
+    if amostra.restantes > 0:
+        print(f"  ✘ ... e mais {amostra.restantes} linha(s) inválida(s) ignorada(s)")
+    return amostra.total
+
+
+def ler_arquivo(nome_arquivo: str):
     """
-    Lê um arquivo texto e retorna uma lista de inteiros.
+    Lê um arquivo texto e retorna um vetor compacto de inteiros.
     Cada linha do arquivo deve conter um único número inteiro.
 
+    A conversão é feita em blocos sobre o arquivo mapeado em
+    memória (ver leitura.carregar_inteiros()); linhas vazias são
+    ignoradas e linhas inválidas são reportadas com seu número
+    (só as primeiras; as demais são contadas, ver exibir_invalidas()).
+
     Parâmetros:
         nome_arquivo (str): caminho do arquivo a ser lido.
 
     Retorna:
-        lista (list): lista de inteiros lidos do arquivo.
+        lista (array): vetor int64 (8 bytes por valor, ver vetor.py);
+                       memoryview de int64 para o formato binário.
     """
-    lista = []  # Lista que receberá os valores lidos
+    lista = vetor_vazio()  # Vetor que receberá os valores lidos
 
     try:
-        with open(nome_arquivo, "r", encoding="utf-8") as arquivo:
-            for linha in arquivo:
-                linha = linha.strip()  # Remove espaços e quebras de linha
-                if linha:              # Ignora linhas vazias
-                    try:
-                        numero = int(linha)
-                        lista.append(numero)  # Adiciona usando append()
-                    except ValueError:
-                        print(f"  ✘ Linha inválida ignorada: '{linha}'")
+        valores, invalidas = carregar_inteiros(nome_arquivo)
+        exibir_invalidas(invalidas)
 
+        lista = valores
         print(f"✔ {len(lista)} registro(s) lido(s) de '{nome_arquivo}'.")
     except FileNotFoundError:
         print(f"✘ Arquivo '{nome_arquivo}' não encontrado.")
         print("  Execute primeiro a Etapa 1 (etapa1_coleta.py).")
+    except (ValueError, OverflowError) as erro:
+        print(f"✘ {erro}")
 
     return lista
 
 
-def salvar_arquivo(lista: list, nome_arquivo: str) -> None:
+def salvar_arquivo(lista: list, nome_arquivo: str, binario: bool = False) -> None:
     """
     Salva uma lista de inteiros em arquivo texto (um por linha).
 
     Parâmetros:
         lista        (list): lista de inteiros a salvar.
         nome_arquivo (str) : caminho do arquivo de saída.
+        binario      (bool): grava no formato binário (formato_binario.py).
     """
     try:
-        with open(nome_arquivo, "w", encoding="utf-8") as arquivo:
-            for numero in lista:
-                arquivo.write(str(numero) + "\n")
+        if binario:
+            salvar_binario(lista, nome_arquivo)
+        else:
+            gravar_inteiros(lista, nome_arquivo)
         print(f"✔ Vetor corrigido salvo em '{nome_arquivo}'.")
     except IOError as erro:
         print(f"✘ Erro ao salvar arquivo: {erro}")
@@ -149,6 +196,101 @@ def calcular_minimo_manual(lista: list) -> int:
     return minimo if minimo is not None else 0
 
 
+def calcular_agregados_manual(lista: list) -> dict:
+    """
+    Calcula contagem, soma, mínimo, máximo e número de inválidos
+    MANUALMENTE, em uma ÚNICA passada pela lista.
+    Considera apenas valores válidos (> 0) nas estatísticas.
+
+    É a implementação de referência: os resultados devem coincidir
+    com calcular_media_manual(), calcular_maximo_manual() e
+    calcular_minimo_manual(), que percorrem a lista uma vez cada.
+
+    Parâmetros:
+        lista (list): lista de inteiros.
+
+    Retorna:
+        agregados (dict): chaves 'contagem', 'soma', 'minimo',
+                          'maximo', 'invalidos' e 'media'.
+    """
+    soma = 0        # Acumulador da soma dos válidos
+    contagem = 0    # Contador de valores válidos
+    invalidos = 0   # Contador de valores ≤ 0
+    maximo = None
+    minimo = None
+
+    for valor in lista:
+        if valor > 0:  # Apenas valores válidos entram nas estatísticas
+            soma = soma + valor
+            contagem = contagem + 1
+            if maximo is None or valor > maximo:
+                maximo = valor
+            if minimo is None or valor < minimo:
+                minimo = valor
+        else:
+            invalidos = invalidos + 1
+
+    return _montar_agregados(contagem, soma, minimo, maximo, invalidos)
+
+
+def _agregar_numpy(lista) -> dict:
+    """
+    Backend vetorizado de calcular_agregados_manual() usando NumPy.
+    A soma é feita em int64 em blocos que nunca estouram, e os blocos
+    são acumulados em int do Python (precisão arbitrária).
+    """
+    vetor = np.asarray(lista, dtype=np.int64)
+    validos = vetor[vetor > 0]
+    contagem = int(validos.size)
+    invalidos = int(vetor.size) - contagem
+
+    if contagem == 0:
+        return _montar_agregados(0, 0, None, None, invalidos)
+
+    maximo = int(validos.max())
+    minimo = int(validos.min())
+
+    # Tamanho do bloco tal que (bloco × máximo) cabe em int64
+    bloco = (2 ** 63 - 1) // maximo
+    soma = 0
+    for inicio in range(0, contagem, bloco):
+        soma = soma + int(validos[inicio:inicio + bloco].sum(dtype=np.int64))
+
+    return _montar_agregados(contagem, soma, minimo, maximo, invalidos)
+
+
+def _montar_agregados(contagem: int, soma: int, minimo, maximo, invalidos: int) -> dict:
+    """
+    Monta o dicionário de agregados seguindo as mesmas convenções das
+    funções manuais (0 para máximo/mínimo e 0.0 para média sem válidos).
+    """
+    return {
+        "contagem":  contagem,
+        "soma":      soma,
+        "minimo":    minimo if minimo is not None else 0,
+        "maximo":    maximo if maximo is not None else 0,
+        "invalidos": invalidos,
+        "media":     soma / contagem if contagem > 0 else 0.0,
+    }
+
+
+def calcular_agregados(lista: list) -> dict:
+    """
+    Calcula todos os agregados da Etapa 2 em uma única passada.
+    Usa o backend NumPy para listas grandes (se disponível) e a
+    implementação manual de referência nos demais casos.
+
+    Parâmetros:
+        lista (list): lista de inteiros.
+
+    Retorna:
+        agregados (dict): ver calcular_agregados_manual().
+    """
+    if np is not None and len(lista) >= LIMIAR_NUMPY:
+        return _agregar_numpy(lista)
+    return calcular_agregados_manual(lista)
+
+
 def obter_primeiros(lista: list, quantidade: int = 5) -> list:
     """
     Retorna os primeiros N valores da lista MANUALMENTE.
@@ -176,7 +318,8 @@ def obter_primeiros(lista: list, quantidade: int = 5) -> list:
 def obter_ultimos(lista: list, quantidade: int = 5) -> list:
     """
     Retorna os últimos N valores da lista MANUALMENTE.
-    Percorre a lista calculando o índice de início.
+    Calcula o índice de início e percorre só a partir dele, por
+    índice (custo proporcional a N, não ao tamanho da lista).
 
     Parâmetros:
         lista     (list): lista de inteiros.
@@ -193,11 +336,8 @@ def obter_ultimos(lista: list, quantidade: int = 5) -> list:
     if inicio < 0:
         inicio = 0
 
-    indice = 0
-    for valor in lista:
-        if indice >= inicio:
-            ultimos.append(valor)
-        indice = indice + 1
+    for indice in range(inicio, total):
+        ultimos.append(lista[indice])
 
     return ultimos
 
@@ -206,19 +346,20 @@ def obter_ultimos(lista: list, quantidade: int = 5) -> list:
 # FUNÇÃO DE SUBSTITUIÇÃO DE VALORES INVÁLIDOS
 # ─────────────────────────────────────────────────────────────
 
-def substituir_invalidos(lista_original: list, media: float) -> list:
+def substituir_invalidos(lista_original, media: float):
     """
     Substitui valores inválidos (≤ 0) pela média calculada.
     A média deve ter sido calculada APENAS com valores válidos.
 
     Parâmetros:
-        lista_original (list) : lista com possíveis valores inválidos.
-        media          (float): média dos valores válidos.
+        lista_original (sequência): inteiros com possíveis inválidos
+                                    (list, array('q'), memoryview...).
+        media          (float)    : média dos valores válidos.
 
     Retorna:
-        lista_corrigida (list): lista com inválidos substituídos.
+        lista_corrigida (array): vetor int64 com inválidos substituídos.
     """
-    lista_corrigida = []
+    lista_corrigida = vetor_vazio()
     substituicoes = 0
 
     for valor in lista_original:
@@ -265,34 +406,133 @@ def exibir_resultados(lista: list, media: float, maximo: int, minimo: int) -> No
     print("=" * 55)
 
 
+def executar_incremental(arquivo_entrada: str, arquivo_saida: str) -> None:
+    """
+    Executa a Etapa 2 de forma incremental (ver incremental.py):
+    apenas o trecho acrescentado desde a última execução é lido
+    e agregado, e o vetor corrigido é atualizado no arquivo de saída.
+
+    Parâmetros:
+        arquivo_entrada (str): arquivo de dados brutos (texto).
+        arquivo_saida   (str): arquivo do vetor corrigido.
+    """
+    try:
+        resultado = atualizar_checkpoint(arquivo_entrada, arquivo_saida)
+    except FileNotFoundError:
+        print(f"✘ Arquivo '{arquivo_entrada}' não encontrado.")
+        print("  Execute primeiro a Etapa 1 (etapa1_coleta.py).")
+        return
+    except ValueError as erro:
+        print(f"✘ {erro}")
+        return
+
+    exibir_invalidas(resultado["invalidas"])
+
+    checkpoint = resultado["checkpoint"]
+    validos = checkpoint["validos"]
+    invalidos = checkpoint["todos"]["contagem"] - validos["contagem"]
+
+    if resultado["reiniciado"]:
+        print(f"✔ Checkpoint (re)criado: {resultado['novas_linhas']} linha(s) processada(s).")
+    else:
+        print(f"✔ Checkpoint válido: {resultado['novas_linhas']} linha(s) nova(s) processada(s).")
+
+    if checkpoint["todos"]["contagem"] == 0:
+        print("Nenhum dado disponível.")
+        return
+
+    agregados = _montar_agregados(validos["contagem"], validos["soma"],
+                                  validos["minimo"], validos["maximo"], invalidos)
+
+    print("\n" + "=" * 55)
+    print("  RESULTADOS – CÁLCULO INCREMENTAL")
+    print("=" * 55)
+    print(f"  Registros : {checkpoint['todos']['contagem']}")
+    print(f"  Média     : {agregados['media']:.2f}")
+    print(f"  Máximo    : {agregados['maximo']}")
+    print(f"  Mínimo    : {agregados['minimo']}")
+    print(f"  Inválidos : {invalidos}")
+    print("=" * 55)
+
+    print(f"\n✔ Vetor corrigido atualizado em '{arquivo_saida}' "
+          f"(inválidos substituídos por {checkpoint['saida']['substituto']}).")
+
+
 # ─────────────────────────────────────────────────────────────
 # Ponto de entrada principal do programa
 # ─────────────────────────────────────────────────────────────
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Etapa 2 – Processamento Manual")
+    parser.add_argument("--binario", action="store_true",
+                        help="lê e grava os artefatos intermediários no formato binário (.bin)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="processa apenas o trecho novo do arquivo, usando um checkpoint")
+    parser.add_argument("--metricas", default=None, metavar="ARQUIVO",
+                        help="grava tempos, vazão, bytes e memória de cada fase (.json ou .prom)")
+    parser.add_argument("--formato-metricas", choices=FORMATOS_METRICAS, default=None,
+                        help="formato do arquivo de métricas (padrão: pela extensão)")
+    parser.add_argument("--memoria", action="store_true",
+                        help="mede também o pico de memória Python de cada fase (tracemalloc)")
+    parser.add_argument("--perfil", default=None, metavar="PASTA",
+                        help="roda cada fase sob o cProfile e grava os .prof nesta pasta")
+    argumentos = parser.parse_args()
+
+    if argumentos.binario and argumentos.incremental:
+        parser.error("--incremental funciona apenas com arquivos texto")
+
+    arquivo_entrada = ARQUIVO_ENTRADA_BINARIO if argumentos.binario else ARQUIVO_ENTRADA
+    arquivo_saida   = ARQUIVO_SAIDA_BINARIO if argumentos.binario else ARQUIVO_SAIDA
+
+    # Instrumentação opcional (sem custo quando desativada)
+    metricas = Instrumentacao("etapa2",
+                              ativa=bool(argumentos.metricas or argumentos.perfil),
+                              memoria=argumentos.memoria,
+                              pasta_perfil=argumentos.perfil)
+
     print("=" * 55)
     print("  ETAPA 2 – Processamento Manual")
     print("=" * 55)
 
-    # 1. Lê os dados do arquivo gerado na Etapa 1
-    dados = ler_arquivo(ARQUIVO_ENTRADA)
-
-    if len(dados) == 0:
-        print("Nenhum dado disponível. Encerrando.")
+    if argumentos.incremental:
+        with metricas.fase("incremental") as fase:
+            executar_incremental(arquivo_entrada, arquivo_saida)
+            fase["bytes_lidos"] = bytes_do_arquivo(arquivo_entrada)
     else:
-        # 2. Calcula estatísticas MANUALMENTE (apenas com valores válidos)
-        media  = calcular_media_manual(dados)
-        maximo = calcular_maximo_manual(dados)
-        minimo = calcular_minimo_manual(dados)
-
-        # 3. Exibe os resultados
-        exibir_resultados(dados, media, maximo, minimo)
-
-        # 4. Substitui valores inválidos (≤ 0) pela média
-        print("\n  Verificando valores inválidos...")
-        dados_corrigidos = substituir_invalidos(dados, media)
-
-        # 5. Salva o vetor corrigido em novo arquivo
-        print()
-        salvar_arquivo(dados_corrigidos, ARQUIVO_SAIDA)
+        # 1. Lê os dados do arquivo gerado na Etapa 1
+        with metricas.fase("leitura") as fase:
+            dados = ler_arquivo(arquivo_entrada)
+            fase["linhas"] = len(dados)
+            fase["bytes_lidos"] = bytes_do_arquivo(arquivo_entrada)
+
+        if len(dados) == 0:
+            print("Nenhum dado disponível. Encerrando.")
+        else:
+            # 2. Calcula estatísticas em uma única passada (apenas com valores válidos)
+            with metricas.fase("agregacao") as fase:
+                agregados = calcular_agregados(dados)
+                fase["linhas"] = len(dados)
+            media  = agregados["media"]
+            maximo = agregados["maximo"]
+            minimo = agregados["minimo"]
+
+            # 3. Exibe os resultados
+            exibir_resultados(dados, media, maximo, minimo)
+
+            # 4. Substitui valores inválidos (≤ 0) pela média
+            print("\n  Verificando valores inválidos...")
+            with metricas.fase("imputacao") as fase:
+                dados_corrigidos = substituir_invalidos(dados, media)
+                fase["linhas"] = len(dados_corrigidos)
+
+            # 5. Salva o vetor corrigido em novo arquivo
+            print()
+            with metricas.fase("escrita") as fase:
+                salvar_arquivo(dados_corrigidos, arquivo_saida, binario=argumentos.binario)
+                fase["linhas"] = len(dados_corrigidos)
+                fase["bytes_gravados"] = bytes_do_arquivo(arquivo_saida)
+
+    if argumentos.metricas:
+        metricas.exportar(argumentos.metricas, argumentos.formato_metricas)
+        print(f"\n✔ Métricas gravadas em '{argumentos.metricas}'.")
 
     print("\nEtapa 2 concluída. Execute 'etapa3_estatisticas.py' para continuar.\n")
@@ -4,15 +4,24 @@ SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
 Etapa 3 – Estatísticas com Bibliotecas + Remoção de Outliers
 =============================================================
 Objetivo:
-  Ler o arquivo tratado (Etapa 2), calcular estatísticas
-  usando bibliotecas prontas (statistics, math), exibir
-  cada métrica com explicação didática e, em seguida,
-  remover outliers MANUALMENTE e salvar o resultado final.
+  Ler o arquivo tratado (Etapa 2), calcular estatísticas com
+  os mesmos resultados da biblioteca statistics, exibir cada
+  métrica com explicação didática e, em seguida, remover
+  outliers MANUALMENTE e salvar o resultado final.
 
 Conceitos utilizados:
-  - Biblioteca statistics (média, mediana, variância, desvio)
-  - Biblioteca math (raiz quadrada)
-  - List e append()
+  - Agregação exata (n, Σx, Σx²) em inteiros do Python ou em
+    blocos int64 com NumPy (ver estatisticas_exatas.py): média,
+    variância e desvio iguais aos de statistics.mean(),
+    statistics.variance() e statistics.stdev()
+  - Mediana e quantis por seleção em tempo linear, sem ordenar
+    o vetor (ver quantis.py), iguais a statistics.median()
+  - Raiz quadrada inteira exata (math.isqrt) no desvio padrão
+  - Histogramas e forma da distribuição do vetor final
+    (assimetria e curtose), em uma passada (ver histograma.py)
+  - Preços em ponto fixo e VWAP/variância ponderada por ativo
+    (--precos, ver precos.py)
+  - Vetor compacto array('q') e append() (ver vetor.py)
   - Laços for e acumuladores (para remoção de outliers)
   - Condicionais if/elif/else
   - with open() para arquivos
@@ -21,52 +30,163 @@ Conceitos utilizados:
 =============================================================
 """
 
-import statistics  # Biblioteca padrão para cálculos estatísticos
+import argparse    # Opções de linha de comando
 import math        # Biblioteca matemática (usada para referência)
 
+from agrupamento import salvar_resumo
+from escrita import COMPRESSOES, gravar_inteiros, nome_comprimido
+from estatisticas_exatas import (
+    calcular_somas,
+    desvio_padrao_exato,
+    media_exata,
+    variancia_exata,
+)
+from estatisticas_fluxo import (
+    filtrar_outliers_fluxo,
+    iterar_outliers_fluxo,
+    remover_outliers_fluxo,
+)
+from formato_binario import salvar_binario
+from histograma import CLASSES_PADRAO, analisar_distribuicao, exibir_distribuicao
+from incremental import atualizar_checkpoint
+from instrumentacao import FORMATOS as FORMATOS_METRICAS, Instrumentacao, bytes_do_arquivo
+from leitura import carregar_inteiros
+from outliers import MODOS as MODOS_OUTLIERS, detectar_outliers
+from precos import (
+    CASAS_MAXIMAS,
+    CASAS_PADRAO,
+    estatisticas_ponderadas,
+    exibir_precos,
+    formatar_grupos,
+    formatar_preco,
+    ler_precos,
+    salvar_precos,
+)
+from quantis import (
+    QUANTIS_PADRAO,
+    EsbocoQuantis,
+    mediana as calcular_mediana,
+    quantis as calcular_quantis,
+)
+from relatorio import FORMATOS as FORMATOS_RELATORIO, AmostraLimitada, Relatorio, gravar_pares
+from vetor import vetor_vazio
+
 # Arquivos utilizados nesta etapa
 ARQUIVO_ENTRADA  = "dados_corrigidos.txt"  # Gerado pela Etapa 2
 ARQUIVO_SAIDA    = "dados_sem_outliers.txt"  # Gerado por esta etapa
 
+# Artefatos equivalentes no formato binário (usados com --binario)
+ARQUIVO_ENTRADA_BINARIO = "dados_corrigidos.bin"
+ARQUIVO_SAIDA_BINARIO   = "dados_sem_outliers.bin"
+
+# Negócios com preço (formato ticker,quantidade,preco), usados com --precos
+ARQUIVO_ENTRADA_PRECOS = "dados_precos.txt"
+ARQUIVO_SAIDA_PRECOS   = "dados_precos_corrigidos.txt"
+
+# Nomes exibidos das escalas substitutas do motor de outliers
+ROTULOS_ESCALA = {"desvio_medio": "desvio médio absoluto"}
+
+# Quantos outliers (índice e valor) e linhas inválidas são exibidos
+# e guardados no relatório; os totais são sempre contados
+LIMITE_AMOSTRA_OUTLIERS = 10
+
 
 # ─────────────────────────────────────────────────────────────
 # FUNÇÕES DE LEITURA E ESCRITA
 # ─────────────────────────────────────────────────────────────
 
-def ler_arquivo(nome_arquivo: str) -> list:
+def ler_arquivo(nome_arquivo: str, exibir: bool = True, resumo: dict = None):
     """
-    Lê um arquivo texto e retorna uma lista de inteiros.
-    Cada linha deve conter um único número inteiro.
+    Lê um arquivo texto e retorna um vetor compacto de inteiros
+    (array('q'), ver vetor.py). Cada linha deve conter um único
+    número inteiro. A conversão é feita em blocos por
+    leitura.carregar_inteiros().
+
+    As linhas inválidas são exibidas até LIMITE_AMOSTRA_OUTLIERS;
+    as demais, apenas contadas. Se 'resumo' for informado, recebe
+    'registros', 'linhas_invalidas' e 'amostra_invalidas'.
     """
-    lista = []
+    lista = vetor_vazio()
 
     try:
-        with open(nome_arquivo, "r", encoding="utf-8") as arquivo:
-            for linha in arquivo:
-                linha = linha.strip()
-                if linha:
-                    try:
-                        numero = int(linha)
-                        lista.append(numero)
-                    except ValueError:
-                        print(f"  ✘ Linha inválida ignorada: '{linha}'")
-
-        print(f"✔ {len(lista)} registro(s) lido(s) de '{nome_arquivo}'.")
+        valores, invalidas = carregar_inteiros(nome_arquivo)
+        amostra = AmostraLimitada(LIMITE_AMOSTRA_OUTLIERS)
+        for numero_linha, linha in invalidas:
+            amostra.adicionar((numero_linha, linha))
+        if exibir:
+            for numero_linha, linha in amostra.itens:
+                print(f"  ✘ Linha {numero_linha} inválida ignorada: '{linha}'")
+            if amostra.restantes > 0:
+                print(f"  ✘ ... e mais {amostra.restantes} linha(s) inválida(s) ignorada(s)")
+
+        lista = valores
+        if resumo is not None:
+            resumo.update({"registros": len(lista), "linhas_invalidas": amostra.total,
+                           "amostra_invalidas": amostra})
+        if exibir:
+            print(f"✔ {len(lista)} registro(s) lido(s) de '{nome_arquivo}'.")
     except FileNotFoundError:
         print(f"✘ Arquivo '{nome_arquivo}' não encontrado.")
         print("  Execute primeiro a Etapa 2 (etapa2_processamento.py).")
+    except (ValueError, OverflowError) as erro:
+        print(f"✘ {erro}")
 
     return lista
 
 
-def salvar_arquivo(lista: list, nome_arquivo: str) -> None:
+def ler_arquivo_precos(nome_arquivo: str, casas: int = CASAS_PADRAO, exibir: bool = True,
+                       resumo: dict = None) -> tuple:
+    """
+    Lê um arquivo 'ticker,quantidade,preco' com os preços em ponto
+    fixo de 'casas' decimais (precos.ler_precos()). As linhas
+    inválidas seguem as regras de ler_arquivo().
+
+    Retorna:
+        (tickers, codigos, quantidades, precos) (tuple): vazios se o
+        arquivo não puder ser lido.
+    """
+    dados = ([], vetor_vazio(), vetor_vazio(), vetor_vazio())
+
+    try:
+        *lidos, invalidas = ler_precos(nome_arquivo, casas)
+        amostra = AmostraLimitada(LIMITE_AMOSTRA_OUTLIERS)
+        for numero_linha, linha in invalidas:
+            amostra.adicionar((numero_linha, linha))
+        if exibir:
+            for numero_linha, linha in amostra.itens:
+                print(f"  ✘ Linha {numero_linha} inválida ignorada: '{linha}'")
+            if amostra.restantes > 0:
+                print(f"  ✘ ... e mais {amostra.restantes} linha(s) inválida(s) ignorada(s)")
+
+        dados = tuple(lidos)
+        tickers, _, quantidades, _ = dados
+        if resumo is not None:
+            resumo.update({"registros": len(quantidades), "ativos": len(tickers),
+                           "linhas_invalidas": amostra.total, "amostra_invalidas": amostra})
+        if exibir:
+            print(f"✔ {len(quantidades)} negócio(s) de {len(tickers)} ativo(s) lido(s) de '{nome_arquivo}'.")
+
+    except FileNotFoundError:
+        print(f"✘ Arquivo '{nome_arquivo}' não encontrado.")
+    except (ValueError, OverflowError) as erro:
+        print(f"✘ {erro}")
+
+    return dados
+
+
+def salvar_arquivo(lista: list, nome_arquivo: str, binario: bool = False,
+                   compressao: str = None) -> None:
     """
-    Salva uma lista de inteiros em arquivo texto (um por linha).
+    Salva uma lista de inteiros em arquivo texto (um por linha),
+    ou no formato binário (formato_binario.py) se binario=True.
+    O texto pode ser comprimido ("gzip" ou "xz"); a gravação é
+    sempre atômica (escrita.py).
     """
     try:
-        with open(nome_arquivo, "w", encoding="utf-8") as arquivo:
-            for numero in lista:
-                arquivo.write(str(numero) + "\n")
+        if binario:
+            salvar_binario(lista, nome_arquivo)
+        else:
+            gravar_inteiros(lista, nome_arquivo, compressao)
         print(f"✔ Arquivo salvo: '{nome_arquivo}' ({len(lista)} registro(s)).")
     except IOError as erro:
         print(f"✘ Erro ao salvar arquivo: {erro}")
@@ -76,27 +196,50 @@ def salvar_arquivo(lista: list, nome_arquivo: str) -> None:
 # ETAPA 3 – CÁLCULO COM BIBLIOTECAS
 # ─────────────────────────────────────────────────────────────
 
-def calcular_e_exibir_estatisticas(lista: list) -> None:
+def calcular_e_exibir_estatisticas(lista: list, exibir: bool = True) -> dict:
     """
-    Calcula e exibe estatísticas completas usando a biblioteca
-    'statistics'. Cada métrica inclui comentário explicativo.
+    Calcula e exibe estatísticas completas, com os mesmos
+    resultados da biblioteca 'statistics'. Cada métrica inclui
+    comentário explicativo.
+
+    Média, variância e desvio padrão são derivados de uma única
+    agregação exata (n, Σx, Σx²) — ver estatisticas_exatas.py —
+    com resultados idênticos aos de statistics.mean(),
+    statistics.variance() e statistics.stdev(). Mediana e quantis
+    são obtidos por seleção, sem ordenar a lista (quantis.py).
 
     Parâmetros:
-        lista (list): lista de inteiros para análise.
+        lista  (list): lista de inteiros para análise.
+        exibir (bool): exibe as métricas no terminal.
+
+    Retorna:
+        estatisticas (dict): as métricas calculadas (vazio se a
+        lista estiver vazia).
     """
     if len(lista) == 0:
         print("Lista vazia. Impossível calcular estatísticas.")
-        return
+        return {}
+
+    # ── Agregação exata ────────────────────────────────────────
+    # Quantidade, soma e soma dos quadrados, em inteiros exatos.
+    # Média, variância e desvio padrão saem destes três números.
+    n, soma, soma_quadrados = calcular_somas(lista)
 
     # ── Média ──────────────────────────────────────────────────
     # Soma de todos os valores dividida pela quantidade de elementos.
     # Representa o valor "central" típico do conjunto de dados.
-    media = statistics.mean(lista)
+    media = media_exata(n, soma)
 
     # ── Mediana ────────────────────────────────────────────────
     # Valor que divide o conjunto ordenado ao meio (50% abaixo, 50% acima).
     # Menos sensível a valores extremos do que a média.
-    mediana = statistics.median(lista)
+    # Obtida por seleção (sem ordenar a lista), igual a statistics.median().
+    mediana = calcular_mediana(lista)
+
+    # ── Quantis ────────────────────────────────────────────────
+    # O quantil p é o valor abaixo do qual fica a fração p dos dados.
+    # p1/p99 mostram as caudas; p25/p75 delimitam a metade central.
+    quantis = calcular_quantis(lista, QUANTIS_PADRAO)
 
     # ── Máximo ─────────────────────────────────────────────────
     # O maior valor presente no conjunto de dados.
@@ -116,18 +259,34 @@ def calcular_e_exibir_estatisticas(lista: list) -> None:
     # ── Variância ──────────────────────────────────────────────
     # Média dos quadrados dos desvios em relação à média.
     # Mede o quanto os valores se afastam da média (em unidades²).
-    variancia = statistics.variance(lista)
+    variancia = variancia_exata(n, soma, soma_quadrados)
 
     # ── Desvio Padrão ──────────────────────────────────────────
     # Raiz quadrada da variância; mede a dispersão na mesma unidade dos dados.
     # Valores próximos de zero indicam dados concentrados em torno da média.
-    desvio_padrao = statistics.stdev(lista)
+    desvio_padrao = desvio_padrao_exato(n, soma, soma_quadrados)
 
     # ── Primeiros e Últimos 5 valores ──────────────────────────
     # Permitem inspecionar o início e o fim do vetor de dados.
     # Útil para verificar a ordem e a distribuição dos extremos.
-    primeiros_5 = lista[:5]
-    ultimos_5   = lista[-5:]
+    primeiros_5 = list(lista[:5])
+    ultimos_5   = list(lista[-5:])
+
+    estatisticas = {
+        "registros":     n,
+        "media":         media,
+        "mediana":       mediana,
+        "quantis":       {f"p{p * 100:g}": valor for p, valor in quantis.items()},
+        "maximo":        maximo,
+        "minimo":        minimo,
+        "amplitude":     amplitude,
+        "variancia":     variancia,
+        "desvio_padrao": desvio_padrao,
+        "primeiros_5":   primeiros_5,
+        "ultimos_5":     ultimos_5,
+    }
+    if not exibir:
+        return estatisticas
 
     # Exibe todos os resultados formatados
     print("\n" + "=" * 60)
@@ -135,6 +294,9 @@ def calcular_e_exibir_estatisticas(lista: list) -> None:
     print("=" * 60)
     print(f"  Média          : {media:.2f}")
     print(f"  Mediana        : {mediana:.2f}")
+    for p, valor in quantis.items():
+        rotulo = f"p{p * 100:g}"
+        print(f"  {rotulo:<15}: {valor:.2f}")
     print(f"  Máximo         : {maximo}")
     print(f"  Mínimo         : {minimo}")
     print(f"  Amplitude      : {amplitude}")
@@ -143,6 +305,39 @@ def calcular_e_exibir_estatisticas(lista: list) -> None:
     print(f"  Primeiros 5    : {primeiros_5}")
     print(f"  Últimos 5      : {ultimos_5}")
     print("=" * 60)
+    return estatisticas
+
+
+def exibir_distribuicao_final(lista, classes: int = CLASSES_PADRAO, exibir: bool = True) -> dict:
+    """
+    Exibe a forma da distribuição (assimetria e curtose) e os
+    histogramas de largura fixa, logarítmico e por quantis do
+    vetor, calculados em uma única passada (histograma.py).
+
+    Retorna:
+        distribuicao (dict): 'assimetria', 'curtose' e as bordas e
+        contagens de cada histograma (vazio se a lista estiver vazia).
+    """
+    if len(lista) == 0:
+        print("Lista vazia. Impossível montar o histograma.")
+        return {}
+
+    distribuicao = analisar_distribuicao(lista, classes)
+    resumo = {
+        "assimetria": distribuicao["momentos"].assimetria(),
+        "curtose":    distribuicao["momentos"].curtose(),
+    }
+    for nome in ("largura_fixa", "logaritmico", "quantis"):
+        resumo[nome] = distribuicao[nome].para_dict()
+    if not exibir:
+        return resumo
+
+    print("\n" + "=" * 60)
+    print("  DISTRIBUIÇÃO DO VETOR FINAL (sem outliers)")
+    print("=" * 60)
+    exibir_distribuicao(distribuicao)
+    print("=" * 60)
+    return resumo
 
 
 # ─────────────────────────────────────────────────────────────
@@ -199,7 +394,7 @@ def calcular_desvio_padrao_manual(lista: list, media: float) -> float:
     return estimativa
 
 
-def remover_outliers(lista: list) -> list:
+def remover_outliers(lista, exibir: bool = True, resumo: dict = None):
     """
     Remove outliers MANUALMENTE, sem usar funções prontas.
 
@@ -207,14 +402,21 @@ def remover_outliers(lista: list) -> list:
       - Outlier superior: valor > média + 2 * desvio_padrão
       - Outlier inferior: valor < média - 2 * desvio_padrão
 
+    Em vez de um aviso por valor, exibe o total removido e uma
+    amostra limitada (índice, valor) dos outliers.
+
     Parâmetros:
-        lista (list): lista de inteiros.
+        lista  (sequência): inteiros (list, array('q'), memoryview...).
+        exibir (bool)     : exibe limites, totais e a amostra.
+        resumo (dict)     : se informado, recebe 'media', 'desvio',
+                            'limite_superior', 'limite_inferior',
+                            'removidos', 'mantidos' e 'amostra'.
 
     Retorna:
-        lista_filtrada (list): lista sem os outliers.
+        lista_filtrada (array): vetor int64 sem os outliers.
     """
     if len(lista) == 0:
-        return []
+        return vetor_vazio()
 
     # Calcula média e desvio padrão manualmente
     media        = calcular_media_manual(lista)
@@ -224,60 +426,551 @@ def remover_outliers(lista: list) -> list:
     limite_superior = media + 2 * desvio
     limite_inferior = media - 2 * desvio
 
-    print(f"\n  Média          : {media:.2f}")
-    print(f"  Desvio Padrão  : {desvio:.2f}")
-    print(f"  Limite superior: {limite_superior:.2f}")
-    print(f"  Limite inferior: {limite_inferior:.2f}")
+    if exibir:
+        print(f"\n  Média          : {media:.2f}")
+        print(f"  Desvio Padrão  : {desvio:.2f}")
+        print(f"  Limite superior: {limite_superior:.2f}")
+        print(f"  Limite inferior: {limite_inferior:.2f}")
 
-    lista_filtrada = []
-    removidos = 0
+    lista_filtrada = vetor_vazio()
+    amostra = AmostraLimitada(LIMITE_AMOSTRA_OUTLIERS)
 
     # Percorre a lista e mantém apenas os valores dentro dos limites
+    indice = 0
     for valor in lista:
         if valor > limite_superior or valor < limite_inferior:
-            # Valor é outlier – será descartado
-            print(f"  ⚠ Outlier removido: {valor}")
-            removidos = removidos + 1
+            # Valor é outlier – será descartado (só os primeiros são guardados)
+            amostra.adicionar((indice, valor))
         else:
             lista_filtrada.append(valor)
-
-    print(f"\n  Total removido : {removidos} outlier(s)")
-    print(f"  Registros finais: {len(lista_filtrada)}")
+        indice = indice + 1
+
+    if exibir:
+        if amostra.total > 0:
+            print(f"\n  ⚠ Outliers removidos (índice, valor): {amostra.texto()}")
+        print(f"\n  Total removido : {amostra.total} outlier(s)")
+        print(f"  Registros finais: {len(lista_filtrada)}")
+
+    if resumo is not None:
+        resumo.update({
+            "media":           media,
+            "desvio":          desvio,
+            "limite_superior": limite_superior,
+            "limite_inferior": limite_inferior,
+            "removidos":       amostra.total,
+            "mantidos":        len(lista_filtrada),
+            "amostra":         amostra,
+        })
 
     return lista_filtrada
 
 
-# ─────────────────────────────────────────────────────────────
-# Ponto de entrada principal do programa
-# ─────────────────────────────────────────────────────────────
-if __name__ == "__main__":
-    print("=" * 60)
-    print("  ETAPA 3 – Estatísticas com Bibliotecas")
-    print("=" * 60)
+def remover_outliers_motor(lista, modo: str, fator: float = None, exibir: bool = True,
+                           resumo: dict = None):
+    """
+    Remove outliers com o motor vetorizado (outliers.py), no modo
+    escolhido: "sigma", "sigma-iterativo", "mad" ou "iqr".
+
+    Em vez de um aviso por valor, exibe os limites de cada iteração,
+    o total removido e uma amostra limitada dos índices removidos.
+    Se 'resumo' for informado, recebe 'modo', 'iteracoes',
+    'removidos', 'mantidos', 'amostra' e 'indices_removidos'.
+
+    Retorna:
+        lista_filtrada (array): vetor int64 sem os outliers.
+    """
+    resultado = detectar_outliers(lista, modo, fator)
+    indices = resultado["indices_removidos"]
+
+    # Só os primeiros índices são convertidos em pares (índice, valor)
+    amostra = AmostraLimitada(LIMITE_AMOSTRA_OUTLIERS)
+    for indice in indices[:LIMITE_AMOSTRA_OUTLIERS]:
+        amostra.adicionar((indice, lista[indice]))
+    amostra.total = len(indices)
+
+    if resumo is not None:
+        resumo.update({
+            "modo":              modo,
+            "iteracoes":         resultado["iteracoes"],
+            "removidos":         len(indices),
+            "mantidos":          len(resultado["mantidos"]),
+            "amostra":           amostra,
+            "indices_removidos": indices,
+        })
+
+    if not exibir:
+        return resultado["mantidos"]
+
+    for numero, iteracao in enumerate(resultado["iteracoes"], start=1):
+        print(f"\n  Iteração {numero}")
+        print(f"  Centro         : {iteracao['centro']:.2f}")
+        print(f"  Escala         : {iteracao['escala']:.2f}")
+        if iteracao["escala_substituta"]:
+            print(f"  ⚠ Escala nula: usando {ROTULOS_ESCALA[iteracao['escala_substituta']]}")
+        print(f"  Limite superior: {iteracao['limite_superior']:.2f}")
+        print(f"  Limite inferior: {iteracao['limite_inferior']:.2f}")
+        print(f"  Removidos      : {iteracao['removidos']}")
+
+    if indices:
+        print(f"\n  ⚠ Outliers removidos (índice, valor): {amostra.texto()}")
+
+    print(f"\n  Total removido : {len(indices)} outlier(s)")
+    print(f"  Registros finais: {len(resultado['mantidos'])}")
+
+    return resultado["mantidos"]
+
+
+def executar_incremental(arquivo_entrada: str, arquivo_saida: str, fator: float = 2.0,
+                         exibir: bool = True, resumo: dict = None) -> None:
+    """
+    Executa as Etapas 3 e 4 de forma incremental (ver incremental.py).
+
+    Média, variância, desvio, máximo e mínimo saem exatos do
+    checkpoint, atualizado apenas com o trecho novo do arquivo;
+    mediana e quantis são aproximados pelo esboço persistido. Como
+    os limites de outliers mudam a cada execução, a filtragem é uma
+    passada em fluxo pelo arquivo, sem recalcular as estatísticas.
+
+    Linhas inválidas e outliers são exibidos só em amostras
+    limitadas. Se 'resumo' for informado, recebe as seções
+    'leitura', 'estatisticas', 'outliers' e 'saida' do relatório.
+    """
+    if resumo is None:
+        resumo = {}
+
+    try:
+        resultado = atualizar_checkpoint(arquivo_entrada)
+    except FileNotFoundError:
+        print(f"✘ Arquivo '{arquivo_entrada}' não encontrado.")
+        print("  Execute primeiro a Etapa 2 (etapa2_processamento.py).")
+        return
+    except ValueError as erro:
+        print(f"✘ {erro}")
+        return
+
+    invalidas = AmostraLimitada(LIMITE_AMOSTRA_OUTLIERS)
+    for numero_linha, linha in resultado["invalidas"]:
+        invalidas.adicionar((numero_linha, linha))
+    if exibir:
+        for numero_linha, linha in invalidas.itens:
+            print(f"  ✘ Linha {numero_linha} inválida ignorada: '{linha}'")
+        if invalidas.restantes > 0:
+            print(f"  ✘ ... e mais {invalidas.restantes} linha(s) inválida(s) ignorada(s)")
+
+        if resultado["reiniciado"]:
+            print(f"✔ Checkpoint (re)criado: {resultado['novas_linhas']} linha(s) processada(s).")
+        else:
+            print(f"✔ Checkpoint válido: {resultado['novas_linhas']} linha(s) nova(s) processada(s).")
+
+    todos = resultado["checkpoint"]["todos"]
+    n, soma, soma_quadrados = todos["contagem"], todos["soma"], todos["soma_quadrados"]
+    resumo["leitura"] = {
+        "arquivo":           arquivo_entrada,
+        "registros":         n,
+        "reiniciado":        resultado["reiniciado"],
+        "novas_linhas":      resultado["novas_linhas"],
+        "linhas_invalidas":  invalidas.total,
+        "amostra_invalidas": invalidas,
+    }
+    if n < 2:
+        print("Dados insuficientes para calcular estatísticas.")
+        return
+
+    media = media_exata(n, soma)
+    variancia = variancia_exata(n, soma, soma_quadrados)
+    desvio_padrao = desvio_padrao_exato(n, soma, soma_quadrados)
+    esboco = EsbocoQuantis.de_dict(resultado["checkpoint"]["esboco"])
+    mediana = esboco.quantil(0.5)
+    quantis = esboco.quantis(QUANTIS_PADRAO)
+
+    resumo["estatisticas"] = {
+        "registros":      n,
+        "media":          media,
+        "mediana_aprox":  mediana,
+        "quantis_aprox":  {f"p{p * 100:g}": valor for p, valor in quantis.items()},
+        "maximo":         todos["maximo"],
+        "minimo":         todos["minimo"],
+        "amplitude":      todos["maximo"] - todos["minimo"],
+        "variancia":      variancia,
+        "desvio_padrao":  desvio_padrao,
+    }
+
+    if exibir:
+        print("\n" + "=" * 60)
+        print("  ESTATÍSTICAS COMPLETAS (incremental)")
+        print("=" * 60)
+        print(f"  Registros      : {n}")
+        print(f"  Média          : {media:.2f}")
+        print(f"  Mediana (aprox): {mediana:.2f}")
+        for p, valor in quantis.items():
+            rotulo = f"p{p * 100:g} (aprox)"
+            print(f"  {rotulo:<15}: {valor:.2f}")
+        print(f"  Máximo         : {todos['maximo']}")
+        print(f"  Mínimo         : {todos['minimo']}")
+        print(f"  Amplitude      : {todos['maximo'] - todos['minimo']}")
+        print(f"  Variância      : {variancia:.2f}")
+        print(f"  Desvio Padrão  : {desvio_padrao:.2f}")
+        print("=" * 60)
+
+    limite_superior = media + fator * desvio_padrao
+    limite_inferior = media - fator * desvio_padrao
+
+    if exibir:
+        print("\n" + "=" * 60)
+        print("  ETAPA 4 – Remoção de Outliers (incremental)")
+        print("=" * 60)
+        print(f"  Limite superior: {limite_superior:.2f}")
+        print(f"  Limite inferior: {limite_inferior:.2f}")
+
+    amostra = AmostraLimitada(LIMITE_AMOSTRA_OUTLIERS)
+    removidos, mantidos = filtrar_outliers_fluxo(arquivo_entrada, arquivo_saida,
+                                                 limite_inferior, limite_superior, amostra)
+
+    resumo["outliers"] = {
+        "media":           media,
+        "desvio":          desvio_padrao,
+        "limite_superior": limite_superior,
+        "limite_inferior": limite_inferior,
+        "removidos":       removidos,
+        "mantidos":        mantidos,
+        "amostra":         amostra,
+    }
+    resumo["saida"] = {"arquivo": arquivo_saida, "registros": mantidos}
+
+    if exibir:
+        if removidos > 0:
+            print(f"\n  ⚠ Outliers removidos (índice, valor): {amostra.texto()}")
+        print(f"\n  Total removido : {removidos} outlier(s)")
+        print(f"  Registros finais: {mantidos}")
+        print(f"\n✔ Arquivo salvo: '{arquivo_saida}'.")
+    else:
+        print(f"✔ {n} registro(s) lido(s), {removidos} outlier(s) removido(s), "
+              f"{mantidos} mantido(s).")
+
+
+def executar_padrao(arquivo_entrada: str, arquivo_saida: str, metricas: Instrumentacao,
+                    relatorio: Relatorio, modo_outliers: str = None, fator: float = None,
+                    classes: int = CLASSES_PADRAO, compressao: str = None,
+                    binario: bool = False, arquivo_removidos: str = None,
+                    exibir: bool = True) -> None:
+    """
+    Fluxo padrão das Etapas 3 e 4 sobre o vetor carregado na memória:
+    leitura, estatísticas, remoção de outliers (manual ou pelo motor
+    vetorizado, se 'modo_outliers' for informado), distribuição do
+    vetor final e gravação. Usado pelo programa e pelo benchmark
+    de ponta a ponta (benchmark.py).
+
+    Cada passo é medido em uma fase de 'metricas' e registrado em
+    'relatorio'. Se 'arquivo_removidos' for informado, recebe todos
+    os outliers removidos (indice,valor) em CSV.
+    """
+    if exibir:
+        print("=" * 60)
+        print("  ETAPA 3 – Estatísticas com Bibliotecas")
+        print("=" * 60)
 
     # 1. Lê o arquivo tratado gerado na Etapa 2
-    dados = ler_arquivo(ARQUIVO_ENTRADA)
+    with metricas.fase("leitura") as fase:
+        leitura = {"arquivo": arquivo_entrada}
+        dados = ler_arquivo(arquivo_entrada, exibir=exibir, resumo=leitura)
+        fase["linhas"] = len(dados)
+        fase["bytes_lidos"] = bytes_do_arquivo(arquivo_entrada)
+    relatorio.registrar("leitura", leitura)
 
     if len(dados) == 0:
         print("Nenhum dado disponível. Encerrando.")
-    else:
-        # 2. Calcula e exibe estatísticas completas com bibliotecas
-        calcular_e_exibir_estatisticas(dados)
+        return
+
+    # 2. Calcula e exibe estatísticas completas com bibliotecas
+    with metricas.fase("agregacao") as fase:
+        relatorio.registrar("estatisticas", calcular_e_exibir_estatisticas(dados, exibir))
+        fase["linhas"] = len(dados)
 
-        # ─────────────────────────────────────────────────────
+    # ─────────────────────────────────────────────────────
+    if exibir:
         print("\n" + "=" * 60)
-        print("  ETAPA 4 – Remoção de Outliers (cálculo manual)")
+        if modo_outliers:
+            print(f"  ETAPA 4 – Remoção de Outliers (modo {modo_outliers})")
+        else:
+            print("  ETAPA 4 – Remoção de Outliers (cálculo manual)")
         print("=" * 60)
 
-        # 3. Remove outliers manualmente (sem funções prontas)
-        dados_sem_outliers = remover_outliers(dados)
+    # 3. Remove outliers manualmente (sem funções prontas),
+    #    ou com o motor vetorizado, se --outliers foi pedido
+    outliers = {}
+    with metricas.fase("filtragem") as fase:
+        if modo_outliers:
+            dados_sem_outliers = remover_outliers_motor(dados, modo_outliers,
+                                                        fator, exibir, outliers)
+        else:
+            dados_sem_outliers = remover_outliers(dados, exibir, outliers)
+        fase["linhas"] = len(dados)
+
+    # A lista completa dos removidos vai para arquivo, nunca para o relatório
+    indices_removidos = outliers.pop("indices_removidos", None)
+    relatorio.registrar("outliers", outliers)
+    if arquivo_removidos:
+        if indices_removidos is not None:
+            pares = ((indice, dados[indice]) for indice in indices_removidos)
+        elif outliers:
+            superior, inferior = outliers["limite_superior"], outliers["limite_inferior"]
+            pares = ((indice, valor) for indice, valor in enumerate(dados)
+                     if valor > superior or valor < inferior)
+        else:
+            pares = ()
+        total = gravar_pares(pares, arquivo_removidos)
+        print(f"✔ {total} outlier(s) removido(s) gravado(s) em '{arquivo_removidos}'.")
+
+    # 4. Exibe o tamanho e as pontas do vetor final (o vetor
+    #    completo fica no arquivo de saída)
+    if exibir:
+        print(f"\n  Vetor final (sem outliers): {len(dados_sem_outliers)} registro(s)")
+        print(f"  Primeiros 5    : {list(dados_sem_outliers[:5])}")
+        print(f"  Últimos 5      : {list(dados_sem_outliers[-5:])}")
+
+    # 5. Histogramas e forma da distribuição do vetor final
+    with metricas.fase("distribuicao") as fase:
+        relatorio.registrar("distribuicao", exibir_distribuicao_final(
+            dados_sem_outliers, classes, exibir))
+        fase["linhas"] = len(dados_sem_outliers)
+
+    # 6. Salva o resultado final em novo arquivo
+    if exibir:
+        print()
+    with metricas.fase("escrita") as fase:
+        arquivo_final = nome_comprimido(arquivo_saida, compressao)
+        salvar_arquivo(dados_sem_outliers, arquivo_final, binario=binario,
+                       compressao=compressao)
+        fase["linhas"] = len(dados_sem_outliers)
+        fase["bytes_gravados"] = bytes_do_arquivo(arquivo_final)
+    relatorio.registrar("saida", {"arquivo": arquivo_final,
+                                  "registros": len(dados_sem_outliers)})
 
-        # 4. Exibe o vetor final
-        print(f"\n  Vetor final (sem outliers):")
-        print(f"  {dados_sem_outliers}")
+    if not exibir:
+        print(f"✔ {len(dados)} registro(s) lido(s), "
+              f"{outliers.get('removidos', 0)} outlier(s) removido(s), "
+              f"{len(dados_sem_outliers)} mantido(s).")
 
-        # 5. Salva o resultado final em novo arquivo
-        print()
-        salvar_arquivo(dados_sem_outliers, ARQUIVO_SAIDA)
+
+# ─────────────────────────────────────────────────────────────
+# Ponto de entrada principal do programa
+# ─────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Etapa 3 – Estatísticas com Bibliotecas")
+    parser.add_argument("--binario", action="store_true",
+                        help="lê e grava os artefatos intermediários no formato binário (.bin)")
+    parser.add_argument("--fluxo", action="store_true",
+                        help="remove outliers em modo fluxo, com memória constante (Welford)")
+    parser.add_argument("--comprimir", choices=COMPRESSOES, default=None,
+                        help="grava o vetor final comprimido (acrescenta .gz ou .xz ao nome)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="atualiza as estatísticas apenas com o trecho novo, usando um checkpoint")
+    parser.add_argument("--outliers", choices=MODOS_OUTLIERS, default=None, metavar="MODO",
+                        help=f"remove outliers com o motor vetorizado: {', '.join(MODOS_OUTLIERS)}")
+    parser.add_argument("--fator", type=float, default=None,
+                        help="multiplicador dos limites do --outliers (padrão depende do modo)")
+    parser.add_argument("--classes", type=int, default=CLASSES_PADRAO,
+                        help=f"classes do histograma de largura fixa do vetor final (padrão: {CLASSES_PADRAO})")
+    parser.add_argument("--precos", nargs="?", const=ARQUIVO_ENTRADA_PRECOS, default=None,
+                        metavar="ARQUIVO",
+                        help="estatísticas ponderadas por volume (VWAP) de um arquivo "
+                             f"ticker,quantidade,preco (padrão: {ARQUIVO_ENTRADA_PRECOS})")
+    parser.add_argument("--casas", type=int, default=CASAS_PADRAO,
+                        help=f"casas decimais do ponto fixo dos preços (padrão: {CASAS_PADRAO}, centavos)")
+    parser.add_argument("--por-ativo", default=None, metavar="ARQUIVO",
+                        help="com --precos, grava as métricas de todos os ativos em CSV")
+    parser.add_argument("--silencioso", action="store_true",
+                        help="não exibe métricas, listas nem histogramas; só o resumo final")
+    parser.add_argument("--relatorio", default=None, metavar="ARQUIVO",
+                        help="grava o relatório estruturado da etapa (.json ou .csv)")
+    parser.add_argument("--formato-relatorio", choices=FORMATOS_RELATORIO, default=None,
+                        help="formato do relatório (padrão: pela extensão)")
+    parser.add_argument("--removidos", default=None, metavar="ARQUIVO",
+                        help="grava TODOS os outliers removidos (indice,valor) em CSV")
+    parser.add_argument("--metricas", default=None, metavar="ARQUIVO",
+                        help="grava tempos, vazão, bytes e memória de cada fase (.json ou .prom)")
+    parser.add_argument("--formato-metricas", choices=FORMATOS_METRICAS, default=None,
+                        help="formato do arquivo de métricas (padrão: pela extensão)")
+    parser.add_argument("--memoria", action="store_true",
+                        help="mede também o pico de memória Python de cada fase (tracemalloc)")
+    parser.add_argument("--perfil", default=None, metavar="PASTA",
+                        help="roda cada fase sob o cProfile e grava os .prof nesta pasta")
+    argumentos = parser.parse_args()
+
+    if argumentos.binario and argumentos.incremental:
+        parser.error("--incremental funciona apenas com arquivos texto")
+    if argumentos.outliers and (argumentos.fluxo or argumentos.incremental):
+        parser.error("--outliers não se combina com --fluxo nem com --incremental")
+    if argumentos.fator is not None and not argumentos.outliers:
+        parser.error("--fator exige --outliers")
+    if argumentos.classes < 1:
+        parser.error("--classes deve ser pelo menos 1")
+    if argumentos.comprimir and (argumentos.binario or argumentos.fluxo or argumentos.incremental):
+        parser.error("--comprimir funciona apenas na gravação em texto do modo padrão")
+    if argumentos.formato_relatorio and not argumentos.relatorio:
+        parser.error("--formato-relatorio exige --relatorio")
+    if argumentos.precos and (argumentos.fluxo or argumentos.incremental or argumentos.binario
+                              or argumentos.outliers or argumentos.comprimir or argumentos.removidos):
+        parser.error("--precos não se combina com --fluxo, --incremental, --binario, "
+                     "--outliers, --comprimir nem --removidos")
+    if not 0 <= argumentos.casas <= CASAS_MAXIMAS:
+        parser.error(f"--casas deve estar entre 0 e {CASAS_MAXIMAS}")
+    if (argumentos.casas != CASAS_PADRAO or argumentos.por_ativo) and not argumentos.precos:
+        parser.error("--casas e --por-ativo exigem --precos")
+
+    arquivo_entrada = ARQUIVO_ENTRADA_BINARIO if argumentos.binario else ARQUIVO_ENTRADA
+    arquivo_saida   = ARQUIVO_SAIDA_BINARIO if argumentos.binario else ARQUIVO_SAIDA
+
+    # Instrumentação opcional (sem custo quando desativada)
+    metricas = Instrumentacao("etapa3",
+                              ativa=bool(argumentos.metricas or argumentos.perfil),
+                              memoria=argumentos.memoria,
+                              pasta_perfil=argumentos.perfil)
+    relatorio = Relatorio("etapa3")
+    exibir = not argumentos.silencioso
+
+    if argumentos.fluxo:
+        # Modo fluxo: o vetor nunca é carregado inteiro na memória.
+        # Mediana e quantis são aproximados por um esboço combinável;
+        # a saída é sempre gravada em texto.
+        if exibir:
+            print("=" * 60)
+            print("  ETAPA 4 – Remoção de Outliers (modo fluxo)")
+            print("=" * 60)
+
+        try:
+            esboco = EsbocoQuantis()
+            with metricas.fase("fluxo") as fase:
+                outliers = remover_outliers_fluxo(arquivo_entrada, ARQUIVO_SAIDA, esboco=esboco,
+                                                  exibir=exibir,
+                                                  limite_amostra=LIMITE_AMOSTRA_OUTLIERS)
+                fase["linhas"] = outliers["removidos"] + outliers["mantidos"]
+                fase["bytes_lidos"] = bytes_do_arquivo(arquivo_entrada)
+                fase["bytes_gravados"] = bytes_do_arquivo(ARQUIVO_SAIDA)
+            relatorio.registrar("leitura", {"arquivo": arquivo_entrada,
+                                            "registros": esboco.contagem})
+            relatorio.registrar("outliers", outliers)
+            relatorio.registrar("saida", {"arquivo": ARQUIVO_SAIDA,
+                                          "registros": outliers["mantidos"]})
+            if exibir:
+                print(f"\n✔ Arquivo salvo: '{ARQUIVO_SAIDA}'.")
+
+            # Quantis aproximados da entrada, obtidos na mesma passada
+            if esboco.contagem > 0:
+                quantis = esboco.quantis(QUANTIS_PADRAO)
+                relatorio.registrar("estatisticas", {
+                    "registros":     esboco.contagem,
+                    "mediana_aprox": esboco.quantil(0.5),
+                    "quantis_aprox": {f"p{p * 100:g}": valor for p, valor in quantis.items()},
+                })
+                if exibir:
+                    print("\n  Quantis aproximados (esboço):")
+                    print(f"  Mediana        : {esboco.quantil(0.5):.2f}")
+                    for p, valor in quantis.items():
+                        rotulo = f"p{p * 100:g}"
+                        print(f"  {rotulo:<15}: {valor:.2f}")
+
+            if argumentos.removidos:
+                # Uma passada a mais, para não guardar os removidos em memória
+                pares = iterar_outliers_fluxo(arquivo_entrada, outliers["limite_inferior"],
+                                              outliers["limite_superior"])
+                total = gravar_pares(pares, argumentos.removidos)
+                print(f"✔ {total} outlier(s) removido(s) gravado(s) em '{argumentos.removidos}'.")
+
+            if not exibir:
+                print(f"✔ {esboco.contagem} registro(s) lido(s), "
+                      f"{outliers['removidos']} outlier(s) removido(s), "
+                      f"{outliers['mantidos']} mantido(s).")
+        except FileNotFoundError:
+            print(f"✘ Arquivo '{arquivo_entrada}' não encontrado.")
+            print("  Execute primeiro a Etapa 2 (etapa2_processamento.py).")
+    elif argumentos.incremental:
+        if exibir:
+            print("=" * 60)
+            print("  ETAPA 3 – Estatísticas (modo incremental)")
+            print("=" * 60)
+
+        secoes = {}
+        with metricas.fase("incremental") as fase:
+            executar_incremental(arquivo_entrada, arquivo_saida, exibir=exibir, resumo=secoes)
+            fase["bytes_lidos"] = bytes_do_arquivo(arquivo_entrada)
+        for secao, dados_secao in secoes.items():
+            relatorio.registrar(secao, dados_secao)
+
+        if argumentos.removidos and "outliers" in secoes:
+            outliers = secoes["outliers"]
+            pares = iterar_outliers_fluxo(arquivo_entrada, outliers["limite_inferior"],
+                                          outliers["limite_superior"])
+            total = gravar_pares(pares, argumentos.removidos)
+            print(f"✔ {total} outlier(s) removido(s) gravado(s) em '{argumentos.removidos}'.")
+    elif argumentos.precos:
+        casas = argumentos.casas
+        if exibir:
+            print("=" * 60)
+            print("  ETAPA 3 – Estatísticas Ponderadas por Volume (preços)")
+            print("=" * 60)
+
+        # 1. Lê os negócios, com os preços direto em ponto fixo
+        with metricas.fase("leitura") as fase:
+            leitura = {"arquivo": argumentos.precos, "casas": casas}
+            tickers, codigos, quantidades, precos = ler_arquivo_precos(argumentos.precos, casas,
+                                                                       exibir, leitura)
+            fase["linhas"] = len(quantidades)
+            fase["bytes_lidos"] = bytes_do_arquivo(argumentos.precos)
+        relatorio.registrar("leitura", leitura)
+
+        if len(quantidades) == 0:
+            print("Nenhum dado disponível. Encerrando.")
+        else:
+            # 2. Imputa os inválidos (≤ 0) pela média do ativo e pondera
+            with metricas.fase("agregacao") as fase:
+                resultado = estatisticas_ponderadas(tickers, codigos, quantidades, precos, casas)
+                fase["linhas"] = len(quantidades)
+            grupos = resultado["grupos"]
+            if exibir:
+                exibir_precos(grupos, casas)
+
+            totais = {
+                "ativos":                len(tickers),
+                "quantidades_invalidas": sum(grupos["quantidades_invalidas"]),
+                "precos_invalidos":      sum(grupos["precos_invalidos"]),
+                "volume":                sum(grupos["volume"]),
+                "financeiro":            formatar_preco(sum(grupos["financeiro"]), casas),
+            }
+            relatorio.registrar("precos", totais)
+            if exibir:
+                print(f"\n  ⚠ {totais['quantidades_invalidas']} quantidade(s) e "
+                      f"{totais['precos_invalidos']} preço(s) inválido(s) substituído(s) "
+                      f"pela média do ativo.")
+                print(f"  Volume total   : {totais['volume']}")
+                print(f"  Financeiro     : {totais['financeiro']}")
+                print()
+
+            # 3. Salva os negócios corrigidos e, se pedido, as métricas por ativo
+            with metricas.fase("escrita") as fase:
+                gravados = salvar_precos(ARQUIVO_SAIDA_PRECOS, tickers, codigos,
+                                         resultado["quantidades"], resultado["precos"], casas)
+                fase["linhas"] = gravados
+                fase["bytes_gravados"] = bytes_do_arquivo(ARQUIVO_SAIDA_PRECOS)
+            print(f"✔ Arquivo salvo: '{ARQUIVO_SAIDA_PRECOS}' ({gravados} registro(s)).")
+            if argumentos.por_ativo:
+                salvar_resumo(argumentos.por_ativo, formatar_grupos(grupos, casas))
+                print(f"✔ Métricas por ativo salvas: '{argumentos.por_ativo}' ({len(tickers)} ativo(s)).")
+
+            if not exibir:
+                print(f"✔ {len(quantidades)} negócio(s) de {len(tickers)} ativo(s), "
+                      f"volume {totais['volume']}, financeiro {totais['financeiro']}.")
+    else:
+        executar_padrao(arquivo_entrada, arquivo_saida, metricas, relatorio,
+                        argumentos.outliers, argumentos.fator, argumentos.classes,
+                        argumentos.comprimir, argumentos.binario, argumentos.removidos, exibir)
+
+    if argumentos.relatorio:
+        relatorio.exportar(argumentos.relatorio, argumentos.formato_relatorio)
+        print(f"✔ Relatório gravado em '{argumentos.relatorio}'.")
+
+    if argumentos.metricas:
+        metricas.exportar(argumentos.metricas, argumentos.formato_metricas)
+        print(f"\n✔ Métricas gravadas em '{argumentos.metricas}'.")
 
     print("\nSistema de análise financeira concluído com sucesso!\n")
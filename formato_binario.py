@@ -0,0 +1,165 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Formato binário intermediário entre as etapas
+=============================================================
+Objetivo:
+  Evitar que cada etapa converta o vetor para texto decimal e a
+  etapa seguinte o converta de volta. O artefato binário guarda
+  os valores como int64 little-endian crus, precedidos de um
+  pequeno cabeçalho, e pode ser mapeado em memória diretamente.
+
+Layout do arquivo (.bin):
+  Cabeçalho de 24 bytes (little-endian):
+    4 bytes  assinatura  b"AFIN"
+    1 byte   versão do formato
+    1 byte   tipo dos valores ('q' = int64)
+    2 bytes  reservados
+    8 bytes  quantidade de valores
+    4 bytes  CRC-32 dos valores
+    4 bytes  reservados (alinha os valores em 8 bytes)
+  Em seguida, quantidade × 8 bytes com os valores.
+
+Uso como exportação para texto:
+  python3 formato_binario.py dados_corrigidos.bin dados_corrigidos.txt
+=============================================================
+"""
+
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+
+from escrita import arquivo_atomico, gravar_inteiros
+
+ASSINATURA = b"AFIN"
+VERSAO = 1
+TIPO_INT64 = b"q"
+
+CABECALHO = struct.Struct("<4sBc2xQI4x")
+
+
+def eh_binario(nome_arquivo: str) -> bool:
+    """
+    Indica se o arquivo começa com a assinatura do formato binário.
+    """
+    with open(nome_arquivo, "rb") as arquivo:
+        return arquivo.read(len(ASSINATURA)) == ASSINATURA
+
+
+def salvar_binario(valores, nome_arquivo: str) -> None:
+    """
+    Grava uma sequência de inteiros no formato binário, de forma
+    atômica (escrita.arquivo_atomico).
+
+    Parâmetros:
+        valores      (iterável): inteiros a gravar (list, array('q'), ...).
+        nome_arquivo (str)     : caminho do arquivo de saída.
+    """
+    if isinstance(valores, array) and valores.typecode == "q":
+        buffer = valores
+    else:
+        buffer = array("q", valores)
+
+    if sys.byteorder == "big":
+        buffer = array("q", buffer)
+        buffer.byteswap()
+
+    dados = memoryview(buffer).cast("B")
+    cabecalho = CABECALHO.pack(ASSINATURA, VERSAO, TIPO_INT64, len(buffer), zlib.crc32(dados))
+
+    with arquivo_atomico(nome_arquivo) as arquivo:
+        arquivo.write(cabecalho)
+        arquivo.write(dados)
+
+
+def carregar_binario(nome_arquivo: str, verificar: bool = True):
+    """
+    Mapeia um artefato binário em memória, sem copiar os valores.
+
+    Parâmetros:
+        nome_arquivo (str) : caminho do arquivo .bin.
+        verificar    (bool): confere o CRC-32 dos valores (padrão: True).
+
+    Retorna:
+        valores (memoryview): visão de int64 sobre o arquivo mapeado
+                              (em máquinas big-endian, uma cópia em array('q')).
+
+    Lança:
+        ValueError: se o cabeçalho ou o CRC-32 não forem válidos.
+    """
+    with open(nome_arquivo, "rb") as arquivo:
+        cabecalho = arquivo.read(CABECALHO.size)
+        _, _, _, quantidade, crc = _validar_cabecalho(cabecalho, nome_arquivo)
+
+        if quantidade == 0:
+            return memoryview(array("q"))
+
+        mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+    tamanho_esperado = CABECALHO.size + quantidade * 8
+    if len(mapa) != tamanho_esperado:
+        mapa.close()
+        raise ValueError(f"Arquivo '{nome_arquivo}' truncado ou corrompido.")
+
+    dados = memoryview(mapa)[CABECALHO.size:]
+    if verificar and zlib.crc32(dados) != crc:
+        dados.release()
+        mapa.close()
+        raise ValueError(f"CRC-32 inválido em '{nome_arquivo}'.")
+
+    if sys.byteorder == "big":
+        valores = array("q", dados.tobytes())
+        valores.byteswap()
+        return memoryview(valores)
+
+    return dados.cast("q")
+
+
+def _validar_cabecalho(cabecalho: bytes, nome_arquivo: str) -> tuple:
+    """
+    Desempacota e valida o cabeçalho do artefato binário.
+    """
+    if len(cabecalho) < CABECALHO.size:
+        raise ValueError(f"Arquivo '{nome_arquivo}' não é um artefato binário válido.")
+
+    campos = CABECALHO.unpack(cabecalho)
+    assinatura, versao, tipo = campos[0], campos[1], campos[2]
+
+    if assinatura != ASSINATURA:
+        raise ValueError(f"Arquivo '{nome_arquivo}' não é um artefato binário válido.")
+    if versao != VERSAO:
+        raise ValueError(f"Versão {versao} do formato binário não suportada.")
+    if tipo != TIPO_INT64:
+        raise ValueError(f"Tipo de dado {tipo!r} não suportado.")
+
+    return campos
+
+
+def exportar_texto(arquivo_binario: str, arquivo_texto: str) -> int:
+    """
+    Exporta um artefato binário para texto (um número por linha).
+
+    Retorna:
+        quantidade (int): número de valores exportados.
+    """
+    valores = carregar_binario(arquivo_binario)
+    gravar_inteiros(valores, arquivo_texto)
+    return len(valores)
+
+
+# ─────────────────────────────────────────────────────────────
+# Ponto de entrada: exportação .bin → .txt
+# ─────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Uso: python3 formato_binario.py <entrada.bin> <saida.txt>")
+        sys.exit(1)
+
+    try:
+        total = exportar_texto(sys.argv[1], sys.argv[2])
+        print(f"✔ {total} valor(es) exportado(s) para '{sys.argv[2]}'.")
+    except (OSError, ValueError) as erro:
+        print(f"✘ Erro na exportação: {erro}")
+        sys.exit(1)
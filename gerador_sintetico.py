@@ -0,0 +1,133 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Gerador de dados sintéticos (quantidades de ações)
+=============================================================
+Objetivo:
+  Produzir arquivos no formato da Etapa 1 (um inteiro por
+  linha) com o tamanho desejado — de 10³ a 10⁸ linhas — para
+  testes de desempenho reprodutíveis.
+
+  Cada linha é, com as taxas configuradas:
+    - inválida  : 0 ou negativa (regra da Etapa 2);
+    - outlier   : um valor válido multiplicado por 10 a 50
+                  (simula um erro de digitação);
+    - normal    : quantidade em torno de MEDIA_NORMAL, com
+                  dispersão DESVIO_NORMAL, sempre ≥ 1.
+
+  A mesma semente gera sempre o mesmo arquivo, em qualquer
+  máquina: só o gerador random da biblioteca padrão é usado.
+  O arquivo é gravado em blocos, com memória constante.
+
+Uso:
+  python3 gerador_sintetico.py sintetico.txt --linhas 1000000
+  python3 gerador_sintetico.py grande.txt --linhas 1e8 --invalidos 0.02 --outliers 0.001
+=============================================================
+"""
+
+import argparse
+import os
+import random
+
+# Distribuição dos valores normais
+MEDIA_NORMAL = 300
+DESVIO_NORMAL = 80
+
+# Taxas padrão
+TAXA_INVALIDOS = 0.05
+TAXA_OUTLIERS = 0.01
+SEMENTE = 42
+
+# Linhas geradas e gravadas por vez
+TAMANHO_BLOCO_GERACAO = 1 << 16
+
+
+def gerar_bloco(gerador: random.Random, quantidade: int,
+                taxa_invalidos: float = TAXA_INVALIDOS,
+                taxa_outliers: float = TAXA_OUTLIERS) -> list:
+    """
+    Gera 'quantidade' valores com as taxas de inválidos e outliers.
+
+    Parâmetros:
+        gerador        (random.Random): fonte de aleatoriedade (com semente).
+        quantidade     (int)          : número de valores.
+        taxa_invalidos (float)        : fração esperada de valores ≤ 0.
+        taxa_outliers  (float)        : fração esperada de outliers.
+
+    Retorna:
+        valores (list): inteiros gerados.
+    """
+    aleatorio = gerador.random
+    normal = gerador.gauss
+    sortear = gerador.randint
+    limite_outliers = taxa_invalidos + taxa_outliers
+
+    valores = []
+    for _ in range(quantidade):
+        sorteio = aleatorio()
+        valor = max(1, int(normal(MEDIA_NORMAL, DESVIO_NORMAL)))
+        if sorteio < taxa_invalidos:
+            valor = -sortear(0, MEDIA_NORMAL)      # 0 ou negativo
+        elif sorteio < limite_outliers:
+            valor = valor * sortear(10, 50)        # Erro de digitação
+        valores.append(valor)
+    return valores
+
+
+def gerar_arquivo(nome_arquivo: str, linhas: int,
+                  taxa_invalidos: float = TAXA_INVALIDOS,
+                  taxa_outliers: float = TAXA_OUTLIERS,
+                  semente: int = SEMENTE) -> dict:
+    """
+    Grava um arquivo sintético com 'linhas' valores, um por linha.
+
+    Retorna:
+        resumo (dict): 'arquivo', 'linhas', 'bytes' e os parâmetros usados.
+    """
+    if not 0 <= taxa_invalidos + taxa_outliers <= 1:
+        raise ValueError("a soma das taxas de inválidos e outliers deve estar entre 0 e 1")
+
+    gerador = random.Random(semente)
+    restantes = linhas
+
+    with open(nome_arquivo, "w", encoding="utf-8") as arquivo:
+        while restantes > 0:
+            quantidade = min(TAMANHO_BLOCO_GERACAO, restantes)
+            bloco = gerar_bloco(gerador, quantidade, taxa_invalidos, taxa_outliers)
+            arquivo.write("\n".join(map(str, bloco)))
+            arquivo.write("\n")
+            restantes = restantes - quantidade
+
+    return {
+        "arquivo":        nome_arquivo,
+        "linhas":         linhas,
+        "bytes":          os.path.getsize(nome_arquivo),
+        "taxa_invalidos": taxa_invalidos,
+        "taxa_outliers":  taxa_outliers,
+        "semente":        semente,
+    }
+
+
+# ─────────────────────────────────────────────────────────────
+# Ponto de entrada principal do programa
+# ─────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gerador de dados sintéticos reprodutíveis")
+    parser.add_argument("arquivo", help="arquivo de saída (texto, um inteiro por linha)")
+    parser.add_argument("--linhas", type=float, default=1000,
+                        help="quantidade de linhas (aceita notação como 1e6)")
+    parser.add_argument("--invalidos", type=float, default=TAXA_INVALIDOS,
+                        help=f"fração de valores ≤ 0 (padrão: {TAXA_INVALIDOS})")
+    parser.add_argument("--outliers", type=float, default=TAXA_OUTLIERS,
+                        help=f"fração de outliers (padrão: {TAXA_OUTLIERS})")
+    parser.add_argument("--semente", type=int, default=SEMENTE,
+                        help=f"semente do gerador (padrão: {SEMENTE})")
+    argumentos = parser.parse_args()
+
+    try:
+        resumo = gerar_arquivo(argumentos.arquivo, int(argumentos.linhas),
+                               argumentos.invalidos, argumentos.outliers, argumentos.semente)
+        print(f"✔ {resumo['linhas']} linha(s) gravada(s) em '{resumo['arquivo']}' "
+              f"({resumo['bytes']} bytes).")
+    except (ValueError, OSError) as erro:
+        print(f"✘ {erro}")
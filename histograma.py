@@ -0,0 +1,507 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Histogramas combináveis e forma da distribuição
+=============================================================
+Objetivo:
+  Descrever a distribuição de um vetor sem exportá-lo para
+  outra ferramenta: histogramas e momentos calculados em UMA
+  passada por blocos, sem ordenar (nem copiar ordenado) o vetor.
+
+Histogramas (classe Histograma):
+  - largura fixa  : classes de mesma largura entre o mínimo e o
+                    máximo (para inteiros, larguras inteiras);
+  - logarítmico   : 'por_decada' classes em cada potência de 10,
+                    de 1 a 10¹⁹ (cobre todo o int64 positivo).
+                    Valores ≤ 0 ficam na contagem 'abaixo';
+  - por quantis   : classes com aproximadamente a mesma contagem,
+                    escolhidas entre as bordas de um histograma
+                    fino de largura fixa (RESOLUCAO_FINA subdivisões
+                    por classe). As contagens são exatas; as bordas
+                    têm a precisão da grade fina (exatas quando a
+                    grade fina tem largura 1).
+
+  Em grades de largura fixa, a classe de cada valor sai de uma
+  divisão inteira; nas demais, de uma busca binária entre as
+  bordas (numpy.searchsorted, ou bisect sem NumPy). As contagens
+  do bloco são somadas de uma vez (numpy.bincount).
+  Histogramas com as mesmas bordas se combinam somando as
+  contagens, portanto a combinação de shards ou de trechos
+  incrementais é EXATA. A grade logarítmica não depende dos
+  dados: partes processadas em separado sempre se combinam.
+
+Momentos (classe Momentos):
+  Somas inteiras exatas Σx, Σx², Σx³ e Σx⁴ (também combináveis
+  por soma), das quais saem média, variância e desvio padrão
+  (iguais aos do módulo statistics) e a forma da distribuição:
+    assimetria (skewness) G1 = √(n(n−1)) / (n−2) · m₃ / m₂^(3/2)
+    curtose em excesso    G2 = (n−1) / ((n−2)(n−3)) · ((n+1)·m₄/m₂² − 3(n−1))
+  com mₖ o k-ésimo momento central (estimadores ajustados, como
+  as funções DISTORÇÃO e CURT das planilhas).
+=============================================================
+"""
+
+import math
+from bisect import bisect_right
+from fractions import Fraction
+from operator import mul
+
+from estatisticas_exatas import desvio_padrao_exato, media_exata, soma_exata_int64, variancia_exata
+
+try:
+    import numpy as np  # Opcional: localização e contagem vetorizadas
+except ImportError:
+    np = None
+
+CLASSES_PADRAO = 10       # Classes do histograma de largura fixa
+CLASSES_POR_DECADA = 4    # Classes por potência de 10 no logarítmico
+FAIXAS_QUANTIS = 10       # Classes do histograma por quantis (decis)
+RESOLUCAO_FINA = 1000     # Subdivisões de cada classe na grade fina
+DECADAS = 19              # 10^0 .. 10^19: todo o int64 positivo
+TAMANHO_BLOCO = 1 << 18   # Valores processados por vez
+LARGURA_BARRA = 40        # Caracteres da maior barra na exibição
+
+_LIMITE_INT64 = 2 ** 63 - 1
+
+
+# ─────────────────────────────────────────────────────────────
+# MOMENTOS
+# ─────────────────────────────────────────────────────────────
+
+def _soma_potencia_numpy(vetor, potencia: int, maior_absoluto: int) -> int:
+    """
+    Σx^potencia exata: em int64 (estatisticas_exatas.soma_exata_int64(),
+    em blocos ou em partes de 32 bits); se um único termo não couber
+    em int64, em inteiros do Python.
+    """
+    maior_termo = maior_absoluto ** potencia
+    if maior_termo > _LIMITE_INT64:
+        return sum(valor ** potencia for valor in vetor.tolist())
+
+    return soma_exata_int64(vetor ** potencia, maior_termo)
+
+
+class Momentos:
+    """
+    Contagem, extremos e somas das potências 1 a 4, exatas e
+    combináveis.
+    """
+
+    def __init__(self):
+        self.contagem = 0
+        self.somas = [0, 0, 0, 0]  # Σx, Σx², Σx³, Σx⁴
+        self.minimo = None
+        self.maximo = None
+
+    def adicionar_bloco(self, bloco) -> None:
+        """
+        Incorpora um bloco de inteiros.
+        """
+        if len(bloco) == 0:
+            return
+
+        if np is not None:
+            vetor = np.asarray(bloco, dtype=np.int64)
+            menor, maior = int(vetor.min()), int(vetor.max())
+            maior_absoluto = max(abs(menor), abs(maior))
+            somas = [_soma_potencia_numpy(vetor, potencia, maior_absoluto)
+                     for potencia in (1, 2, 3, 4)]
+        else:
+            menor, maior = min(bloco), max(bloco)
+            quadrados = list(map(mul, bloco, bloco))
+            somas = [sum(bloco), sum(quadrados),
+                     sum(map(mul, quadrados, bloco)), sum(map(mul, quadrados, quadrados))]
+
+        self._incorporar(len(bloco), somas, menor, maior)
+
+    def combinar(self, outro: "Momentos") -> None:
+        """
+        Junta outro agregado a este (por exemplo, de outro shard).
+        """
+        if outro.contagem > 0:
+            self._incorporar(outro.contagem, outro.somas, outro.minimo, outro.maximo)
+
+    def _incorporar(self, contagem: int, somas: list, menor: int, maior: int) -> None:
+        self.contagem = self.contagem + contagem
+        self.somas = [atual + nova for atual, nova in zip(self.somas, somas)]
+        if self.minimo is None or menor < self.minimo:
+            self.minimo = menor
+        if self.maximo is None or maior > self.maximo:
+            self.maximo = maior
+
+    def media(self):
+        return media_exata(self.contagem, self.somas[0])
+
+    def variancia(self):
+        return variancia_exata(self.contagem, self.somas[0], self.somas[1])
+
+    def desvio_padrao(self) -> float:
+        return desvio_padrao_exato(self.contagem, self.somas[0], self.somas[1])
+
+    def _centrais(self) -> tuple:
+        """
+        Momentos centrais multiplicados por potências de n, em
+        inteiros exatos: (n²·m₂, n³·m₃, n⁴·m₄).
+        """
+        n = self.contagem
+        s1, s2, s3, s4 = self.somas
+        c2 = n * s2 - s1 * s1
+        c3 = n * n * s3 - 3 * n * s1 * s2 + 2 * s1 ** 3
+        c4 = n ** 3 * s4 - 4 * n * n * s1 * s3 + 6 * n * s1 * s1 * s2 - 3 * s1 ** 4
+        return c2, c3, c4
+
+    def assimetria(self):
+        """
+        Assimetria amostral ajustada (G1); None com menos de 3
+        valores ou variância nula.
+        """
+        n = self.contagem
+        if n < 3:
+            return None
+        c2, c3, _ = self._centrais()
+        if c2 == 0:
+            return None
+        # m₃ / m₂^(3/2) = c3 / c2^(3/2)
+        g1 = c3 / (c2 * math.sqrt(c2))
+        return g1 * math.sqrt(n * (n - 1)) / (n - 2)
+
+    def curtose(self):
+        """
+        Curtose amostral em excesso ajustada (G2; 0 para a normal);
+        None com menos de 4 valores ou variância nula.
+        """
+        n = self.contagem
+        if n < 4:
+            return None
+        c2, _, c4 = self._centrais()
+        if c2 == 0:
+            return None
+        # m₄ / m₂² = c4 / c2², exato até a conversão final
+        razao = Fraction(c4, c2 * c2)
+        return float((n - 1) * ((n + 1) * razao - 3 * (n - 1)) / ((n - 2) * (n - 3)))
+
+    def para_dict(self) -> dict:
+        """
+        Representação serializável (JSON) do agregado.
+        """
+        return {"contagem": self.contagem, "somas": list(self.somas),
+                "minimo": self.minimo, "maximo": self.maximo}
+
+    @classmethod
+    def de_dict(cls, dados: dict) -> "Momentos":
+        momentos = cls()
+        momentos.contagem = dados["contagem"]
+        momentos.somas = list(dados["somas"])
+        momentos.minimo = dados["minimo"]
+        momentos.maximo = dados["maximo"]
+        return momentos
+
+
+def _tetos_int64(bordas: list):
+    """
+    Bordas convertidas para int64 sem arredondar os valores: para
+    um inteiro v, borda ≤ v ⇔ ceil(borda) ≤ v. Buscar v entre os
+    tetos dá a mesma classe que bisect_right() nas bordas exatas,
+    mesmo acima de 2^53, onde float64 já não representa todo int64.
+    Tetos acima do int64 nunca são atingidos e ficam de fora.
+    """
+    tetos = [max(math.ceil(borda), -_LIMITE_INT64 - 1) for borda in bordas]
+    return np.asarray([teto for teto in tetos if teto <= _LIMITE_INT64], dtype=np.int64)
+
+
+# ─────────────────────────────────────────────────────────────
+# HISTOGRAMA
+# ─────────────────────────────────────────────────────────────
+
+class Histograma:
+    """
+    Contagens por classe [bordas[i], bordas[i+1]), mais as contagens
+    'abaixo' da primeira borda e 'acima' (≥) da última.
+    """
+
+    def __init__(self, bordas):
+        bordas = list(bordas)
+        if len(bordas) < 2:
+            raise ValueError("um histograma precisa de pelo menos duas bordas")
+        if any(a >= b for a, b in zip(bordas, bordas[1:])):
+            raise ValueError("as bordas do histograma devem ser estritamente crescentes")
+
+        self.bordas = bordas
+        # contagens[0] = abaixo, contagens[1..k] = classes, contagens[k+1] = acima
+        self.contagens = [0] * (len(bordas) + 1)
+        self._tetos_numpy = _tetos_int64(bordas) if np is not None else None
+
+        # Bordas inteiras igualmente espaçadas: a classe sai de uma divisão
+        largura = bordas[1] - bordas[0]
+        regular = all(isinstance(borda, int) for borda in bordas) and all(
+            b - a == largura for a, b in zip(bordas, bordas[1:]))
+        self._largura = largura if regular else None
+
+    @classmethod
+    def largura_fixa(cls, inicio, largura, quantidade: int) -> "Histograma":
+        """
+        'quantidade' classes de largura 'largura' a partir de 'inicio'.
+        """
+        if largura <= 0 or quantidade < 1:
+            raise ValueError("largura e quantidade de classes devem ser positivas")
+        return cls(inicio + i * largura for i in range(quantidade + 1))
+
+    @classmethod
+    def logaritmico(cls, por_decada: int = CLASSES_POR_DECADA,
+                    decadas: int = DECADAS) -> "Histograma":
+        """
+        'por_decada' classes por potência de 10, de 1 a 10^decadas.
+        As bordas não dependem dos dados.
+        """
+        if por_decada < 1 or decadas < 1:
+            raise ValueError("por_decada e decadas devem ser positivos")
+        return cls(10 ** (i // por_decada) if i % por_decada == 0 else 10 ** (i / por_decada)
+                   for i in range(decadas * por_decada + 1))
+
+    @property
+    def abaixo(self) -> int:
+        return self.contagens[0]
+
+    @property
+    def acima(self) -> int:
+        return self.contagens[-1]
+
+    @property
+    def total(self) -> int:
+        return sum(self.contagens)
+
+    def adicionar_bloco(self, bloco) -> None:
+        """
+        Conta um bloco de valores nas classes.
+        """
+        if len(bloco) == 0:
+            return
+
+        ultima = len(self.contagens) - 1
+        if np is not None:
+            vetor = np.asarray(bloco, dtype=np.int64)
+            inicio = self.bordas[0]
+            if self._largura is not None and self._cabe_em_int64(int(vetor.min()), int(vetor.max())):
+                indices = np.clip((vetor - inicio) // self._largura + 1, 0, ultima)
+            else:
+                indices = np.searchsorted(self._tetos_numpy, vetor, side="right")
+            novas = np.bincount(indices, minlength=ultima + 1).tolist()
+        else:
+            novas = [0] * (ultima + 1)
+            if self._largura is not None:
+                inicio, largura = self.bordas[0], self._largura
+                for valor in bloco:
+                    indice = min(max((valor - inicio) // largura + 1, 0), ultima)
+                    novas[indice] = novas[indice] + 1
+            else:
+                bordas = self.bordas
+                for valor in bloco:
+                    indice = bisect_right(bordas, valor)
+                    novas[indice] = novas[indice] + 1
+
+        self.contagens = [atual + nova for atual, nova in zip(self.contagens, novas)]
+
+    def _cabe_em_int64(self, menor: int, maior: int) -> bool:
+        """
+        Se (valor − bordas[0]) não estoura int64 para nenhum valor do bloco.
+        """
+        inicio = self.bordas[0]
+        return -_LIMITE_INT64 - 1 <= menor - inicio and maior - inicio <= _LIMITE_INT64
+
+    def combinar(self, outro: "Histograma") -> None:
+        """
+        Soma as contagens de outro histograma com as mesmas bordas.
+        """
+        if outro.bordas != self.bordas:
+            raise ValueError("histogramas com bordas diferentes não podem ser combinados")
+        self.contagens = [atual + nova for atual, nova in zip(self.contagens, outro.contagens)]
+
+    def _agrupar(self, cortes: list) -> "Histograma":
+        """
+        Histograma mais grosso cujas bordas são bordas[c] para c em
+        'cortes' (índices crescentes, do primeiro ao último); as
+        contagens das classes agrupadas são somadas.
+        """
+        novo = Histograma(self.bordas[corte] for corte in cortes)
+        novo.contagens = ([self.contagens[0]]
+                          + [sum(self.contagens[a + 1:b + 1]) for a, b in zip(cortes, cortes[1:])]
+                          + [self.contagens[-1]])
+        return novo
+
+    def reagrupar(self, fator: int) -> "Histograma":
+        """
+        Junta cada 'fator' classes vizinhas em uma só.
+        """
+        ultima = len(self.bordas) - 1
+        cortes = list(range(0, ultima, fator)) + [ultima]
+        return self._agrupar(cortes)
+
+    def por_quantis(self, faixas: int = FAIXAS_QUANTIS) -> "Histograma":
+        """
+        Histograma com até 'faixas' classes de contagens próximas,
+        com bordas escolhidas entre as bordas deste histograma.
+        """
+        classes = self.contagens[1:-1]
+        total = sum(classes)
+        cortes = [0]
+        acumulado = 0
+        proxima = 1
+        for indice, contagem in enumerate(classes, start=1):
+            acumulado = acumulado + contagem
+            # Corta na primeira borda que alcança o próximo alvo j·total/faixas
+            if proxima < faixas and acumulado * faixas >= proxima * total and acumulado < total:
+                cortes.append(indice)
+                while proxima < faixas and acumulado * faixas >= proxima * total:
+                    proxima = proxima + 1
+        cortes.append(len(classes))
+        return self._agrupar(cortes)
+
+    def classes(self) -> list:
+        """
+        Lista de dicts 'inferior', 'superior' e 'contagem', uma por classe.
+        """
+        return [{"inferior": inferior, "superior": superior, "contagem": contagem}
+                for inferior, superior, contagem in zip(self.bordas, self.bordas[1:], self.contagens[1:-1])]
+
+    def para_dict(self) -> dict:
+        """
+        Representação serializável (JSON) do histograma.
+        """
+        return {"bordas": list(self.bordas), "contagens": list(self.contagens)}
+
+    @classmethod
+    def de_dict(cls, dados: dict) -> "Histograma":
+        histograma = cls(dados["bordas"])
+        histograma.contagens = list(dados["contagens"])
+        return histograma
+
+    def __getstate__(self):
+        return self.para_dict()  # Para enviar entre processos (pickle)
+
+    def __setstate__(self, estado):
+        self.__init__(estado["bordas"])
+        self.contagens = list(estado["contagens"])
+
+
+# ─────────────────────────────────────────────────────────────
+# ANÁLISE EM UMA PASSADA
+# ─────────────────────────────────────────────────────────────
+
+def grade_fina(minimo: int, maximo: int, classes: int = CLASSES_PADRAO) -> tuple:
+    """
+    Grade de largura fixa para inteiros em [minimo, maximo]:
+    'classes' classes de largura inteira, cada uma dividida em
+    até RESOLUCAO_FINA subclasses (também de largura inteira).
+
+    Retorna:
+        (fino, fator) (tuple): histograma fino vazio e quantas
+        subclasses formam uma classe (fino.reagrupar(fator)).
+    """
+    largura = -(-(maximo - minimo + 1) // classes)  # Teto da divisão
+    fator = min(RESOLUCAO_FINA, largura)
+    largura_fina = -(-largura // fator)
+    return Histograma.largura_fixa(minimo, largura_fina, classes * fator), fator
+
+
+def analisar_distribuicao(valores, classes: int = CLASSES_PADRAO,
+                          por_decada: int = CLASSES_POR_DECADA,
+                          faixas: int = FAIXAS_QUANTIS) -> dict:
+    """
+    Histogramas de largura fixa, logarítmico e por quantis, e os
+    momentos, em uma única passada por blocos sobre 'valores'.
+
+    Parâmetros:
+        valores    (sequência): inteiros (list, array('q'), memoryview...).
+        classes    (int)      : classes do histograma de largura fixa.
+        por_decada (int)      : classes por potência de 10 no logarítmico.
+        faixas     (int)      : classes do histograma por quantis.
+
+    Retorna:
+        distribuicao (dict): 'momentos' (Momentos), 'largura_fixa',
+        'logaritmico', 'quantis' e 'fino' (Histograma), este último
+        para ser combinado com o de outras partes de mesma grade.
+
+    Levanta:
+        ValueError: vetor vazio.
+    """
+    if len(valores) == 0:
+        raise ValueError("a distribuição requer pelo menos um valor")
+
+    if np is not None:
+        vetor = np.asarray(valores, dtype=np.int64)
+        minimo, maximo = int(vetor.min()), int(vetor.max())
+    else:
+        minimo, maximo = min(valores), max(valores)
+    fino, fator = grade_fina(minimo, maximo, classes)
+    logaritmico = Histograma.logaritmico(por_decada)
+    momentos = Momentos()
+
+    for inicio in range(0, len(valores), TAMANHO_BLOCO):
+        bloco = valores[inicio:inicio + TAMANHO_BLOCO]
+        momentos.adicionar_bloco(bloco)
+        fino.adicionar_bloco(bloco)
+        logaritmico.adicionar_bloco(bloco)
+
+    return {
+        "momentos":     momentos,
+        "largura_fixa": fino.reagrupar(fator),
+        "logaritmico":  logaritmico,
+        "quantis":      fino.por_quantis(faixas),
+        "fino":         fino,
+    }
+
+
+# ─────────────────────────────────────────────────────────────
+# EXIBIÇÃO
+# ─────────────────────────────────────────────────────────────
+
+def _formatar_borda(borda) -> str:
+    return str(borda) if isinstance(borda, int) else f"{borda:.4g}"
+
+
+def exibir_histograma(titulo: str, histograma: Histograma, aparar: bool = False) -> None:
+    """
+    Exibe as classes com barras proporcionais às contagens. Com
+    aparar=True, omite as classes vazias das pontas (útil na grade
+    logarítmica, que cobre de 1 a 10¹⁹).
+    """
+    classes = histograma.classes()
+    if aparar:
+        ocupadas = [i for i, classe in enumerate(classes) if classe["contagem"] > 0]
+        classes = classes[ocupadas[0]:ocupadas[-1] + 1] if ocupadas else []
+
+    print(f"\n  {titulo}")
+    if histograma.abaixo:
+        print(f"  {'abaixo de ' + _formatar_borda(histograma.bordas[0]):>25} : {histograma.abaixo}")
+
+    maior = max((classe["contagem"] for classe in classes), default=0)
+    for classe in classes:
+        rotulo = f"[{_formatar_borda(classe['inferior'])}, {_formatar_borda(classe['superior'])})"
+        barra = "█" * round(LARGURA_BARRA * classe["contagem"] / maior) if maior else ""
+        print(f"  {rotulo:>25} : {classe['contagem']:>8} {barra}")
+
+    if histograma.acima:
+        print(f"  {'a partir de ' + _formatar_borda(histograma.bordas[-1]):>25} : {histograma.acima}")
+
+
+def exibir_forma(momentos: Momentos) -> None:
+    """
+    Exibe assimetria e curtose (ou o motivo de não estarem definidas).
+    """
+    assimetria = momentos.assimetria()
+    curtose = momentos.curtose()
+    print(f"  Assimetria     : {assimetria:.4f}" if assimetria is not None
+          else "  Assimetria     : indefinida (menos de 3 valores ou variância nula)")
+    print(f"  Curtose (exc.) : {curtose:.4f}" if curtose is not None
+          else "  Curtose (exc.) : indefinida (menos de 4 valores ou variância nula)")
+
+
+def exibir_distribuicao(distribuicao: dict) -> None:
+    """
+    Exibe a forma da distribuição e os três histogramas de
+    analisar_distribuicao().
+    """
+    exibir_forma(distribuicao["momentos"])
+    exibir_histograma("Histograma (largura fixa)", distribuicao["largura_fixa"])
+    exibir_histograma("Histograma (escala logarítmica)", distribuicao["logaritmico"], aparar=True)
+    exibir_histograma("Histograma (por quantis)", distribuicao["quantis"])
@@ -0,0 +1,258 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Recomputação incremental com checkpoint persistido
+=============================================================
+Objetivo:
+  Os arquivos de dados só crescem (a Etapa 1 acrescenta valores
+  ao final). Em vez de reler e recalcular tudo a cada execução,
+  um arquivo auxiliar '<arquivo>.ckpt' (JSON) guarda:
+    - o deslocamento (em bytes) até onde o arquivo foi processado;
+    - o hash SHA-256 desse prefixo;
+    - os agregados acumulados até ali (contagens, Σx, Σx²,
+      mínimo, máximo — dos válidos e de todos os valores) e um
+      esboço de quantis.
+
+  Na execução seguinte, o prefixo é conferido pelo hash (leitura
+  sequencial, sem conversão) e apenas o trecho novo é convertido
+  e agregado. Se o prefixo mudou, o checkpoint é descartado e o
+  arquivo é processado desde o início.
+
+  Só linhas completas (terminadas em quebra de linha) entram no
+  checkpoint; uma última linha ainda sendo escrita fica para a
+  próxima execução.
+=============================================================
+"""
+
+import hashlib
+import json
+import mmap
+import os
+from operator import mul
+
+from descompressao import detectar_compressao
+from escrita import arquivo_atomico
+from leitura import TAMANHO_BLOCO, converter_linhas
+from quantis import EsbocoQuantis
+
+SUFIXO_CHECKPOINT = ".ckpt"
+VERSAO_CHECKPOINT = 1
+
+
+# ─────────────────────────────────────────────────────────────
+# PERSISTÊNCIA DO CHECKPOINT
+# ─────────────────────────────────────────────────────────────
+
+def _agregado_vazio() -> dict:
+    return {
+        "contagem":       0,
+        "soma":           0,
+        "soma_quadrados": 0,
+        "minimo":         None,
+        "maximo":         None,
+    }
+
+
+def checkpoint_vazio() -> dict:
+    """
+    Checkpoint que corresponde a um arquivo ainda não processado.
+    """
+    return {
+        "versao":           VERSAO_CHECKPOINT,
+        "deslocamento":     0,
+        "hash_prefixo":     hashlib.sha256().hexdigest(),
+        "linhas":           0,
+        "linhas_invalidas": 0,
+        "validos":          _agregado_vazio(),   # Apenas valores > 0
+        "todos":            _agregado_vazio(),   # Todos os valores
+        "esboco":           EsbocoQuantis().para_dict(),
+        "saida":            None,
+    }
+
+
+def carregar_checkpoint(nome_arquivo: str) -> dict:
+    """
+    Lê o checkpoint de um arquivo de dados, se existir e for legível.
+    Retorna None caso contrário.
+    """
+    try:
+        with open(nome_arquivo + SUFIXO_CHECKPOINT, "r", encoding="utf-8") as arquivo:
+            checkpoint = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+    if checkpoint.get("versao") != VERSAO_CHECKPOINT:
+        return None
+    return checkpoint
+
+
+def salvar_checkpoint(nome_arquivo: str, checkpoint: dict) -> None:
+    """
+    Grava o checkpoint de forma atômica (escrita.arquivo_atomico),
+    para que uma interrupção nunca deixe um checkpoint pela metade.
+    """
+    with arquivo_atomico(nome_arquivo + SUFIXO_CHECKPOINT) as arquivo:
+        arquivo.write(json.dumps(checkpoint).encode("utf-8"))
+
+
+# ─────────────────────────────────────────────────────────────
+# ATUALIZAÇÃO INCREMENTAL
+# ─────────────────────────────────────────────────────────────
+
+def _acumular(agregado: dict, valores: list) -> None:
+    """
+    Acrescenta uma lista de inteiros a um agregado (somas exatas).
+    """
+    if not valores:
+        return
+    agregado["contagem"] = agregado["contagem"] + len(valores)
+    agregado["soma"] = agregado["soma"] + sum(valores)
+    agregado["soma_quadrados"] = agregado["soma_quadrados"] + sum(map(mul, valores, valores))
+    menor, maior = min(valores), max(valores)
+    if agregado["minimo"] is None or menor < agregado["minimo"]:
+        agregado["minimo"] = menor
+    if agregado["maximo"] is None or maior > agregado["maximo"]:
+        agregado["maximo"] = maior
+
+
+def _iterar_trecho(mapa, inicio: int, fim: int, primeira_linha: int, invalidas: list):
+    """
+    Converte o trecho [inicio, fim) do arquivo mapeado em blocos.
+    O trecho deve terminar logo após uma quebra de linha.
+
+    Produz:
+        (bloco, linhas) (tuple): valores convertidos e quantidade de
+                                 linhas que o bloco cobriu.
+    """
+    while inicio < fim:
+        corte = mapa.find(b"\n", min(inicio + TAMANHO_BLOCO, fim) - 1, fim)
+        linhas = mapa[inicio:corte].split(b"\n")
+        yield converter_linhas(linhas, primeira_linha, invalidas), len(linhas)
+        primeira_linha = primeira_linha + len(linhas)
+        inicio = corte + 1
+
+
+def atualizar_checkpoint(nome_arquivo: str, arquivo_saida: str = None) -> dict:
+    """
+    Atualiza os agregados de 'nome_arquivo' processando apenas o
+    trecho acrescentado desde o último checkpoint.
+
+    Se 'arquivo_saida' for informado, também mantém o vetor corrigido
+    (inválidos substituídos por int(média dos válidos), como na
+    Etapa 2): quando o valor de substituição não mudou e a saída está
+    como o checkpoint a deixou, só o trecho novo é acrescentado a ela;
+    caso contrário, a saída é regravada.
+
+    Retorna:
+        resultado (dict): 'checkpoint' (estado atualizado),
+                          'reiniciado' (bool: prefixo mudou ou não havia
+                          checkpoint), 'novas_linhas' e 'invalidas'.
+    """
+    # O checkpoint guarda deslocamentos em bytes do texto puro
+    compressao = detectar_compressao(nome_arquivo)
+    if compressao is not None:
+        raise ValueError(f"O modo incremental não lê arquivos comprimidos ({compressao}): '{nome_arquivo}'.")
+
+    checkpoint = carregar_checkpoint(nome_arquivo)
+    invalidas = []
+
+    with open(nome_arquivo, "rb") as arquivo:
+        try:
+            mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            mapa = b""  # Arquivo vazio
+
+    try:
+        tamanho = len(mapa)
+        hasher = hashlib.sha256()
+
+        # 1. Confere o prefixo já processado
+        reiniciado = True
+        if checkpoint is not None and checkpoint["deslocamento"] <= tamanho:
+            hasher.update(memoryview(mapa)[:checkpoint["deslocamento"]])
+            reiniciado = hasher.hexdigest() != checkpoint["hash_prefixo"]
+
+        if reiniciado:
+            checkpoint = checkpoint_vazio()
+            hasher = hashlib.sha256()
+
+        # 2. Delimita o trecho novo (apenas linhas completas)
+        inicio = checkpoint["deslocamento"]
+        fim = mapa.rfind(b"\n", inicio) + 1 if tamanho > inicio else inicio
+        if fim <= inicio:
+            fim = inicio
+
+        # 3. Converte e agrega apenas o trecho novo
+        esboco = EsbocoQuantis.de_dict(checkpoint["esboco"])
+        linhas_novas = 0
+        for bloco, linhas in _iterar_trecho(mapa, inicio, fim, checkpoint["linhas"] + 1, invalidas):
+            valores = bloco.tolist()
+            _acumular(checkpoint["todos"], valores)
+            _acumular(checkpoint["validos"], [valor for valor in valores if valor > 0])
+            esboco.adicionar_bloco(valores)
+            linhas_novas = linhas_novas + linhas
+
+        hasher.update(memoryview(mapa)[inicio:fim])
+
+        checkpoint["deslocamento"] = fim
+        checkpoint["hash_prefixo"] = hasher.hexdigest()
+        checkpoint["linhas"] = checkpoint["linhas"] + linhas_novas
+        checkpoint["linhas_invalidas"] = checkpoint["linhas_invalidas"] + len(invalidas)
+        checkpoint["esboco"] = esboco.para_dict()
+
+        # 4. Mantém o vetor corrigido, se pedido
+        if arquivo_saida is not None:
+            checkpoint["saida"] = _atualizar_saida(mapa, inicio, fim, checkpoint,
+                                                   arquivo_saida, reiniciado)
+    finally:
+        if isinstance(mapa, mmap.mmap):
+            mapa.close()
+
+    salvar_checkpoint(nome_arquivo, checkpoint)
+
+    return {
+        "checkpoint":   checkpoint,
+        "reiniciado":   reiniciado,
+        "novas_linhas": linhas_novas,
+        "invalidas":    invalidas,
+    }
+
+
+def _atualizar_saida(mapa, inicio: int, fim: int, checkpoint: dict,
+                     arquivo_saida: str, reiniciado: bool) -> dict:
+    """
+    Acrescenta (ou regrava) o vetor corrigido em 'arquivo_saida'.
+    A regravação é atômica; um acréscimo interrompido deixa o
+    tamanho diferente do registrado, e a próxima execução regrava.
+    """
+    validos = checkpoint["validos"]
+    media = validos["soma"] / validos["contagem"] if validos["contagem"] > 0 else 0.0
+    substituto = int(media)
+
+    anterior = checkpoint["saida"]
+    pode_anexar = (
+        not reiniciado
+        and anterior is not None
+        and anterior["arquivo"] == arquivo_saida
+        and anterior["substituto"] == substituto
+        and os.path.exists(arquivo_saida)
+        and os.path.getsize(arquivo_saida) == anterior["tamanho"]
+    )
+
+    if pode_anexar:
+        destino, primeira_linha = open(arquivo_saida, "ab"), anterior["linhas"] + 1
+    else:
+        destino, inicio, primeira_linha = arquivo_atomico(arquivo_saida), 0, 1
+
+    with destino as saida:
+        for bloco, _ in _iterar_trecho(mapa, inicio, fim, primeira_linha, []):
+            corrigido = [valor if valor > 0 else substituto for valor in bloco]
+            if corrigido:
+                saida.write(("\n".join(map(str, corrigido)) + "\n").encode("ascii"))
+
+    return {
+        "arquivo":    arquivo_saida,
+        "substituto": substituto,
+        "tamanho":    os.path.getsize(arquivo_saida),
+        "linhas":     checkpoint["linhas"],
+    }
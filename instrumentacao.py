@@ -0,0 +1,245 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Instrumentação opcional das etapas (métricas por fase)
+=============================================================
+Objetivo:
+  Registrar, quando pedido, o custo de cada fase de uma etapa
+  (leitura, agregação, imputação, filtragem, escrita):
+    - tempo de relógio e tempo de CPU;
+    - linhas processadas e linhas por segundo;
+    - bytes lidos e gravados;
+    - pico de memória Python da fase (tracemalloc, opcional) e
+      pico de memória residente do processo (RSS).
+  As métricas são exportadas em JSON ou no formato texto do
+  Prometheus (node_exporter textfile collector).
+
+  Cada fase pode também rodar sob o cProfile, gravando
+  '<pasta>/<etapa>_<fase>.prof' (abrir com pstats ou snakeviz).
+
+Custo quando desativada:
+  fase() devolve um contexto nulo e envolver() devolve a própria
+  função, sem nenhuma medição.
+
+Uso:
+  metricas = Instrumentacao("etapa2", ativa=True)
+  with metricas.fase("leitura") as fase:
+      dados = ler_arquivo(nome)
+      fase["linhas"] = len(dados)
+  metricas.exportar("metricas.json")
+=============================================================
+"""
+
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource  # Opcional: indisponível no Windows
+except ImportError:
+    resource = None
+
+from escrita import arquivo_atomico
+
+FORMATOS = ("json", "prometheus")
+
+# Prefixo dos nomes de métricas no formato Prometheus
+PREFIXO_PROMETHEUS = "analise_financeira"
+
+# Métricas por fase exportadas no formato Prometheus: chave → (nome, ajuda)
+METRICAS_FASE = {
+    "tempo_parede":       ("fase_tempo_parede_segundos", "Tempo de relógio da fase."),
+    "tempo_cpu":          ("fase_tempo_cpu_segundos", "Tempo de CPU do processo na fase."),
+    "linhas":             ("fase_linhas", "Linhas processadas na fase."),
+    "linhas_por_segundo": ("fase_linhas_por_segundo", "Vazão da fase."),
+    "bytes_lidos":        ("fase_bytes_lidos", "Bytes lidos na fase."),
+    "bytes_gravados":     ("fase_bytes_gravados", "Bytes gravados na fase."),
+    "pico_tracemalloc":   ("fase_pico_memoria_python_bytes", "Pico de memória Python na fase."),
+}
+
+
+def bytes_do_arquivo(caminho: str) -> int:
+    """
+    Tamanho do arquivo em bytes, ou 0 se ele não existir.
+    """
+    try:
+        return os.path.getsize(caminho)
+    except OSError:
+        return 0
+
+
+def pico_rss() -> int:
+    """
+    Pico de memória residente do processo, em bytes (None se indisponível).
+    """
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KiB; macOS, em bytes
+    return pico if sys.platform == "darwin" else pico * 1024
+
+
+class Instrumentacao:
+    """
+    Coletor de métricas por fase de uma etapa. Desativado, não mede nada.
+    """
+
+    def __init__(self, etapa: str, ativa: bool = False, memoria: bool = False,
+                 pasta_perfil: str = None):
+        """
+        Parâmetros:
+            etapa        (str) : rótulo da etapa (ex.: "etapa2").
+            ativa        (bool): liga a coleta de métricas.
+            memoria      (bool): mede o pico de memória Python de cada
+                                 fase com tracemalloc (mais lento).
+            pasta_perfil (str) : se informada, roda cada fase sob o
+                                 cProfile e grava os .prof nesta pasta.
+        """
+        self.etapa = etapa
+        self.ativa = ativa
+        self.memoria = ativa and memoria
+        self.pasta_perfil = pasta_perfil if ativa else None
+        self.fases = []
+        self._inicio = time.perf_counter()
+
+        if self.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.pasta_perfil:
+            os.makedirs(self.pasta_perfil, exist_ok=True)
+
+    # ── Medição ──────────────────────────────────────────────
+
+    def fase(self, nome: str):
+        """
+        Contexto que mede uma fase. O dict devolvido pode receber
+        'linhas', 'bytes_lidos' e 'bytes_gravados' dentro do bloco.
+        """
+        if not self.ativa:
+            return contextlib.nullcontext({})
+        return self._medir_fase(nome)
+
+    @contextlib.contextmanager
+    def _medir_fase(self, nome: str):
+        registro = {"fase": nome, "linhas": 0, "bytes_lidos": 0, "bytes_gravados": 0}
+        perfil = cProfile.Profile() if self.pasta_perfil else None
+
+        if self.memoria:
+            tracemalloc.reset_peak()
+        inicio_parede = time.perf_counter()
+        inicio_cpu = time.process_time()
+        if perfil is not None:
+            perfil.enable()
+
+        try:
+            yield registro
+        finally:
+            if perfil is not None:
+                perfil.disable()
+            tempo_parede = time.perf_counter() - inicio_parede
+            registro["tempo_parede"] = tempo_parede
+            registro["tempo_cpu"] = time.process_time() - inicio_cpu
+            registro["linhas_por_segundo"] = (
+                registro["linhas"] / tempo_parede if tempo_parede > 0 else None
+            )
+            if self.memoria:
+                registro["pico_tracemalloc"] = tracemalloc.get_traced_memory()[1]
+            if perfil is not None:
+                caminho = os.path.join(self.pasta_perfil, f"{self.etapa}_{nome}.prof")
+                perfil.dump_stats(caminho)
+                registro["perfil"] = caminho
+            self.fases.append(registro)
+
+    def envolver(self, funcao, nome: str = None):
+        """
+        Gancho para medir (e perfilar) qualquer função de etapa.
+
+        Ativada, devolve uma função equivalente que roda dentro de
+        fase(nome); se o resultado tiver tamanho, ele é registrado
+        como 'linhas'. Desativada, devolve a própria função.
+        """
+        if not self.ativa:
+            return funcao
+
+        nome = nome or funcao.__name__
+
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with self.fase(nome) as registro:
+                resultado = funcao(*args, **kwargs)
+                if hasattr(resultado, "__len__"):
+                    registro["linhas"] = len(resultado)
+            return resultado
+
+        return envolvida
+
+    # ── Exportação ───────────────────────────────────────────
+
+    def resumo(self) -> dict:
+        """
+        Métricas coletadas até agora.
+
+        Retorna:
+            resumo (dict): 'etapa', 'tempo_total', 'pico_rss' e 'fases'.
+        """
+        return {
+            "etapa":       self.etapa,
+            "tempo_total": time.perf_counter() - self._inicio,
+            "pico_rss":    pico_rss(),
+            "fases":       self.fases,
+        }
+
+    def para_prometheus(self) -> str:
+        """
+        Métricas no formato texto de exposição do Prometheus.
+        """
+        resumo = self.resumo()
+        etapa = resumo["etapa"]
+        linhas = []
+
+        for chave, (nome, ajuda) in METRICAS_FASE.items():
+            amostras = [fase for fase in self.fases if fase.get(chave) is not None]
+            if not amostras:
+                continue
+            nome_completo = f"{PREFIXO_PROMETHEUS}_{nome}"
+            linhas.append(f"# HELP {nome_completo} {ajuda}")
+            linhas.append(f"# TYPE {nome_completo} gauge")
+            for fase in amostras:
+                linhas.append(f'{nome_completo}{{etapa="{etapa}",fase="{fase["fase"]}"}} {fase[chave]}')
+
+        globais = (
+            ("tempo_total_segundos", "Tempo total da etapa.", resumo["tempo_total"]),
+            ("pico_rss_bytes", "Pico de memória residente do processo.", resumo["pico_rss"]),
+        )
+        for nome, ajuda, valor in globais:
+            if valor is None:
+                continue
+            nome_completo = f"{PREFIXO_PROMETHEUS}_{nome}"
+            linhas.append(f"# HELP {nome_completo} {ajuda}")
+            linhas.append(f"# TYPE {nome_completo} gauge")
+            linhas.append(f'{nome_completo}{{etapa="{etapa}"}} {valor}')
+
+        return "\n".join(linhas) + "\n"
+
+    def exportar(self, nome_arquivo: str, formato: str = None) -> None:
+        """
+        Grava as métricas em JSON ou no formato Prometheus.
+        Sem 'formato', usa Prometheus para a extensão .prom e JSON
+        nos demais casos. A gravação é atômica (escrita.arquivo_atomico),
+        como espera o textfile collector.
+        """
+        if formato is None:
+            formato = "prometheus" if nome_arquivo.endswith(".prom") else "json"
+        if formato not in FORMATOS:
+            raise ValueError(f"formato de métricas desconhecido: {formato!r} (use um de {FORMATOS})")
+
+        if formato == "json":
+            conteudo = json.dumps(self.resumo(), indent=2) + "\n"
+        else:
+            conteudo = self.para_prometheus()
+        with arquivo_atomico(nome_arquivo) as arquivo:
+            arquivo.write(conteudo.encode("utf-8"))
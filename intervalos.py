@@ -0,0 +1,280 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Índice de intervalos: estatísticas de qualquer trecho em O(1)
+=============================================================
+Objetivo:
+  Responder, para qualquer intervalo de índices [inicio, fim)
+  de um vetor já carregado, sem percorrer o trecho:
+    - média, variância e desvio padrão (como na Etapa 3,
+      calcular_e_exibir_estatisticas(): exatos, iguais aos do
+      módulo statistics);
+    - mínimo e máximo;
+    - os agregados da Etapa 2 (apenas valores válidos, > 0):
+      contagem, inválidos, média, mínimo e máximo, com as mesmas
+      convenções de calcular_agregados() (0 e 0.0 sem válidos).
+
+Estruturas (construídas uma vez, em O(n) e O(n/B · log(n/B))):
+  - Somas acumuladas exatas de x, x², da contagem de válidos e
+    da soma dos válidos: soma(inicio..fim) = S[fim] − S[inicio].
+    Com NumPy, em int64 quando não há risco de estouro; senão,
+    em inteiros do Python.
+  - Tabela esparsa (sparse table) sobre os mínimos e máximos de
+    blocos de B valores: o trecho de blocos inteiros é coberto por
+    duas potências de 2 que se sobrepõem, em O(1). As pontas do
+    intervalo (menos de B valores de cada lado) são lidas direto.
+    Uma tabela por elemento usaria n·log n posições (dezenas de
+    GB para 50 milhões de valores); por blocos, cabe em memória.
+=============================================================
+"""
+
+from array import array
+from itertools import accumulate, chain
+
+from estatisticas_exatas import desvio_padrao_exato, media_exata, variancia_exata
+from vetor import MAXIMO_INT64, como_vetor
+
+try:
+    import numpy as np  # Opcional: construção vetorizada das somas e tabelas
+except ImportError:
+    np = None
+
+TAMANHO_BLOCO_INDICE = 64  # Valores por bloco da tabela esparsa
+
+
+# ─────────────────────────────────────────────────────────────
+# CONSTRUÇÃO
+# ─────────────────────────────────────────────────────────────
+
+def _tabela_esparsa(base, operacao) -> list:
+    """
+    Níveis da tabela esparsa: nivel[k][b] = operacao sobre os
+    blocos b .. b + 2^k − 1.
+    """
+    niveis = [base]
+    passo = 1
+    while 2 * passo <= len(base):
+        anterior = niveis[-1]
+        niveis.append(operacao(anterior[:-passo], anterior[passo:]))
+        passo = 2 * passo
+    return niveis
+
+
+def _acumulada_python(valores) -> list:
+    """
+    Somas acumuladas exatas (int do Python), com um zero à frente.
+    """
+    return list(accumulate(chain((0,), valores)))
+
+
+class IndiceIntervalos:
+    """
+    Vetor indexado para consultas de estatísticas por intervalo.
+    """
+
+    def __init__(self, valores, tamanho_bloco: int = TAMANHO_BLOCO_INDICE):
+        """
+        Parâmetros:
+            valores       (sequência): inteiros (list, array('q'), memoryview...).
+            tamanho_bloco (int)      : valores por bloco da tabela esparsa.
+        """
+        if tamanho_bloco < 1:
+            raise ValueError("o tamanho do bloco deve ser pelo menos 1")
+
+        self.valores = como_vetor(valores)
+        self.tamanho = len(self.valores)
+        self.tamanho_bloco = tamanho_bloco
+
+        if np is not None:
+            self._construir_numpy()
+        else:
+            self._construir_python()
+
+    def _construir_numpy(self) -> None:
+        vetor = np.frombuffer(self.valores, dtype=np.int64) if self.tamanho else np.zeros(0, np.int64)
+        validos = vetor > 0
+        validos_int = np.where(validos, vetor, 0)
+        maior_absoluto = max(abs(int(vetor.min())), abs(int(vetor.max()))) if self.tamanho else 0
+
+        # int64 só quando nenhuma soma parcial pode estourar
+        def cabe_em_int64(maior_termo):
+            return maior_termo * self.tamanho <= MAXIMO_INT64
+
+        def acumulada(x):
+            return np.concatenate(([0], np.cumsum(x, dtype=np.int64)))
+
+        self._contagem_validos = acumulada(validos.astype(np.int64))
+        if cabe_em_int64(maior_absoluto):
+            self._soma = acumulada(vetor)
+            self._soma_validos = acumulada(validos_int)
+        else:
+            self._soma = _acumulada_python(vetor.tolist())
+            self._soma_validos = _acumulada_python(validos_int.tolist())
+        if cabe_em_int64(maior_absoluto * maior_absoluto):
+            self._soma_quadrados = acumulada(vetor * vetor)
+        else:
+            self._soma_quadrados = _acumulada_python(x * x for x in vetor.tolist())
+
+        # Extremos por bloco completo (o bloco final incompleto é lido direto)
+        blocos = self.tamanho // self.tamanho_bloco
+        corte = blocos * self.tamanho_bloco
+        def por_bloco(x):
+            return x[:corte].reshape(blocos, self.tamanho_bloco)
+
+        minimos = por_bloco(vetor).min(axis=1, initial=MAXIMO_INT64)
+        maximos = por_bloco(vetor).max(axis=1, initial=-MAXIMO_INT64 - 1)
+        # Inválidos viram o neutro da operação (0 basta: válidos são > 0)
+        minimos_validos = por_bloco(np.where(validos, vetor, MAXIMO_INT64)).min(axis=1, initial=MAXIMO_INT64)
+        maximos_validos = por_bloco(validos_int).max(axis=1, initial=0)
+
+        self._tabelas = {
+            "minimo":         _tabela_esparsa(minimos, np.minimum),
+            "maximo":         _tabela_esparsa(maximos, np.maximum),
+            "minimo_validos": _tabela_esparsa(minimos_validos, np.minimum),
+            "maximo_validos": _tabela_esparsa(maximos_validos, np.maximum),
+        }
+
+    def _construir_python(self) -> None:
+        valores = self.valores
+        self._contagem_validos = _acumulada_python(1 if x > 0 else 0 for x in valores)
+        self._soma = _acumulada_python(valores)
+        self._soma_validos = _acumulada_python(x if x > 0 else 0 for x in valores)
+        self._soma_quadrados = _acumulada_python(x * x for x in valores)
+
+        def por_bloco(funcao):
+            b = self.tamanho_bloco
+            return array("q", (funcao(valores[inicio:inicio + b])
+                               for inicio in range(0, self.tamanho - b + 1, b)))
+
+        def em_python(operacao):
+            return lambda a, b: array("q", map(operacao, a, b))
+
+        self._tabelas = {
+            "minimo":         _tabela_esparsa(por_bloco(min), em_python(min)),
+            "maximo":         _tabela_esparsa(por_bloco(max), em_python(max)),
+            "minimo_validos": _tabela_esparsa(por_bloco(_minimo_validos), em_python(min)),
+            "maximo_validos": _tabela_esparsa(por_bloco(_maximo_validos), em_python(max)),
+        }
+
+    # ─────────────────────────────────────────────────────────
+    # CONSULTAS
+    # ─────────────────────────────────────────────────────────
+
+    def _verificar(self, inicio: int, fim: int) -> tuple:
+        if fim is None:
+            fim = self.tamanho
+        if not 0 <= inicio <= fim <= self.tamanho:
+            raise ValueError(f"intervalo [{inicio}, {fim}) fora de [0, {self.tamanho}]")
+        return inicio, fim
+
+    def _diferenca(self, acumulada, inicio: int, fim: int) -> int:
+        return int(acumulada[fim]) - int(acumulada[inicio])
+
+    def _extremos(self, inicio: int, fim: int, nomes) -> dict:
+        """
+        Extremos do intervalo: blocos inteiros pela tabela esparsa,
+        pontas (menos de um bloco de cada lado) lidas direto. As
+        pontas são recortadas uma só vez para todos os extremos.
+        """
+        b = self.tamanho_bloco
+        primeiro = -(-inicio // b)  # Primeiro bloco inteiro
+        ultimo = fim // b           # Bloco seguinte ao último inteiro
+
+        if primeiro >= ultimo:
+            trecho = self.valores[inicio:fim]
+            return {nome: EXTREMOS[nome][1](trecho) for nome in nomes}
+
+        pontas = []
+        if inicio < primeiro * b:
+            pontas.append(self.valores[inicio:primeiro * b])
+        if ultimo * b < fim:
+            pontas.append(self.valores[ultimo * b:fim])
+
+        k = (ultimo - primeiro).bit_length() - 1
+        direita = ultimo - (1 << k)
+        resultados = {}
+        for nome in nomes:
+            operacao, reduzir = EXTREMOS[nome]
+            nivel = self._tabelas[nome][k]
+            resultado = operacao(int(nivel[primeiro]), int(nivel[direita]))
+            for ponta in pontas:
+                resultado = operacao(resultado, reduzir(ponta))
+            resultados[nome] = resultado
+        return resultados
+
+    def estatisticas(self, inicio: int = 0, fim: int = None) -> dict:
+        """
+        Estatísticas do intervalo [inicio, fim) (fim=None: até o final).
+
+        Retorna:
+            estatisticas (dict): 'inicio', 'fim', 'contagem', 'media',
+                'variancia', 'desvio_padrao', 'minimo', 'maximo'
+                (None quando não definidos para o trecho) e 'validos'
+                (agregados da Etapa 2: 'contagem', 'invalidos',
+                'soma', 'media', 'minimo', 'maximo').
+
+        Levanta:
+            ValueError: intervalo fora do vetor.
+        """
+        inicio, fim = self._verificar(inicio, fim)
+        n = fim - inicio
+        soma = self._diferenca(self._soma, inicio, fim)
+        soma_quadrados = self._diferenca(self._soma_quadrados, inicio, fim)
+
+        validos = self._diferenca(self._contagem_validos, inicio, fim)
+        soma_validos = self._diferenca(self._soma_validos, inicio, fim)
+        if validos == n:
+            # Sem inválidos no trecho: os extremos válidos são os extremos
+            extremos = self._extremos(inicio, fim, ("minimo", "maximo")) if n >= 1 else {}
+            extremos["minimo_validos"] = extremos.get("minimo", 0)
+            extremos["maximo_validos"] = extremos.get("maximo", 0)
+        elif validos > 0:
+            extremos = self._extremos(inicio, fim, tuple(EXTREMOS))
+        else:
+            extremos = self._extremos(inicio, fim, ("minimo", "maximo"))
+            extremos["minimo_validos"] = extremos["maximo_validos"] = 0
+
+        return {
+            "inicio":        inicio,
+            "fim":           fim,
+            "contagem":      n,
+            "media":         media_exata(n, soma) if n >= 1 else None,
+            "variancia":     variancia_exata(n, soma, soma_quadrados) if n >= 2 else None,
+            "desvio_padrao": desvio_padrao_exato(n, soma, soma_quadrados) if n >= 2 else None,
+            "minimo":        extremos.get("minimo"),
+            "maximo":        extremos.get("maximo"),
+            "validos": {
+                "contagem":  validos,
+                "invalidos": n - validos,
+                "soma":      soma_validos,
+                "media":     soma_validos / validos if validos > 0 else 0.0,
+                "minimo":    extremos["minimo_validos"],
+                "maximo":    extremos["maximo_validos"],
+            },
+        }
+
+
+def _minimo_validos(trecho) -> int:
+    """
+    Menor valor > 0 do trecho (MAXIMO_INT64 se não houver).
+    """
+    menor = min(trecho, default=MAXIMO_INT64)
+    if menor > 0:
+        return menor  # Caso comum: nenhum inválido no trecho
+    return min(filter((0).__lt__, trecho), default=MAXIMO_INT64)
+
+
+def _maximo_validos(trecho) -> int:
+    """
+    Maior valor > 0 do trecho (0 se não houver).
+    """
+    return max(max(trecho, default=0), 0)
+
+
+# Operação que combina dois extremos e redução direta de um trecho
+EXTREMOS = {
+    "minimo":         (min, min),
+    "maximo":         (max, max),
+    "minimo_validos": (min, _minimo_validos),
+    "maximo_validos": (max, _maximo_validos),
+}
@@ -0,0 +1,347 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Estatísticas em janela móvel (monitoramento intradiário)
+=============================================================
+Objetivo:
+  Acompanhar média, desvio padrão, mínimo e máximo dos últimos
+  N registros à medida que eles chegam, e sinalizar outliers
+  pelo critério ±2σ da Etapa 4 aplicado à janela.
+
+Regras:
+  - Cada registro ocupa uma posição da janela, mas valores ≤ 0
+    são inválidos (regra da Etapa 2): não entram nas estatísticas
+    e nunca são sinalizados como outlier.
+  - No início, enquanto há menos de N registros, a janela contém
+    todos os registros vistos até ali.
+  - Um valor válido é outlier se estiver fora de
+    média ± fator·σ da janela que termina nele (como em
+    remover_outliers(), que inclui o próprio valor no cálculo).
+
+Custo por registro, O(1) amortizado (classe JanelaMovel):
+  - somas correntes inteiras (n, Σx, Σx²), exatas, para média
+    e variância: entra o valor novo, sai o que deixou a janela;
+  - deques monotônicos para mínimo e máximo: cada índice entra
+    e sai de cada deque no máximo uma vez.
+
+Variante em lote (estatisticas_janela), para arquivos inteiros:
+  com NumPy, somas acumuladas (cumsum) dão Σx e Σx² de todas as
+  janelas de uma vez, e mínimo/máximo saem do algoritmo de
+  van Herk/Gil-Werman (acumulados por blocos de N, em vetor).
+  Sem NumPy, ou se as somas puderem estourar int64, a própria
+  JanelaMovel percorre o vetor.
+
+Uso:
+  python3 janela_movel.py dados_acoes.txt --janela 20
+  python3 janela_movel.py dados_acoes.txt --janela 390 --saida janela.csv
+=============================================================
+"""
+
+import argparse
+import math
+from collections import deque
+
+from escrita import TAMANHO_LOTE_ESCRITA, arquivo_atomico
+from leitura import carregar_inteiros
+
+try:
+    import numpy as np  # Opcional: variante em lote vetorizada
+except ImportError:
+    np = None
+
+FATOR_OUTLIER = 2.0  # Mesmo critério de remover_outliers()
+
+_LIMITE_INT64 = 2 ** 63 - 1
+
+
+# ─────────────────────────────────────────────────────────────
+# JANELA MÓVEL COM ATUALIZAÇÃO O(1)
+# ─────────────────────────────────────────────────────────────
+
+def _variancia(n: int, soma: int, soma_quadrados: int) -> float:
+    """
+    Variância amostral a partir das somas inteiras exatas.
+    """
+    if n < 2:
+        return 0.0
+    return (n * soma_quadrados - soma * soma) / (n * (n - 1))
+
+
+class JanelaMovel:
+    """
+    Estatísticas dos últimos 'tamanho' registros, atualizadas em
+    O(1) amortizado a cada registro novo.
+    """
+
+    def __init__(self, tamanho: int, fator: float = FATOR_OUTLIER):
+        if tamanho < 1:
+            raise ValueError("o tamanho da janela deve ser pelo menos 1")
+
+        self.tamanho = tamanho
+        self.fator = fator
+        self.registros = 0     # Total de registros já vistos
+
+        self._janela = deque()  # Registros na janela (válidos e inválidos)
+        self._contagem = 0      # Válidos na janela
+        self._soma = 0
+        self._soma_quadrados = 0
+        self._minimos = deque()  # (índice, valor), valores crescentes
+        self._maximos = deque()  # (índice, valor), valores decrescentes
+
+    def adicionar(self, valor: int) -> dict:
+        """
+        Incorpora um registro e devolve as estatísticas da janela
+        que termina nele.
+
+        Retorna:
+            estatisticas (dict): 'contagem' (válidos na janela),
+                                 'media', 'desvio', 'minimo',
+                                 'maximo', 'valido' e 'outlier'.
+        """
+        indice = self.registros
+        self.registros = self.registros + 1
+
+        # 1. Registro que sai da janela
+        if len(self._janela) == self.tamanho:
+            antigo = self._janela.popleft()
+            if antigo > 0:
+                self._contagem = self._contagem - 1
+                self._soma = self._soma - antigo
+                self._soma_quadrados = self._soma_quadrados - antigo * antigo
+
+        inicio = indice - self.tamanho + 1
+        while self._minimos and self._minimos[0][0] < inicio:
+            self._minimos.popleft()
+        while self._maximos and self._maximos[0][0] < inicio:
+            self._maximos.popleft()
+
+        # 2. Registro que entra (apenas válidos entram nas estatísticas)
+        self._janela.append(valor)
+        valido = valor > 0
+        if valido:
+            self._contagem = self._contagem + 1
+            self._soma = self._soma + valor
+            self._soma_quadrados = self._soma_quadrados + valor * valor
+
+            while self._minimos and self._minimos[-1][1] >= valor:
+                self._minimos.pop()
+            self._minimos.append((indice, valor))
+            while self._maximos and self._maximos[-1][1] <= valor:
+                self._maximos.pop()
+            self._maximos.append((indice, valor))
+
+        # 3. Estatísticas da janela e sinalização de outlier
+        n = self._contagem
+        media = self._soma / n if n > 0 else 0.0
+        desvio = math.sqrt(_variancia(n, self._soma, self._soma_quadrados))
+        outlier = valido and abs(valor - media) > self.fator * desvio
+
+        return {
+            "contagem": n,
+            "media":    media,
+            "desvio":   desvio,
+            "minimo":   self._minimos[0][1] if self._minimos else None,
+            "maximo":   self._maximos[0][1] if self._maximos else None,
+            "valido":   valido,
+            "outlier":  outlier,
+        }
+
+
+# ─────────────────────────────────────────────────────────────
+# VARIANTE EM LOTE (ARQUIVO INTEIRO)
+# ─────────────────────────────────────────────────────────────
+
+def estatisticas_janela(valores, tamanho: int, fator: float = FATOR_OUTLIER) -> dict:
+    """
+    Estatísticas da janela móvel para todas as posições do vetor.
+
+    Parâmetros:
+        valores (sequência): inteiros, na ordem de chegada.
+        tamanho (int)      : registros por janela.
+        fator   (float)    : multiplicador de σ para outliers.
+
+    Retorna:
+        resultado (dict): 'contagem', 'media', 'desvio', 'minimo',
+                          'maximo' e 'outlier', um item por posição.
+                          Com NumPy são arrays (mínimo/máximo em
+                          float, NaN onde a janela não tem válidos);
+                          sem NumPy, listas (None no lugar de NaN).
+    """
+    if tamanho < 1:
+        raise ValueError("o tamanho da janela deve ser pelo menos 1")
+
+    if np is not None and len(valores) > 0:
+        vetor = np.asarray(valores, dtype=np.int64)
+        maior_absoluto = max(abs(int(vetor.max())), abs(int(vetor.min())), 1)
+        quadrado = maior_absoluto * maior_absoluto
+        # Σx² acumulada e n·Σx² de uma janela precisam caber em int64
+        if len(vetor) * quadrado <= _LIMITE_INT64 and tamanho * tamanho * quadrado <= _LIMITE_INT64:
+            return _estatisticas_janela_numpy(vetor, tamanho, fator)
+
+    return _estatisticas_janela_python(valores, tamanho, fator)
+
+
+def _estatisticas_janela_python(valores, tamanho: int, fator: float) -> dict:
+    """
+    Variante em lote sem NumPy: percorre o vetor com JanelaMovel.
+    """
+    janela = JanelaMovel(tamanho, fator)
+    resultado = {chave: [] for chave in ("contagem", "media", "desvio", "minimo", "maximo", "outlier")}
+
+    for valor in valores:
+        estatisticas = janela.adicionar(valor)
+        for chave, lista in resultado.items():
+            lista.append(estatisticas[chave])
+
+    return resultado
+
+
+def _janela_extremo(vetor, tamanho: int, operacao, neutro):
+    """
+    Mínimo (ou máximo) de todas as janelas pelo algoritmo de
+    van Herk/Gil-Werman: o vetor é dividido em blocos de 'tamanho';
+    cada janela é a junção de um sufixo de um bloco com um prefixo
+    do bloco seguinte, ambos obtidos com acumulados vetorizados.
+    """
+    n = len(vetor)
+    # Janelas iniciais (incompletas) recebem valores neutros à esquerda
+    preenchido = np.concatenate((np.full(tamanho - 1, neutro, dtype=vetor.dtype), vetor))
+    total = -(-len(preenchido) // tamanho) * tamanho
+    preenchido = np.concatenate((preenchido, np.full(total - len(preenchido), neutro, dtype=vetor.dtype)))
+
+    blocos = preenchido.reshape(-1, tamanho)
+    prefixos = operacao.accumulate(blocos, axis=1).ravel()
+    sufixos = operacao.accumulate(blocos[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    # Janela que termina na posição i do vetor: [i, i + tamanho) no preenchido
+    inicio = np.arange(n)
+    return operacao(sufixos[inicio], prefixos[inicio + tamanho - 1])
+
+
+def _estatisticas_janela_numpy(vetor, tamanho: int, fator: float) -> dict:
+    """
+    Variante em lote com NumPy: somas acumuladas para Σx e Σx²,
+    van Herk/Gil-Werman para mínimo e máximo.
+    """
+    n = len(vetor)
+    validos = vetor > 0
+    validos_int = np.where(validos, vetor, 0)
+
+    # Somas acumuladas com um zero à frente: soma(a..b) = S[b+1] − S[a]
+    def acumulada(x):
+        return np.concatenate(([0], np.cumsum(x, dtype=np.int64)))
+
+    fim = np.arange(1, n + 1)
+    inicio = np.maximum(fim - tamanho, 0)
+
+    s_contagem = acumulada(validos.astype(np.int64))
+    s_soma = acumulada(validos_int)
+    s_quadrados = acumulada(validos_int * validos_int)
+
+    contagem = s_contagem[fim] - s_contagem[inicio]
+    soma = s_soma[fim] - s_soma[inicio]
+    soma_quadrados = s_quadrados[fim] - s_quadrados[inicio]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        media = np.where(contagem > 0, soma / contagem, 0.0)
+        numerador = contagem * soma_quadrados - soma * soma
+        variancia = np.where(contagem >= 2, numerador / (contagem * (contagem - 1)), 0.0)
+    desvio = np.sqrt(np.maximum(variancia, 0.0))
+
+    maior = np.iinfo(np.int64).max
+    menor = np.iinfo(np.int64).min
+    minimo = _janela_extremo(np.where(validos, vetor, maior), tamanho, np.minimum, maior)
+    maximo = _janela_extremo(np.where(validos, vetor, menor), tamanho, np.maximum, menor)
+    sem_validos = contagem == 0
+    minimo = np.where(sem_validos, np.nan, minimo.astype(np.float64))
+    maximo = np.where(sem_validos, np.nan, maximo.astype(np.float64))
+
+    outlier = validos & (np.abs(vetor - media) > fator * desvio)
+
+    return {
+        "contagem": contagem,
+        "media":    media,
+        "desvio":   desvio,
+        "minimo":   minimo,
+        "maximo":   maximo,
+        "outlier":  outlier,
+    }
+
+
+def _formatar_extremo(valor) -> str:
+    """
+    Mínimo/máximo como inteiro; vazio se a janela não tem válidos.
+    """
+    if valor is None or valor != valor:  # None ou NaN
+        return ""
+    return str(int(valor))
+
+
+def salvar_janela(nome_arquivo: str, valores, resultado: dict) -> int:
+    """
+    Grava, em CSV, as estatísticas da janela de cada registro, em
+    lotes e de forma atômica (escrita.arquivo_atomico).
+    Retorna a quantidade de registros gravados.
+    """
+    total = len(valores)
+    with arquivo_atomico(nome_arquivo) as arquivo:
+        arquivo.write(b"registro,valor,contagem,media,desvio,minimo,maximo,outlier\n")
+        for inicio in range(0, total, TAMANHO_LOTE_ESCRITA):
+            fim = min(inicio + TAMANHO_LOTE_ESCRITA, total)
+            arquivo.write("".join(
+                f"{posicao + 1},{valores[posicao]},{resultado['contagem'][posicao]},"
+                f"{resultado['media'][posicao]:.4f},{resultado['desvio'][posicao]:.4f},"
+                f"{_formatar_extremo(resultado['minimo'][posicao])},"
+                f"{_formatar_extremo(resultado['maximo'][posicao])},"
+                f"{int(resultado['outlier'][posicao])}\n"
+                for posicao in range(inicio, fim)
+            ).encode("utf-8"))
+    return total
+
+
+# ─────────────────────────────────────────────────────────────
+# Ponto de entrada principal do programa
+# ─────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estatísticas em janela móvel")
+    parser.add_argument("arquivo", help="arquivo de inteiros (um por linha)")
+    parser.add_argument("--janela", type=int, default=20, help="registros por janela (padrão: 20)")
+    parser.add_argument("--fator", type=float, default=FATOR_OUTLIER,
+                        help=f"multiplicador de σ para outliers (padrão: {FATOR_OUTLIER})")
+    parser.add_argument("--saida", default=None,
+                        help="grava as estatísticas de cada posição em CSV")
+    argumentos = parser.parse_args()
+
+    if argumentos.janela < 1:
+        parser.error("--janela deve ser pelo menos 1")
+
+    try:
+        valores, invalidas = carregar_inteiros(argumentos.arquivo)
+    except FileNotFoundError:
+        print(f"✘ Arquivo '{argumentos.arquivo}' não encontrado.")
+        raise SystemExit(1)
+
+    for numero_linha, linha in invalidas:
+        print(f"  ✘ Linha {numero_linha} inválida ignorada: '{linha}'")
+
+    resultado = estatisticas_janela(valores, argumentos.janela, argumentos.fator)
+    total = len(valores)
+
+    print("=" * 60)
+    print(f"  JANELA MÓVEL ({argumentos.janela} registros)")
+    print("=" * 60)
+    print(f"  Registros      : {total}")
+    if total > 0:
+        outliers = [posicao for posicao in range(total) if resultado["outlier"][posicao]]
+        print(f"  Outliers (±{argumentos.fator:g}σ): {len(outliers)}")
+        if outliers:
+            print(f"  Primeiras posições: {[posicao + 1 for posicao in outliers[:10]]}")
+        print(f"  Última janela  : média {float(resultado['media'][-1]):.2f}, "
+              f"desvio {float(resultado['desvio'][-1]):.2f}, "
+              f"mínimo {_formatar_extremo(resultado['minimo'][-1]) or '-'}, "
+              f"máximo {_formatar_extremo(resultado['maximo'][-1]) or '-'}")
+    print("=" * 60)
+
+    if argumentos.saida:
+        salvar_janela(argumentos.saida, valores, resultado)
+        print(f"✔ Arquivo salvo: '{argumentos.saida}' ({total} registro(s)).")
@@ -0,0 +1,286 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Leitura rápida dos arquivos dados_*.txt
+=============================================================
+Objetivo:
+  Carregar arquivos com um número inteiro por linha mapeando-os
+  em memória (mmap) e convertendo blocos inteiros de linhas de
+  uma só vez para um buffer contíguo de int64 (array('q')),
+  em vez de chamar strip(), int() e append() linha a linha.
+
+Regras (iguais às de ler_arquivo() das Etapas 2 e 3):
+  - Linhas vazias são ignoradas.
+  - Linhas que não são inteiros, ou cujo valor não cabe em
+    int64, são ignoradas e reportadas, com o número da linha,
+    em uma lista separada.
+  - Artefatos no formato binário (formato_binario.py) são
+    reconhecidos pela assinatura e mapeados sem conversão.
+  - Arquivos texto comprimidos (gzip ou xz) são reconhecidos
+    pelos bytes mágicos e descomprimidos em fluxo, sem arquivo
+    temporário (descompressao.py).
+
+Arquivos grandes (carregar_inteiros()):
+  A partir de LIMIAR_PARALELO bytes, o arquivo texto é dividido
+  em trechos de bytes que terminam em quebra de linha, convertidos
+  em paralelo por um pool de processos (cada processo mapeia o
+  mesmo arquivo e converte só o seu trecho). Threads não ajudariam:
+  a conversão int() segura o GIL. Os trechos são juntados na
+  ordem original, e as linhas inválidas recebem o número global,
+  somando as linhas dos trechos anteriores.
+=============================================================
+"""
+
+import mmap
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from descompressao import detectar_compressao, iterar_descomprimido
+from formato_binario import ASSINATURA, carregar_binario
+
+# Quantidade aproximada de bytes convertidos por bloco
+TAMANHO_BLOCO = 1 << 22  # 4 MiB
+
+# Conversão em paralelo: abaixo deste tamanho, iniciar processos não compensa
+LIMIAR_PARALELO = 1 << 26  # 64 MiB
+TRECHOS_POR_TRABALHADOR = 4  # Trechos menores equilibram a carga entre processos
+
+
+def carregar_inteiros(nome_arquivo: str, trabalhadores: int = None) -> tuple:
+    """
+    Lê um arquivo texto de inteiros (um por linha) via mmap.
+
+    Parâmetros:
+        nome_arquivo  (str): caminho do arquivo a ser lido.
+        trabalhadores (int): processos usados na conversão de arquivos
+                             texto com LIMIAR_PARALELO bytes ou mais
+                             (padrão: número de CPUs; 1 desativa).
+
+    Retorna:
+        (valores, invalidas) (tuple):
+            valores   (array): buffer contíguo de int64 (typecode 'q');
+                               para artefatos binários, uma memoryview
+                               de int64 sobre o arquivo mapeado.
+            invalidas (list) : pares (numero_linha, conteudo) das
+                               linhas não numéricas ou fora do int64,
+                               numeradas a partir de 1.
+    """
+    invalidas = []
+
+    with open(nome_arquivo, "rb") as arquivo:
+        if arquivo.read(len(ASSINATURA)) == ASSINATURA:
+            return carregar_binario(nome_arquivo), invalidas
+
+    trabalhadores = trabalhadores or os.cpu_count() or 1
+    if (trabalhadores > 1 and os.path.getsize(nome_arquivo) >= LIMIAR_PARALELO
+            and detectar_compressao(nome_arquivo) is None):
+        return _carregar_paralelo(nome_arquivo, trabalhadores, invalidas), invalidas
+
+    valores = array("q")
+    for bloco in iterar_blocos(nome_arquivo, invalidas):
+        valores.extend(bloco)
+
+    return valores, invalidas
+
+
+# ─────────────────────────────────────────────────────────────
+# CONVERSÃO EM PARALELO
+# ─────────────────────────────────────────────────────────────
+
+def dividir_em_trechos(dados, partes: int) -> list:
+    """
+    Divide dados (bytes ou mmap) em até 'partes' trechos de tamanho
+    parecido, cada um terminando logo após uma quebra de linha
+    (exceto o último).
+
+    Retorna:
+        trechos (list): pares (inicio, fim) de posições em bytes.
+    """
+    tamanho = len(dados)
+    passo = max(tamanho // max(partes, 1), 1)
+    cortes = [0]
+    while cortes[-1] < tamanho:
+        alvo = cortes[-1] + passo
+        quebra = dados.find(b"\n", alvo - 1) if alvo < tamanho else -1
+        cortes.append(tamanho if quebra == -1 else quebra + 1)
+    return list(zip(cortes, cortes[1:]))
+
+
+def _converter_trecho_arquivo(nome_arquivo: str, inicio: int, fim: int) -> tuple:
+    """
+    Tarefa dos processos: converte o trecho [inicio, fim) do arquivo,
+    com linhas numeradas a partir de 1 dentro do trecho.
+
+    Retorna:
+        (valores, invalidas, linhas) (tuple): array('q'), pares
+        (numero_linha, conteudo) e quantidade de linhas do trecho.
+    """
+    valores = array("q")
+    invalidas = []
+    with open(nome_arquivo, "rb") as arquivo:
+        with mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            conversor = _converter_trecho(mapa, fim, 1, invalidas, inicio)
+            try:
+                while True:
+                    valores.extend(next(conversor))
+            except StopIteration as final:
+                return valores, invalidas, final.value - 1
+
+
+def _carregar_paralelo(nome_arquivo: str, trabalhadores: int, invalidas: list) -> array:
+    """
+    carregar_inteiros() com os trechos do arquivo convertidos em
+    paralelo e juntados na ordem original.
+    """
+    with open(nome_arquivo, "rb") as arquivo:
+        with mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            trechos = dividir_em_trechos(mapa, trabalhadores * TRECHOS_POR_TRABALHADOR)
+
+    valores = array("q")
+    proxima_linha = 1
+    with ProcessPoolExecutor(max_workers=trabalhadores) as executor:
+        futuros = [executor.submit(_converter_trecho_arquivo, nome_arquivo, inicio, fim)
+                   for inicio, fim in trechos]
+        for futuro in futuros:
+            parte, invalidas_trecho, linhas = futuro.result()
+            valores.extend(parte)
+            # Número local (a partir de 1) → número global da linha
+            invalidas.extend((proxima_linha - 1 + numero, conteudo)
+                             for numero, conteudo in invalidas_trecho)
+            proxima_linha = proxima_linha + linhas
+
+    return valores
+
+
+def iterar_blocos(nome_arquivo: str, invalidas: list = None):
+    """
+    Percorre o arquivo em blocos, sem manter o vetor inteiro em memória.
+    Aceita arquivos texto (comprimidos ou não) e artefatos binários.
+
+    Parâmetros:
+        nome_arquivo (str) : caminho do arquivo a ser lido.
+        invalidas    (list): se informada, recebe os pares
+                             (numero_linha, conteudo) das linhas inválidas.
+
+    Produz:
+        bloco (array ou memoryview): inteiros de um trecho do arquivo.
+    """
+    if invalidas is None:
+        invalidas = []
+
+    compressao = detectar_compressao(nome_arquivo)
+    if compressao is not None:
+        yield from iterar_blocos_pedacos(iterar_descomprimido(nome_arquivo, compressao), invalidas)
+        return
+
+    with open(nome_arquivo, "rb") as arquivo:
+        if arquivo.read(len(ASSINATURA)) == ASSINATURA:
+            binario = True
+        else:
+            binario = False
+            try:
+                mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Arquivos vazios não podem ser mapeados
+                return
+
+    if binario:
+        valores = carregar_binario(nome_arquivo)
+        passo = TAMANHO_BLOCO // 8
+        for inicio in range(0, len(valores), passo):
+            yield valores[inicio:inicio + passo]
+        return
+
+    with mapa:
+        yield from _converter_trecho(mapa, len(mapa), 1, invalidas)
+
+
+def iterar_blocos_pedacos(pedacos, invalidas: list = None):
+    """
+    Como iterar_blocos(), mas a partir de pedaços de texto (bytes)
+    que podem cortar linhas ao meio, como os de um descompressor.
+    Os pedaços são acumulados até formar blocos de TAMANHO_BLOCO.
+    """
+    if invalidas is None:
+        invalidas = []
+
+    pendentes = []
+    acumulado = 0
+    proxima_linha = 1
+
+    for pedaco in pedacos:
+        pendentes.append(pedaco)
+        acumulado = acumulado + len(pedaco)
+        if acumulado < TAMANHO_BLOCO:
+            continue
+
+        dados = b"".join(pendentes)
+        corte = dados.rfind(b"\n") + 1  # Só linhas completas
+        proxima_linha = yield from _converter_trecho(dados, corte, proxima_linha, invalidas)
+        pendentes = [dados[corte:]]
+        acumulado = len(pendentes[0])
+
+    dados = b"".join(pendentes)
+    yield from _converter_trecho(dados, len(dados), proxima_linha, invalidas)
+
+
+def _converter_trecho(dados, tamanho: int, proxima_linha: int, invalidas: list, inicio: int = 0):
+    """
+    Converte dados[inicio:tamanho] em blocos terminados em quebra de
+    linha e retorna (via StopIteration) o número da linha seguinte.
+    """
+    while inicio < tamanho:
+        # Cada bloco termina em uma quebra de linha (ou no fim do trecho)
+        fim = dados.find(b"\n", min(inicio + TAMANHO_BLOCO, tamanho) - 1, tamanho)
+        if fim == -1:
+            fim = tamanho
+
+        linhas = dados[inicio:fim].split(b"\n")
+        yield converter_linhas(linhas, proxima_linha, invalidas)
+
+        proxima_linha = proxima_linha + len(linhas)
+        inicio = fim + 1
+
+    return proxima_linha
+
+
+def converter_linhas(linhas: list, primeira_linha: int, invalidas: list) -> array:
+    """
+    Converte um bloco de linhas (bytes) em array('q'). O caminho
+    rápido converte o bloco inteiro em C; se houver qualquer linha
+    vazia, inválida ou fora do int64, o bloco é refeito linha a
+    linha para reportar cada caso corretamente. Valores fora do
+    int64 são tratados como linhas inválidas: reportados em
+    'invalidas' e ignorados, sem descartar o restante do arquivo.
+    """
+    try:
+        return array("q", map(int, linhas))
+    except (ValueError, OverflowError):
+        pass
+
+    bloco = array("q")
+    for deslocamento, linha in enumerate(linhas):
+        if not linha.strip():
+            continue  # Ignora linhas vazias
+
+        try:
+            numero = int(linha)
+        except ValueError:
+            # Mesmo comportamento de int(str): aceita dígitos Unicode
+            texto = linha.decode("utf-8", errors="replace").strip()
+            if not texto:
+                continue
+            try:
+                numero = int(texto)
+            except ValueError:
+                invalidas.append((primeira_linha + deslocamento, texto))
+                continue
+
+        try:
+            bloco.append(numero)
+        except OverflowError:
+            invalidas.append((primeira_linha + deslocamento,
+                              linha.decode("utf-8", errors="replace").strip()))
+
+    return bloco
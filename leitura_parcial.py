@@ -0,0 +1,287 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Leitura parcial: primeiros, últimos, maiores e menores
+=============================================================
+Objetivo:
+  Espiar um arquivo de dados sem carregá-lo inteiro:
+    - primeiros N: lê do início, em pedaços pequenos, e para
+      assim que encontra N valores;
+    - últimos N  : lê blocos de trás para frente a partir do fim
+      do arquivo (seek), até juntar N valores;
+    - maiores/menores k: uma única passada em blocos, guardando
+      só os k candidatos (heap limitado, ou numpy.partition por
+      bloco quando o NumPy está disponível).
+
+  Valem as regras de leitura.py: linhas vazias, inválidas e com
+  valores fora do int64 são ignoradas.
+  Arquivos binários (.bin) são acessados diretamente pelo
+  índice; arquivos comprimidos não permitem seek, então os
+  últimos N exigem uma passada de descompressão, mas só os
+  últimos pedaços descomprimidos são guardados e convertidos.
+
+Uso:
+  python3 leitura_parcial.py dados_acoes.txt --primeiros 5 --ultimos 5
+  python3 leitura_parcial.py extrato.txt.gz --maiores 10 --menores 10
+=============================================================
+"""
+
+import argparse
+import heapq
+import io
+import itertools
+from collections import deque
+
+from descompressao import detectar_compressao, iterar_descomprimido
+from formato_binario import carregar_binario, eh_binario
+from leitura import iterar_blocos
+from vetor import verificar_int64
+
+try:
+    import numpy as np  # Opcional: seleção dos k extremos de cada bloco em C
+except ImportError:
+    np = None
+
+QUANTIDADE_PADRAO = 5
+PASSO_LEITURA = 1 << 16  # Bytes lidos por vez (do início ou do fim)
+
+
+# ─────────────────────────────────────────────────────────────
+# PRIMEIROS E ÚLTIMOS
+# ─────────────────────────────────────────────────────────────
+
+def ler_primeiros(nome_arquivo: str, quantidade: int = QUANTIDADE_PADRAO) -> list:
+    """
+    Primeiros 'quantidade' valores do arquivo, sem ler o restante.
+
+    Retorna:
+        primeiros (list): até 'quantidade' inteiros, na ordem do arquivo.
+    """
+    primeiros = []
+    if quantidade <= 0:
+        return primeiros
+
+    if eh_binario(nome_arquivo):
+        return list(carregar_binario(nome_arquivo, verificar=False)[:quantidade])
+
+    compressao = detectar_compressao(nome_arquivo)
+    with open(nome_arquivo, "rb") as arquivo:
+        if compressao is None:
+            pedacos = iter(lambda: arquivo.read(PASSO_LEITURA), b"")
+        else:
+            pedacos = iterar_descomprimido(nome_arquivo, compressao)
+        try:
+            for linha in _linhas_do_inicio(pedacos):
+                valor = _converter_linha(linha)
+                if valor is not None:
+                    primeiros.append(valor)
+                    if len(primeiros) == quantidade:
+                        break
+        finally:
+            if compressao is not None:
+                pedacos.close()  # Encerra a descompressão no meio
+
+    return primeiros
+
+
+def ler_ultimos(nome_arquivo: str, quantidade: int = QUANTIDADE_PADRAO) -> list:
+    """
+    Últimos 'quantidade' valores do arquivo. Em texto puro, lê de
+    trás para frente a partir do fim; no binário, acessa o fim
+    direto; comprimido, descomprime tudo guardando só o final.
+
+    Retorna:
+        ultimos (list): até 'quantidade' inteiros, na ordem do arquivo.
+    """
+    if quantidade <= 0:
+        return []
+
+    if eh_binario(nome_arquivo):
+        valores = carregar_binario(nome_arquivo, verificar=False)
+        return list(valores[max(0, len(valores) - quantidade):])
+
+    compressao = detectar_compressao(nome_arquivo)
+    if compressao is not None:
+        return _ultimos_comprimido(nome_arquivo, compressao, quantidade)
+
+    with open(nome_arquivo, "rb") as arquivo:
+        return _coletar_do_fim(_linhas_do_fim(arquivo), quantidade)
+
+
+def _ultimos_comprimido(nome_arquivo: str, compressao: str, quantidade: int) -> list:
+    """
+    Guarda apenas os últimos pedaços descomprimidos que somam mais
+    de 'quantidade' quebras de linha e converte só esse final.
+    """
+    retidos = deque()
+    quebras = 0
+    descartou = False
+
+    for pedaco in iterar_descomprimido(nome_arquivo, compressao):
+        retidos.append(pedaco)
+        quebras = quebras + pedaco.count(b"\n")
+        while len(retidos) > 1 and quebras - retidos[0].count(b"\n") > quantidade:
+            quebras = quebras - retidos.popleft().count(b"\n")
+            descartou = True
+
+    linhas = _linhas_do_fim(io.BytesIO(b"".join(retidos)))
+    if descartou:
+        # A primeira linha retida pode estar cortada: não é usada
+        ultimos = _coletar_do_fim(itertools.islice(linhas, quebras), quantidade)
+        if len(ultimos) < quantidade:
+            # Linhas vazias/inválidas no final: recorre à passada completa
+            valores = deque(maxlen=quantidade)
+            for bloco in iterar_blocos(nome_arquivo):
+                valores.extend(bloco[-quantidade:])
+            return list(valores)
+        return ultimos
+
+    return _coletar_do_fim(linhas, quantidade)
+
+
+def _coletar_do_fim(linhas, quantidade: int) -> list:
+    """
+    Converte linhas vindas de trás para frente até juntar
+    'quantidade' valores; devolve-os na ordem do arquivo.
+    """
+    ultimos = []
+    for linha in linhas:
+        valor = _converter_linha(linha)
+        if valor is not None:
+            ultimos.append(valor)
+            if len(ultimos) == quantidade:
+                break
+
+    ultimos.reverse()
+    return ultimos
+
+
+def _linhas_do_inicio(pedacos):
+    """
+    Produz as linhas a partir de pedaços de bytes que podem
+    cortar linhas ao meio.
+    """
+    resto = b""
+    for pedaco in pedacos:
+        linhas = (resto + pedaco).split(b"\n")
+        resto = linhas.pop()
+        yield from linhas
+    yield resto
+
+
+def _linhas_do_fim(arquivo):
+    """
+    Produz as linhas do arquivo da última para a primeira, lendo
+    blocos de PASSO_LEITURA bytes a partir do fim.
+    """
+    posicao = arquivo.seek(0, 2)
+    resto = b""  # Começo de linha ainda incompleto (continua no bloco anterior)
+
+    while posicao > 0:
+        inicio = max(0, posicao - PASSO_LEITURA)
+        arquivo.seek(inicio)
+        linhas = (arquivo.read(posicao - inicio) + resto).split(b"\n")
+        resto = linhas[0]
+        for linha in reversed(linhas[1:]):
+            yield linha
+        posicao = inicio
+
+    yield resto
+
+
+def _converter_linha(linha: bytes):
+    """
+    Inteiro da linha, ou None se ela for vazia, inválida ou fora
+    do int64 (mesmas regras de leitura.converter_linhas()).
+    """
+    if not linha.strip():
+        return None
+    try:
+        valor = int(linha)
+    except ValueError:
+        try:
+            valor = int(linha.decode("utf-8", errors="replace").strip())
+        except ValueError:
+            return None
+    try:
+        return verificar_int64(valor)
+    except OverflowError:
+        return None
+
+
+# ─────────────────────────────────────────────────────────────
+# MAIORES E MENORES (top-k)
+# ─────────────────────────────────────────────────────────────
+
+def ler_maiores(nome_arquivo: str, k: int = QUANTIDADE_PADRAO) -> list:
+    """
+    Os k maiores valores do arquivo, em ordem decrescente, em uma
+    única passada com memória proporcional a k.
+    """
+    return _extremos(nome_arquivo, k, maiores=True)
+
+
+def ler_menores(nome_arquivo: str, k: int = QUANTIDADE_PADRAO) -> list:
+    """
+    Os k menores valores do arquivo, em ordem crescente, em uma
+    única passada com memória proporcional a k.
+    """
+    return _extremos(nome_arquivo, k, maiores=False)
+
+
+def _extremos(nome_arquivo: str, k: int, maiores: bool) -> list:
+    if k <= 0:
+        return []
+
+    selecionar = heapq.nlargest if maiores else heapq.nsmallest
+    candidatos = []
+
+    for bloco in iterar_blocos(nome_arquivo):
+        if np is not None and len(bloco) > k:
+            # Reduz o bloco aos seus k extremos antes de combinar
+            vetor = np.frombuffer(bloco, dtype=np.int64)
+            vetor = np.partition(vetor, -k)[-k:] if maiores else np.partition(vetor, k - 1)[:k]
+            bloco = vetor.tolist()
+        candidatos = selecionar(k, itertools.chain(candidatos, bloco))
+
+    return candidatos
+
+
+# ─────────────────────────────────────────────────────────────
+# Ponto de entrada principal do programa
+# ─────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Leitura parcial de um arquivo de dados")
+    parser.add_argument("arquivo", help="arquivo de dados (texto, .gz/.xz ou .bin)")
+    parser.add_argument("--primeiros", type=int, default=None, metavar="N",
+                        help="exibe os N primeiros valores")
+    parser.add_argument("--ultimos", type=int, default=None, metavar="N",
+                        help="exibe os N últimos valores")
+    parser.add_argument("--maiores", type=int, default=None, metavar="K",
+                        help="exibe os K maiores valores (uma passada pelo arquivo)")
+    parser.add_argument("--menores", type=int, default=None, metavar="K",
+                        help="exibe os K menores valores (uma passada pelo arquivo)")
+    argumentos = parser.parse_args()
+
+    consultas = (
+        ("Primeiros", argumentos.primeiros, ler_primeiros),
+        ("Últimos",   argumentos.ultimos,   ler_ultimos),
+        ("Maiores",   argumentos.maiores,   ler_maiores),
+        ("Menores",   argumentos.menores,   ler_menores),
+    )
+    if all(quantidade is None for _, quantidade, _ in consultas):
+        # Sem opções: os 5 primeiros e os 5 últimos
+        consultas = (
+            ("Primeiros", QUANTIDADE_PADRAO, ler_primeiros),
+            ("Últimos",   QUANTIDADE_PADRAO, ler_ultimos),
+        )
+
+    try:
+        for rotulo, quantidade, funcao in consultas:
+            if quantidade is not None:
+                valores = funcao(argumentos.arquivo, quantidade)
+                print(f"  {rotulo + ' ' + str(quantidade):<14}: {valores}")
+    except FileNotFoundError:
+        print(f"✘ Arquivo '{argumentos.arquivo}' não encontrado.")
+    except (ValueError, OverflowError) as erro:
+        print(f"✘ {erro}")
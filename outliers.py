@@ -0,0 +1,239 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Motor de remoção de outliers (vetorizado e robusto)
+=============================================================
+Objetivo:
+  Generalizar a Etapa 4 (±2σ) com critérios adicionais e sem
+  imprimir nada por valor. Os limites são calculados, uma máscara
+  booleana é construída de uma só vez (NumPy, se instalado, ou
+  compreensão de lista) e os valores mantidos são extraídos.
+
+Modos:
+  - "sigma"           : média ± fator·σ, uma única vez (critério da Etapa 4).
+  - "sigma-iterativo" : repete o corte ±fator·σ sobre os valores mantidos
+                        até nenhum valor novo ser removido (sigma-clipping).
+  - "mad"             : mediana ± fator·1,4826·MAD, em que
+                        MAD = mediana(|x − mediana|).
+  - "iqr"             : cercas de Tukey [Q1 − fator·IQR, Q3 + fator·IQR].
+
+  Mediana, MAD e quartis são obtidos por seleção em tempo linear
+  (quantis.py), sem ordenar o vetor. Um único valor absurdo (erro
+  de digitação) infla o σ; MAD e IQR não são afetados por ele.
+
+  Se mais da metade dos valores for igual à mediana, MAD (ou IQR)
+  vale zero e os limites colapsariam no centro, removendo qualquer
+  valor diferente dele. Nesse caso a escala passa a ser o desvio
+  médio absoluto em torno da mediana, convertido para a mesma
+  escala do modo; a troca fica registrada na iteração
+  ('escala_substituta').
+=============================================================
+"""
+
+import math
+from itertools import compress
+
+from estatisticas_exatas import calcular_somas, desvio_padrao_exato
+from quantis import mediana, quantis
+from vetor import como_vetor, criar_vetor, vetor_vazio
+
+try:
+    import numpy as np  # Opcional: máscara vetorizada
+except ImportError:
+    np = None
+
+MODOS = ("sigma", "sigma-iterativo", "mad", "iqr")
+
+# Fator padrão de cada modo
+FATORES_PADRAO = {
+    "sigma":           2.0,
+    "sigma-iterativo": 2.0,
+    "mad":             3.5,
+    "iqr":             1.5,
+}
+
+# Constante que torna o MAD comparável ao σ em dados normais
+ESCALA_MAD = 1.4826
+
+# Idem para o desvio médio absoluto (√(π/2)), usado quando o MAD é zero
+ESCALA_DESVIO_MEDIO = math.sqrt(math.pi / 2)
+
+# IQR de uma normal, em σ: converte a escala substituta para o modo "iqr"
+IQR_POR_SIGMA = 1.3490
+
+MAXIMO_ITERACOES = 50
+
+
+def _media_desvio(valores) -> tuple:
+    """
+    Média e desvio padrão amostral a partir das somas exatas.
+    """
+    n, soma, soma_quadrados = calcular_somas(valores)
+    if n == 0:
+        return 0.0, 0.0
+    desvio = desvio_padrao_exato(n, soma, soma_quadrados) if n >= 2 else 0.0
+    return soma / n, desvio
+
+
+def _desvios_absolutos(valores, centro: float):
+    """
+    |x − centro| de cada valor (vetor NumPy ou lista).
+    """
+    if np is not None:
+        return np.abs(np.asarray(valores, dtype=np.float64) - centro)
+    return [abs(valor - centro) for valor in valores]
+
+
+def _desvio_medio(desvios) -> float:
+    """
+    Média dos desvios absolutos, na escala do σ (dados normais).
+    """
+    if np is not None:
+        media = float(np.mean(desvios))
+    else:
+        media = sum(desvios) / len(desvios)
+    return ESCALA_DESVIO_MEDIO * media
+
+
+def _limites(valores, modo: str, fator: float) -> tuple:
+    """
+    Calcula (limite_inferior, limite_superior, centro, escala,
+    escala_substituta) de um modo. 'escala_substituta' é
+    "desvio_medio" quando MAD ou IQR valem zero e foram trocados
+    pelo desvio médio absoluto; senão, None.
+    """
+    if modo in ("sigma", "sigma-iterativo"):
+        centro, escala = _media_desvio(valores)
+        return centro - fator * escala, centro + fator * escala, centro, escala, None
+
+    if modo == "mad":
+        centro = mediana(valores)
+        desvios = _desvios_absolutos(valores, centro)
+        escala = ESCALA_MAD * mediana(desvios)
+        substituta = None
+        if escala == 0:
+            escala = _desvio_medio(desvios)
+            substituta = "desvio_medio"
+        return centro - fator * escala, centro + fator * escala, centro, escala, substituta
+
+    if modo == "iqr":
+        quartis = quantis(valores, (0.25, 0.75))
+        q1, q3 = quartis[0.25], quartis[0.75]
+        iqr = q3 - q1
+        substituta = None
+        if iqr == 0:
+            iqr = IQR_POR_SIGMA * _desvio_medio(_desvios_absolutos(valores, mediana(valores)))
+            substituta = "desvio_medio"
+        return q1 - fator * iqr, q3 + fator * iqr, (q1 + q3) / 2, iqr, substituta
+
+    raise ValueError(f"modo de outliers desconhecido: {modo!r} (use um de {MODOS})")
+
+
+def _mascara(vetor, inferior: float, superior: float):
+    """
+    Máscara booleana dos valores DENTRO de [inferior, superior].
+    """
+    if np is not None:
+        return (vetor >= inferior) & (vetor <= superior)
+    return [inferior <= valor <= superior for valor in vetor]
+
+
+def _intersecao(mascara_a, mascara_b):
+    """
+    E lógico elemento a elemento entre duas máscaras.
+    """
+    if np is not None:
+        return mascara_a & mascara_b
+    return [a and b for a, b in zip(mascara_a, mascara_b)]
+
+
+def _contar(mascara) -> int:
+    """
+    Quantidade de posições verdadeiras da máscara.
+    """
+    if np is not None:
+        return int(mascara.sum())
+    return sum(mascara)
+
+
+def _filtrar(vetor, mascara):
+    """
+    Valores do vetor nas posições verdadeiras da máscara.
+    """
+    if np is not None:
+        return vetor[mascara]
+    return criar_vetor(compress(vetor, mascara))
+
+
+def detectar_outliers(valores, modo: str = "sigma", fator: float = None,
+                      maximo_iteracoes: int = MAXIMO_ITERACOES) -> dict:
+    """
+    Identifica e remove outliers segundo o modo escolhido.
+
+    Parâmetros:
+        valores          (sequência): inteiros a analisar.
+        modo             (str)      : um de MODOS (padrão: "sigma").
+        fator            (float)    : multiplicador dos limites
+                                      (padrão: FATORES_PADRAO[modo]).
+        maximo_iteracoes (int)      : limite do modo "sigma-iterativo".
+
+    Retorna:
+        resultado (dict):
+            'mantidos'          (array): valores dentro dos limites, na ordem
+                                         original (vetor int64, ver vetor.py).
+            'indices_removidos' (list): posições (a partir de 0) dos outliers.
+            'iteracoes'         (list): por iteração, um dict com
+                                        'limite_inferior', 'limite_superior',
+                                        'centro', 'escala', 'escala_substituta'
+                                        (None, ou "desvio_medio" se MAD/IQR
+                                        era zero) e 'removidos' (removidos
+                                        naquela iteração).
+    """
+    if modo not in MODOS:
+        raise ValueError(f"modo de outliers desconhecido: {modo!r} (use um de {MODOS})")
+    if fator is None:
+        fator = FATORES_PADRAO[modo]
+
+    vetor = np.asarray(valores, dtype=np.int64) if np is not None else como_vetor(valores)
+    n = len(vetor)
+    if n == 0:
+        return {"mantidos": vetor_vazio(), "indices_removidos": [], "iteracoes": []}
+
+    iteracoes = []
+    mascara = _mascara(vetor, float("-inf"), float("inf"))  # Todos mantidos
+    atuais = vetor  # Valores usados para estimar os limites
+
+    while True:
+        inferior, superior, centro, escala, substituta = _limites(atuais, modo, fator)
+        nova_mascara = _intersecao(mascara, _mascara(vetor, inferior, superior))
+        removidos = _contar(mascara) - _contar(nova_mascara)
+        mascara = nova_mascara
+
+        iteracoes.append({
+            "limite_inferior":   inferior,
+            "limite_superior":   superior,
+            "centro":            centro,
+            "escala":            escala,
+            "escala_substituta": substituta,
+            "removidos":         removidos,
+        })
+
+        # Sigma-clipping: repete sobre os mantidos até não remover mais nada
+        if modo != "sigma-iterativo" or removidos == 0:
+            break
+        if len(iteracoes) >= maximo_iteracoes or _contar(mascara) < 2:
+            break
+        atuais = _filtrar(vetor, mascara)
+
+    if np is not None:
+        mantidos = criar_vetor(_filtrar(vetor, mascara))
+        indices_removidos = np.flatnonzero(~mascara).tolist()
+    else:
+        mantidos = _filtrar(vetor, mascara)
+        indices_removidos = [indice for indice, dentro in enumerate(mascara) if not dentro]
+
+    return {
+        "mantidos":          mantidos,
+        "indices_removidos": indices_removidos,
+        "iteracoes":         iteracoes,
+    }
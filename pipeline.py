@@ -0,0 +1,518 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Execução das etapas em um único processo (DAG com cache)
+=============================================================
+Objetivo:
+  Rodar as etapas como um grafo de dependências em um único
+  processo, em vez de três programas em sequência que gravam,
+  releem e reconvertem o arquivo texto da etapa anterior:
+
+      coleta ──► processamento ──┬──► estatisticas
+                                 └──► outliers
+
+    coleta        : lê o arquivo bruto (dados_acoes.txt)
+    processamento : Etapa 2 – substitui inválidos pela média
+    estatisticas  : Etapa 3 – média, mediana, quantis, desvio...
+    outliers      : Etapa 4 – remoção de outliers (modo/fator)
+
+  O vetor de cada etapa é entregue à seguinte em memória.
+
+Cache (memoização):
+  O resultado de cada etapa é guardado em '<cache>/' sob uma
+  chave SHA-256 do seu conteúdo de entrada e dos parâmetros:
+    - coleta: hash do conteúdo do arquivo de entrada;
+    - demais: chaves das dependências + parâmetros da etapa.
+  Se a chave já existe, a etapa não roda: o vetor é mapeado do
+  artefato binário (formato_binario.py), sem conversão. Mudar só
+  o fator de outliers, por exemplo, reexecuta apenas 'outliers'.
+
+  O hash do arquivo de entrada é reaproveitado enquanto tamanho
+  e data de modificação não mudarem.
+
+  Cada etapa guarda no máximo MANTER_POR_ETAPA artefatos (--manter):
+  ao gravar um novo, os usados há mais tempo são apagados (um
+  reaproveitamento conta como uso). --limpar-cache apaga todos os
+  artefatos e índices antes de executar.
+
+  Os arquivos de saída (dados_corrigidos.txt, ...) registram a
+  chave da etapa que os gravou: numa etapa em cache, a saída só
+  não é regravada se ainda for a mesma daquela chave (mesmos
+  tamanho e mtime); senão, é regravada a partir do artefato.
+
+Importações:
+  Os módulos de cada etapa (e o NumPy, que eles carregam) só são
+  importados se a etapa realmente rodar; uma reexecução toda em
+  cache não os carrega.
+
+Uso:
+  python3 pipeline.py
+  python3 pipeline.py --fator 2.5
+  python3 pipeline.py extrato.txt.gz --outliers mad --sem-cache
+  python3 pipeline.py --limpar-cache
+=============================================================
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+
+from escrita import arquivo_atomico, gravar_inteiros
+from formato_binario import carregar_binario, salvar_binario
+
+# Arquivos de entrada e saída (os mesmos das etapas separadas)
+ARQUIVO_ENTRADA      = "dados_acoes.txt"
+ARQUIVO_CORRIGIDOS   = "dados_corrigidos.txt"
+ARQUIVO_SEM_OUTLIERS = "dados_sem_outliers.txt"
+
+PASTA_CACHE = ".cache_pipeline"
+INDICE_HASHES = "arquivos.json"  # caminho → tamanho, mtime e hash
+INDICE_SAIDAS = "saidas.json"    # arquivo de saída → chave da etapa que o gravou
+
+# Mudar invalida todo o cache (ex.: quando uma etapa muda de regra)
+VERSAO_CACHE = 1
+
+# Artefatos guardados por etapa (os usados há mais tempo saem primeiro)
+MANTER_POR_ETAPA = 4
+
+TAMANHO_BLOCO_HASH = 1 << 20  # Bytes lidos por vez no cálculo do hash
+
+
+# ─────────────────────────────────────────────────────────────
+# ETAPAS
+# ─────────────────────────────────────────────────────────────
+# Cada etapa recebe os artefatos das dependências (na ordem de
+# 'depende') e os seus parâmetros, e devolve um artefato:
+#   {"vetor": sequência de int64 ou None, "dados": dict JSON}
+
+def _etapa_coleta(entradas: list, parametros: dict) -> dict:
+    from leitura import carregar_inteiros
+
+    valores, invalidas = carregar_inteiros(parametros["arquivo"])
+    return {"vetor": valores, "dados": {"linhas_invalidas": invalidas}}
+
+
+def _etapa_processamento(entradas: list, parametros: dict) -> dict:
+    from etapa2_processamento import calcular_agregados, substituir_invalidos
+
+    valores = entradas[0]["vetor"]
+    agregados = calcular_agregados(valores)
+    corrigidos = substituir_invalidos(valores, agregados["media"])
+    return {"vetor": corrigidos, "dados": agregados}
+
+
+def _etapa_estatisticas(entradas: list, parametros: dict) -> dict:
+    from estatisticas_exatas import calcular_somas, desvio_padrao_exato, media_exata, variancia_exata
+    from quantis import QUANTIS_PADRAO, mediana, quantis
+
+    valores = entradas[0]["vetor"]
+    if len(valores) == 0:
+        return {"vetor": None, "dados": {"contagem": 0}}
+
+    n, soma, soma_quadrados = calcular_somas(valores)
+    dados = {
+        "contagem":      n,
+        "media":         media_exata(n, soma),
+        "mediana":       mediana(valores),
+        "quantis":       list(quantis(valores, QUANTIS_PADRAO).items()),
+        "maximo":        max(valores),
+        "minimo":        min(valores),
+        "variancia":     variancia_exata(n, soma, soma_quadrados),
+        "desvio_padrao": desvio_padrao_exato(n, soma, soma_quadrados),
+    }
+    return {"vetor": None, "dados": dados}
+
+
+def _etapa_outliers(entradas: list, parametros: dict) -> dict:
+    from outliers import detectar_outliers
+
+    valores = entradas[0]["vetor"]
+    resultado = detectar_outliers(valores, parametros["modo"], parametros["fator"])
+    dados = {
+        "removidos":  len(resultado["indices_removidos"]),
+        "mantidos":   len(resultado["mantidos"]),
+        "iteracoes":  resultado["iteracoes"],
+    }
+    return {"vetor": resultado["mantidos"], "dados": dados}
+
+
+# Grafo das etapas: dependências, função e arquivo texto materializado
+ETAPAS = {
+    "coleta":        {"depende": (),                 "funcao": _etapa_coleta,        "saida": None},
+    "processamento": {"depende": ("coleta",),        "funcao": _etapa_processamento, "saida": ARQUIVO_CORRIGIDOS},
+    "estatisticas":  {"depende": ("processamento",), "funcao": _etapa_estatisticas,  "saida": None},
+    "outliers":      {"depende": ("processamento",), "funcao": _etapa_outliers,      "saida": ARQUIVO_SEM_OUTLIERS},
+}
+
+
+def ordem_topologica(etapas: dict) -> list:
+    """
+    Ordena as etapas de modo que cada uma venha depois das suas
+    dependências.
+
+    Levanta:
+        ValueError: dependência desconhecida ou ciclo no grafo.
+    """
+    ordem = []
+    estado = {}  # nome → "visitando" ou "pronta"
+
+    def visitar(nome, caminho):
+        if estado.get(nome) == "pronta":
+            return
+        if estado.get(nome) == "visitando":
+            raise ValueError(f"ciclo entre as etapas: {' → '.join(caminho + (nome,))}")
+        if nome not in etapas:
+            raise ValueError(f"etapa desconhecida: {nome!r}")
+        estado[nome] = "visitando"
+        for dependencia in etapas[nome]["depende"]:
+            visitar(dependencia, caminho + (nome,))
+        estado[nome] = "pronta"
+        ordem.append(nome)
+
+    for nome in etapas:
+        visitar(nome, ())
+    return ordem
+
+
+# ─────────────────────────────────────────────────────────────
+# CHAVES E CACHE
+# ─────────────────────────────────────────────────────────────
+
+def hash_do_arquivo(caminho: str, pasta_cache: str = None) -> str:
+    """
+    SHA-256 do conteúdo do arquivo. Com 'pasta_cache', o hash é
+    guardado e reaproveitado enquanto tamanho e mtime não mudarem.
+    """
+    info = os.stat(caminho)
+    assinatura = {"tamanho": info.st_size, "mtime_ns": info.st_mtime_ns}
+    absoluto = os.path.abspath(caminho)
+
+    indice = {}
+    if pasta_cache is not None:
+        try:
+            with open(os.path.join(pasta_cache, INDICE_HASHES), "r", encoding="utf-8") as arquivo:
+                indice = json.load(arquivo)
+        except (OSError, ValueError):
+            indice = {}
+        registro = indice.get(absoluto)
+        if registro is not None and registro["assinatura"] == assinatura:
+            return registro["sha256"]
+
+    hasher = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for pedaco in iter(lambda: arquivo.read(TAMANHO_BLOCO_HASH), b""):
+            hasher.update(pedaco)
+    digesto = hasher.hexdigest()
+
+    if pasta_cache is not None:
+        indice[absoluto] = {"assinatura": assinatura, "sha256": digesto}
+        _gravar_json(indice, os.path.join(pasta_cache, INDICE_HASHES))
+    return digesto
+
+
+def calcular_chave(nome: str, chaves_dependencias: list, parametros: dict) -> str:
+    """
+    Chave de memoização de uma etapa: SHA-256 do nome, das chaves
+    das dependências e dos parâmetros (serializados em JSON).
+    """
+    material = json.dumps(
+        {"versao": VERSAO_CACHE, "etapa": nome, "entradas": chaves_dependencias,
+         "parametros": parametros},
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _gravar_json(conteudo, nome_arquivo: str) -> None:
+    with arquivo_atomico(nome_arquivo) as arquivo:
+        arquivo.write(json.dumps(conteudo, indent=2).encode("utf-8"))
+
+
+def _base_cache(pasta_cache: str, nome: str, chave: str) -> str:
+    return os.path.join(pasta_cache, f"{nome}-{chave[:24]}")
+
+
+def carregar_do_cache(pasta_cache: str, nome: str, chave: str):
+    """
+    Artefato memoizado da etapa, ou None se não houver. O .json é
+    gravado por último, então só existe para artefatos completos.
+    """
+    base = _base_cache(pasta_cache, nome, chave)
+    try:
+        with open(base + ".json", "r", encoding="utf-8") as arquivo:
+            registro = json.load(arquivo)
+        if registro["chave"] != chave:
+            return None
+        vetor = carregar_binario(base + ".bin") if registro["tem_vetor"] else None
+    except (OSError, ValueError, KeyError):
+        return None  # Ausente ou danificado: a etapa roda de novo
+    try:
+        os.utime(base + ".json")  # Marca o uso, para a poda manter os recentes
+    except OSError:
+        pass
+    return {"vetor": vetor, "dados": registro["dados"]}
+
+
+def salvar_no_cache(pasta_cache: str, nome: str, chave: str, artefato: dict) -> None:
+    """
+    Guarda o artefato: o vetor em formato binário e os dados em JSON.
+    """
+    base = _base_cache(pasta_cache, nome, chave)
+    tem_vetor = artefato["vetor"] is not None
+    if tem_vetor:
+        salvar_binario(artefato["vetor"], base + ".bin")
+    registro = {"etapa": nome, "chave": chave, "tem_vetor": tem_vetor, "dados": artefato["dados"]}
+    _gravar_json(registro, base + ".json")
+
+
+def _artefatos(pasta_cache: str, nome: str = None) -> list:
+    """
+    Bases (caminho sem extensão) dos artefatos de uma etapa, ou de
+    todas as etapas do grafo.
+    """
+    nomes = [nome] if nome is not None else list(ETAPAS)
+    return [arquivo[:-len(".json")] for etapa in nomes
+            for arquivo in glob.glob(os.path.join(pasta_cache, f"{etapa}-*.json"))]
+
+
+def _remover_artefato(base: str) -> None:
+    for extensao in (".json", ".bin"):  # .json primeiro: sem ele, o .bin não é lido
+        try:
+            os.remove(base + extensao)
+        except FileNotFoundError:
+            pass
+
+
+def podar_cache(pasta_cache: str, nome: str, manter: int = MANTER_POR_ETAPA) -> int:
+    """
+    Mantém só os 'manter' artefatos da etapa usados mais recentemente
+    (pela data de modificação do .json, renovada a cada uso).
+
+    Retorna:
+        removidos (int): artefatos apagados.
+    """
+    bases = sorted(_artefatos(pasta_cache, nome),
+                   key=lambda base: os.path.getmtime(base + ".json"), reverse=True)
+    for base in bases[manter:]:
+        _remover_artefato(base)
+    return max(len(bases) - manter, 0)
+
+
+def limpar_cache(pasta_cache: str) -> int:
+    """
+    Apaga os artefatos de todas as etapas e os índices do cache. Só
+    remove arquivos com os nomes que o pipeline cria, nunca a pasta.
+
+    Retorna:
+        removidos (int): artefatos apagados.
+    """
+    bases = _artefatos(pasta_cache)
+    for base in bases:
+        _remover_artefato(base)
+    for indice in (INDICE_HASHES, INDICE_SAIDAS):
+        try:
+            os.remove(os.path.join(pasta_cache, indice))
+        except FileNotFoundError:
+            pass
+    return len(bases)
+
+
+def _ler_indice_saidas(pasta_cache: str) -> dict:
+    try:
+        with open(os.path.join(pasta_cache, INDICE_SAIDAS), "r", encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return {}
+
+
+def _assinatura(caminho: str):
+    """
+    Tamanho e mtime do arquivo, ou None se ele não existir.
+    """
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return None
+    return {"tamanho": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+
+def saida_atualizada(indice: dict, caminho: str, chave: str) -> bool:
+    """
+    True se 'caminho' foi gravado pela etapa de chave 'chave' e não
+    mudou desde então (tamanho e mtime iguais aos registrados).
+    """
+    registro = indice.get(os.path.abspath(caminho))
+    return (registro is not None and registro["chave"] == chave
+            and registro["assinatura"] == _assinatura(caminho))
+
+
+# ─────────────────────────────────────────────────────────────
+# EXECUÇÃO
+# ─────────────────────────────────────────────────────────────
+
+def executar_pipeline(arquivo_entrada: str = ARQUIVO_ENTRADA, modo: str = "sigma",
+                      fator: float = None, pasta_cache: str = PASTA_CACHE,
+                      usar_cache: bool = True, gravar_saidas: bool = True,
+                      manter: int = MANTER_POR_ETAPA) -> dict:
+    """
+    Executa o grafo de etapas, reaproveitando o que estiver em cache.
+
+    Parâmetros:
+        arquivo_entrada (str)  : arquivo bruto (texto, .gz/.xz ou .bin).
+        modo            (str)  : critério de outliers (outliers.MODOS).
+        fator           (float): multiplicador dos limites (None = padrão do modo).
+        pasta_cache     (str)  : pasta dos artefatos memoizados.
+        usar_cache      (bool) : False recalcula tudo (e não grava o cache).
+        manter          (int)  : artefatos guardados por etapa (ver podar_cache()).
+        gravar_saidas   (bool) : grava dados_corrigidos.txt e
+                                 dados_sem_outliers.txt.
+
+    Retorna:
+        resultados (dict): por etapa, 'artefato', 'chave',
+                           'reaproveitada' (bool) e 'tempo' (s).
+    """
+    parametros = {
+        "coleta":        {"arquivo": arquivo_entrada},
+        "processamento": {},
+        "estatisticas":  {},
+        "outliers":      {"modo": modo, "fator": fator},
+    }
+    indice_saidas = {}
+    if usar_cache:
+        os.makedirs(pasta_cache, exist_ok=True)
+        indice_saidas = _ler_indice_saidas(pasta_cache)
+
+    resultados = {}
+    for nome in ordem_topologica(ETAPAS):
+        etapa = ETAPAS[nome]
+        inicio = time.perf_counter()
+
+        # A chave da coleta depende do conteúdo do arquivo, não do nome
+        parametros_chave = dict(parametros[nome])
+        if "arquivo" in parametros_chave:
+            parametros_chave["arquivo"] = hash_do_arquivo(
+                parametros_chave["arquivo"], pasta_cache if usar_cache else None
+            )
+        chaves = [resultados[dependencia]["chave"] for dependencia in etapa["depende"]]
+        chave = calcular_chave(nome, chaves, parametros_chave)
+
+        artefato = carregar_do_cache(pasta_cache, nome, chave) if usar_cache else None
+        reaproveitada = artefato is not None
+        if not reaproveitada:
+            entradas = [resultados[dependencia]["artefato"] for dependencia in etapa["depende"]]
+            artefato = etapa["funcao"](entradas, parametros[nome])
+            if usar_cache:
+                salvar_no_cache(pasta_cache, nome, chave, artefato)
+                podar_cache(pasta_cache, nome, manter)
+
+        # Uma saída existente pode ter vindo de outros parâmetros ou de
+        # outra entrada: só é mantida se foi gravada por esta mesma chave
+        saida = etapa["saida"]
+        if gravar_saidas and saida and not (reaproveitada and saida_atualizada(indice_saidas, saida, chave)):
+            gravar_inteiros(artefato["vetor"], saida)
+            if usar_cache:
+                indice_saidas[os.path.abspath(saida)] = {"chave": chave, "assinatura": _assinatura(saida)}
+                _gravar_json(indice_saidas, os.path.join(pasta_cache, INDICE_SAIDAS))
+
+        resultados[nome] = {
+            "artefato":      artefato,
+            "chave":         chave,
+            "reaproveitada": reaproveitada,
+            "tempo":         time.perf_counter() - inicio,
+        }
+
+    return resultados
+
+
+def exibir_resultados(resultados: dict) -> None:
+    """
+    Exibe o estado de cada etapa, as estatísticas e os outliers.
+    """
+    print("\n  Etapas:")
+    for nome, resultado in resultados.items():
+        situacao = "cache" if resultado["reaproveitada"] else "executada"
+        print(f"  {'↺' if resultado['reaproveitada'] else '✔'} {nome:<14}: "
+              f"{situacao:<9} ({resultado['tempo'] * 1000:.1f} ms)")
+
+    coleta = resultados["coleta"]["artefato"]["dados"]
+    for numero_linha, linha in coleta["linhas_invalidas"]:
+        print(f"  ✘ Linha {numero_linha} inválida ignorada: '{linha}'")
+
+    estatisticas = resultados["estatisticas"]["artefato"]["dados"]
+    print("\n" + "=" * 60)
+    print("  ESTATÍSTICAS (vetor corrigido)")
+    print("=" * 60)
+    if estatisticas["contagem"] == 0:
+        print("  Nenhum dado disponível.")
+    else:
+        print(f"  Registros      : {estatisticas['contagem']}")
+        print(f"  Média          : {estatisticas['media']:.2f}")
+        print(f"  Mediana        : {estatisticas['mediana']:.2f}")
+        for p, valor in estatisticas["quantis"]:
+            rotulo = f"p{p * 100:g}"
+            print(f"  {rotulo:<15}: {valor:.2f}")
+        print(f"  Máximo         : {estatisticas['maximo']}")
+        print(f"  Mínimo         : {estatisticas['minimo']}")
+        print(f"  Variância      : {estatisticas['variancia']:.2f}")
+        print(f"  Desvio Padrão  : {estatisticas['desvio_padrao']:.2f}")
+
+    outliers = resultados["outliers"]["artefato"]["dados"]
+    print("\n  Outliers:")
+    for numero, iteracao in enumerate(outliers["iteracoes"], start=1):
+        print(f"  Iteração {numero}: limites [{iteracao['limite_inferior']:.2f}, "
+              f"{iteracao['limite_superior']:.2f}], {iteracao['removidos']} removido(s)")
+    print(f"  Total removido : {outliers['removidos']} outlier(s)")
+    print(f"  Registros finais: {outliers['mantidos']}")
+
+
+# ─────────────────────────────────────────────────────────────
+# Ponto de entrada principal do programa
+# ─────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    # Lista fixa para não importar outliers.py (e o NumPy) na partida
+    MODOS_OUTLIERS = ("sigma", "sigma-iterativo", "mad", "iqr")
+
+    parser = argparse.ArgumentParser(description="Etapas 1 a 4 em um único processo, com cache")
+    parser.add_argument("entrada", nargs="?", default=ARQUIVO_ENTRADA,
+                        help=f"arquivo bruto (padrão: {ARQUIVO_ENTRADA})")
+    parser.add_argument("--outliers", choices=MODOS_OUTLIERS, default="sigma", metavar="MODO",
+                        help=f"critério de outliers: {', '.join(MODOS_OUTLIERS)} (padrão: sigma)")
+    parser.add_argument("--fator", type=float, default=None,
+                        help="multiplicador dos limites de outliers (padrão depende do modo)")
+    parser.add_argument("--cache", default=PASTA_CACHE, metavar="PASTA",
+                        help=f"pasta dos artefatos memoizados (padrão: {PASTA_CACHE})")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="recalcula todas as etapas, sem ler nem gravar o cache")
+    parser.add_argument("--manter", type=int, default=MANTER_POR_ETAPA, metavar="N",
+                        help=f"artefatos guardados por etapa no cache (padrão: {MANTER_POR_ETAPA})")
+    parser.add_argument("--limpar-cache", action="store_true",
+                        help="apaga os artefatos e índices do cache antes de executar")
+    argumentos = parser.parse_args()
+
+    if argumentos.manter < 1:
+        parser.error("--manter deve ser pelo menos 1")
+
+    print("=" * 60)
+    print("  PIPELINE – Etapas 1 a 4")
+    print("=" * 60)
+
+    if argumentos.limpar_cache and os.path.isdir(argumentos.cache):
+        removidos = limpar_cache(argumentos.cache)
+        print(f"✔ Cache limpo: {removidos} artefato(s) removido(s) de '{argumentos.cache}'.")
+
+    try:
+        resultados = executar_pipeline(argumentos.entrada, argumentos.outliers, argumentos.fator,
+                                       argumentos.cache, usar_cache=not argumentos.sem_cache,
+                                       manter=argumentos.manter)
+    except FileNotFoundError:
+        print(f"✘ Arquivo '{argumentos.entrada}' não encontrado.")
+        print("  Execute primeiro a Etapa 1 (etapa1_coleta.py).")
+    except (ValueError, OverflowError) as erro:
+        print(f"✘ {erro}")
+    else:
+        exibir_resultados(resultados)
+        print(f"\n✔ Arquivos gravados: '{ARQUIVO_CORRIGIDOS}' e '{ARQUIVO_SEM_OUTLIERS}'.")
+        print("\nSistema de análise financeira concluído com sucesso!\n")
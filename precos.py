@@ -0,0 +1,491 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Preços em ponto fixo e estatísticas ponderadas por volume
+=============================================================
+Objetivo:
+  Processar arquivos de negócios com preço, uma linha por
+  registro no formato:
+
+    PETR4,300,38.45
+    VALE3,-5,61.02
+    ITUB4,120,0
+
+  e calcular, para cada ativo:
+    - VWAP (preço médio ponderado pela quantidade), variância e
+      desvio padrão ponderados do preço;
+    - volume, financeiro (Σ quantidade × preço) e média e desvio
+      padrão do financeiro por negócio.
+
+Ponto fixo:
+  O preço é convertido direto do texto para um inteiro escalado
+  (com casas=2, "38.45" → 3845 centavos; com casas=4, 384500
+  centésimos de centavo), sem float nem Decimal por linha. Preços
+  com mais casas que a escala são linhas inválidas. Todas as
+  somas (Σq, Σq·p, Σq·p², Σ(q·p)²) são inteiras e exatas, em
+  int64 vetorizado quando comprovadamente não estouram; só o
+  resultado final vira float.
+
+Regra da Etapa 2:
+  Quantidades e preços ≤ 0 são inválidos e recebem, cada um,
+  int(média dos válidos do próprio ativo) — no caso do preço,
+  em unidades da escala.
+
+Uso:
+  tickers, codigos, quantidades, precos, invalidas = ler_precos("dados_precos.txt")
+  resultado = estatisticas_ponderadas(tickers, codigos, quantidades, precos)
+=============================================================
+"""
+
+import mmap
+import re
+from array import array
+from operator import mul
+
+from agrupamento import Fatorador
+from escrita import arquivo_atomico
+from estatisticas_exatas import desvio_padrao_exato, media_exata, variancia_exata
+from leitura import TAMANHO_BLOCO
+
+try:
+    import numpy as np  # Opcional: imputação e somas por ativo vetorizadas
+except ImportError:
+    np = None
+
+CASAS_PADRAO = 2   # Centavos
+CASAS_MAXIMAS = 8  # Escala 10⁸: preços de até ~9·10¹⁰ ainda cabem em int64
+ATIVOS_EXIBIDOS = 20
+
+_LIMITE_INT64 = 2 ** 63 - 1
+
+
+# ─────────────────────────────────────────────────────────────
+# PONTO FIXO
+# ─────────────────────────────────────────────────────────────
+
+def converter_preco(texto: bytes, casas: int = CASAS_PADRAO) -> int:
+    """
+    Converte um preço decimal ("38.45", "-1.5", "12") para um
+    inteiro em unidades de 10^-casas, só com operações inteiras.
+
+    Levanta:
+        ValueError: texto inválido ou com mais de 'casas' decimais.
+    """
+    inteiro, ponto, fracao = texto.strip().partition(b".")
+    if ponto and not (fracao.isdigit() and len(fracao) <= casas):
+        raise ValueError(f"preço inválido para {casas} casa(s) decimal(is): {texto!r}")
+    # "38" + "45" → 3845; "-1" + "50" → -150; "12" + "00" → 1200
+    return int(inteiro + fracao.ljust(casas, b"0"))
+
+
+def formatar_preco(valor: int, casas: int = CASAS_PADRAO) -> str:
+    """
+    Texto decimal exato de um valor em ponto fixo (3845 → "38.45").
+    """
+    if casas == 0:
+        return str(valor)
+    sinal = "-" if valor < 0 else ""
+    inteiro, fracao = divmod(abs(valor), 10 ** casas)
+    return f"{sinal}{inteiro}.{fracao:0{casas}d}"
+
+
+def _precos_do_bloco(brutos: tuple, casas: int) -> array:
+    """
+    Preços de um bloco inteiro. No caso comum — todos com
+    exatamente 'casas' decimais — a conversão é feita no texto do
+    bloco, em C: sem os pontos, cada preço já é o inteiro escalado.
+    Nos demais casos, preço a preço por converter_preco().
+    """
+    texto = b"\n".join(brutos) + b"\n"
+    if casas > 0 and texto.count(b".") == len(brutos):
+        # Toda linha termina em ".<casas dígitos>": exatamente um ponto, na posição certa
+        if len(re.findall(rb"\.[0-9]{%d}\n" % casas, texto)) == len(brutos):
+            return array("q", map(int, texto.replace(b".", b"").split(b"\n")[:-1]))
+    return array("q", (converter_preco(bruto, casas) for bruto in brutos))
+
+
+# ─────────────────────────────────────────────────────────────
+# LEITURA
+# ─────────────────────────────────────────────────────────────
+
+def _converter_bloco(linhas: list, primeira_linha: int, casas: int, fatorador: Fatorador,
+                     codigos: array, quantidades: array, precos: array, invalidas: list) -> None:
+    """
+    Converte um bloco de linhas 'ticker,quantidade,preco'. Como em
+    agrupamento.py, o caminho rápido trata o bloco inteiro; se
+    alguma linha for vazia ou inválida, ele é refeito linha a linha.
+    """
+    try:
+        campos = [linha.split(b",") for linha in linhas]
+        if set(map(len, campos)) == {3}:
+            tickers, brutos_quantidade, brutos_preco = zip(*campos)
+            if all(map(bytes.strip, tickers)):
+                bloco_quantidades = array("q", map(int, brutos_quantidade))
+                bloco_precos = _precos_do_bloco(brutos_preco, casas)
+                codigos.extend(fatorador.codigos_do_bloco(tickers))
+                quantidades.extend(bloco_quantidades)
+                precos.extend(bloco_precos)
+                return
+    except (ValueError, OverflowError):
+        pass
+
+    for deslocamento, linha in enumerate(linhas):
+        numero_linha = primeira_linha + deslocamento
+        if not linha.strip():
+            continue  # Ignora linhas vazias
+
+        partes = linha.split(b",")
+        try:
+            if len(partes) != 3 or not partes[0].strip():
+                raise ValueError
+            quantidade = int(partes[1])
+            preco = converter_preco(partes[2], casas)
+        except ValueError:
+            # A primeira linha pode ser um cabeçalho (ex.: "ticker,quantidade,preco")
+            if numero_linha > 1:
+                invalidas.append((numero_linha, linha.decode("utf-8", errors="replace").strip()))
+            continue
+
+        for valor in (quantidade, preco):
+            if not -_LIMITE_INT64 - 1 <= valor <= _LIMITE_INT64:
+                raise OverflowError(f"Linha {numero_linha}: valor {valor} fora do intervalo int64")
+        codigos.append(fatorador.codigo(partes[0]))
+        quantidades.append(quantidade)
+        precos.append(preco)
+
+
+def ler_precos(nome_arquivo: str, casas: int = CASAS_PADRAO) -> tuple:
+    """
+    Lê um arquivo 'ticker,quantidade,preco' via mmap, em blocos.
+
+    Parâmetros:
+        nome_arquivo (str): arquivo de entrada.
+        casas        (int): casas decimais da escala dos preços.
+
+    Retorna:
+        (tickers, codigos, quantidades, precos, invalidas) (tuple):
+            tickers     (list) : código → ticker.
+            codigos     (array): código do ticker de cada registro ('q').
+            quantidades (array): quantidade de cada registro ('q').
+            precos      (array): preço em unidades de 10^-casas ('q').
+            invalidas   (list) : pares (numero_linha, conteudo) das
+                                 linhas fora do formato.
+    """
+    if not 0 <= casas <= CASAS_MAXIMAS:
+        raise ValueError(f"casas decimais devem estar entre 0 e {CASAS_MAXIMAS}")
+
+    fatorador = Fatorador()
+    codigos, quantidades, precos = array("q"), array("q"), array("q")
+    invalidas = []
+
+    with open(nome_arquivo, "rb") as arquivo:
+        try:
+            mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return fatorador.tickers, codigos, quantidades, precos, invalidas  # Arquivo vazio
+
+    with mapa:
+        tamanho = len(mapa)
+        inicio = 0
+        proxima_linha = 1
+
+        while inicio < tamanho:
+            fim = mapa.find(b"\n", min(inicio + TAMANHO_BLOCO, tamanho) - 1)
+            if fim == -1:
+                fim = tamanho
+
+            linhas = mapa[inicio:fim].split(b"\n")
+            _converter_bloco(linhas, proxima_linha, casas, fatorador,
+                             codigos, quantidades, precos, invalidas)
+
+            proxima_linha = proxima_linha + len(linhas)
+            inicio = fim + 1
+
+    return fatorador.tickers, codigos, quantidades, precos, invalidas
+
+
+# ─────────────────────────────────────────────────────────────
+# ESTATÍSTICAS PONDERADAS POR ATIVO
+# ─────────────────────────────────────────────────────────────
+
+def estatisticas_ponderadas(tickers: list, codigos, quantidades, precos,
+                            casas: int = CASAS_PADRAO) -> dict:
+    """
+    Imputa os inválidos e calcula as estatísticas ponderadas de
+    cada ativo.
+
+    Os pesos são de frequência: cada unidade negociada conta como
+    uma observação do preço, de modo que a variância ponderada é
+    a variância amostral (n − 1) do preço repetido q vezes.
+
+    Retorna:
+        resultado (dict):
+            'grupos' (dict): colunas com um item por ativo —
+                'ticker', 'registros', 'quantidades_invalidas',
+                'precos_invalidos', 'volume' (Σq), 'financeiro'
+                (Σq·p, inteiro em 10^-casas), 'preco_minimo' e
+                'preco_maximo' (válidos, inteiros em 10^-casas) e,
+                em unidades de preço: 'preco_medio', 'vwap',
+                'variancia_ponderada', 'desvio_ponderado',
+                'financeiro_medio', 'desvio_financeiro' (None
+                quando não definidos).
+            'quantidades', 'precos' (sequência): vetores com os
+                inválidos substituídos, na ordem original.
+    """
+    if np is not None and len(quantidades) > 0:
+        somas, quantidades, precos = _ponderar_numpy(len(tickers), codigos, quantidades, precos)
+    else:
+        somas, quantidades, precos = _ponderar_python(len(tickers), codigos, quantidades, precos)
+    return {
+        "grupos":      _montar_grupos(tickers, somas, 10 ** casas),
+        "quantidades": quantidades,
+        "precos":      precos,
+    }
+
+
+def _substituto(soma: int, validos: int) -> int:
+    """
+    Valor de imputação da Etapa 2: int(média dos válidos), ou 0.
+    """
+    return int(soma / validos) if validos > 0 else 0
+
+
+def _montar_grupos(tickers: list, somas: dict, escala: int) -> dict:
+    """
+    Deriva as métricas de cada ativo das somas exatas.
+
+    Com W = Σq, S₁ = Σq·p e S₂ = Σq·p²: VWAP = S₁/W e a variância
+    ponderada é a de W observações — variancia_exata(W, S₁, S₂).
+    """
+    grupos = {chave: [] for chave in (
+        "ticker", "registros", "quantidades_invalidas", "precos_invalidos", "volume",
+        "financeiro", "preco_minimo", "preco_maximo", "preco_medio", "vwap",
+        "variancia_ponderada", "desvio_ponderado", "financeiro_medio", "desvio_financeiro",
+    )}
+
+    for codigo, ticker in enumerate(tickers):
+        n = somas["registros"][codigo]
+        volume = somas["volume"][codigo]
+        financeiro = somas["financeiro"][codigo]
+        ponderada = (volume, financeiro, somas["financeiro_preco"][codigo])
+        por_negocio = (n, financeiro, somas["financeiro_quadrado"][codigo])
+
+        grupos["ticker"].append(ticker)
+        grupos["registros"].append(n)
+        grupos["quantidades_invalidas"].append(n - somas["quantidades_validas"][codigo])
+        grupos["precos_invalidos"].append(n - somas["precos_validos"][codigo])
+        grupos["volume"].append(volume)
+        grupos["financeiro"].append(financeiro)
+        grupos["preco_minimo"].append(somas["preco_minimo"][codigo])
+        grupos["preco_maximo"].append(somas["preco_maximo"][codigo])
+        grupos["preco_medio"].append(media_exata(n * escala, somas["soma_precos"][codigo]))
+        grupos["vwap"].append(media_exata(volume * escala, financeiro) if volume >= 1 else None)
+        grupos["variancia_ponderada"].append(
+            variancia_exata(*ponderada) / (escala * escala) if volume >= 2 else None)
+        grupos["desvio_ponderado"].append(
+            desvio_padrao_exato(*ponderada) / escala if volume >= 2 else None)
+        grupos["financeiro_medio"].append(media_exata(n * escala, financeiro))
+        grupos["desvio_financeiro"].append(
+            desvio_padrao_exato(*por_negocio) / escala if n >= 2 else None)
+
+    return grupos
+
+
+def _ponderar_python(grupos_total: int, codigos, quantidades, precos) -> tuple:
+    """
+    Sem NumPy: acumuladores indexados pelo código do ativo, em
+    duas passadas (válidos para a imputação; depois, as somas
+    ponderadas dos valores corrigidos).
+    """
+    def zeros():
+        return [0] * grupos_total
+
+    registros, quantidades_validas, soma_quantidades = zeros(), zeros(), zeros()
+    precos_validos, soma_precos_validos = zeros(), zeros()
+    minimo, maximo = [None] * grupos_total, [None] * grupos_total
+
+    # 1ª passada: válidos (> 0) de cada ativo
+    for codigo, quantidade, preco in zip(codigos, quantidades, precos):
+        registros[codigo] = registros[codigo] + 1
+        if quantidade > 0:
+            quantidades_validas[codigo] = quantidades_validas[codigo] + 1
+            soma_quantidades[codigo] = soma_quantidades[codigo] + quantidade
+        if preco > 0:
+            precos_validos[codigo] = precos_validos[codigo] + 1
+            soma_precos_validos[codigo] = soma_precos_validos[codigo] + preco
+            if minimo[codigo] is None or preco < minimo[codigo]:
+                minimo[codigo] = preco
+            if maximo[codigo] is None or preco > maximo[codigo]:
+                maximo[codigo] = preco
+
+    substitutos_quantidade = list(map(_substituto, soma_quantidades, quantidades_validas))
+    substitutos_preco = list(map(_substituto, soma_precos_validos, precos_validos))
+    quantidades = array("q", (quantidade if quantidade > 0 else substitutos_quantidade[codigo]
+                              for codigo, quantidade in zip(codigos, quantidades)))
+    precos = array("q", (preco if preco > 0 else substitutos_preco[codigo]
+                         for codigo, preco in zip(codigos, precos)))
+
+    # 2ª passada: somas ponderadas exatas dos valores corrigidos
+    volume, soma_precos, financeiro = zeros(), zeros(), zeros()
+    financeiro_preco, financeiro_quadrado = zeros(), zeros()
+    for codigo, quantidade, preco in zip(codigos, quantidades, precos):
+        negocio = quantidade * preco
+        volume[codigo] = volume[codigo] + quantidade
+        soma_precos[codigo] = soma_precos[codigo] + preco
+        financeiro[codigo] = financeiro[codigo] + negocio
+        financeiro_preco[codigo] = financeiro_preco[codigo] + negocio * preco
+        financeiro_quadrado[codigo] = financeiro_quadrado[codigo] + negocio * negocio
+
+    somas = {
+        "registros": registros, "quantidades_validas": quantidades_validas,
+        "precos_validos": precos_validos, "preco_minimo": minimo, "preco_maximo": maximo,
+        "volume": volume, "soma_precos": soma_precos, "financeiro": financeiro,
+        "financeiro_preco": financeiro_preco, "financeiro_quadrado": financeiro_quadrado,
+    }
+    return somas, quantidades, precos
+
+
+def _somar_produtos(inicios, fatores: tuple) -> list:
+    """
+    Σ do produto dos 'fatores' em cada grupo (trechos contíguos que
+    começam em 'inicios'). Em int64 vetorizado quando nem o produto
+    nem a soma podem estourar; senão, em inteiros do Python.
+    """
+    limite = len(fatores[0])
+    for fator in fatores:
+        limite = limite * max(abs(int(fator.max())), abs(int(fator.min())), 1)
+
+    if limite <= _LIMITE_INT64:
+        termos = fatores[0]
+        for fator in fatores[1:]:
+            termos = termos * fator
+        return np.add.reduceat(termos, inicios).tolist()
+
+    termos = fatores[0].tolist()
+    for fator in fatores[1:]:
+        termos = list(map(mul, termos, fator.tolist()))
+    fins = inicios.tolist()[1:] + [len(termos)]
+    return [sum(termos[inicio:fim]) for inicio, fim in zip(inicios.tolist(), fins)]
+
+
+def _ponderar_numpy(grupos_total: int, codigos, quantidades, precos) -> tuple:
+    """
+    Com NumPy: registros ordenados por ativo (ordenação estável) e
+    somas por trecho com np.add.reduceat, exatas em int64.
+    """
+    codigos = np.asarray(codigos, dtype=np.int64)
+    quantidades = np.asarray(quantidades, dtype=np.int64)
+    precos = np.asarray(precos, dtype=np.int64)
+
+    # Todo ativo tem ao menos um registro: os trechos nunca são vazios
+    ordem = np.argsort(codigos, kind="stable")
+    registros = np.bincount(codigos, minlength=grupos_total)
+    inicios = np.concatenate(([0], np.cumsum(registros)[:-1]))
+
+    def por_ativo(*vetores):
+        return _somar_produtos(inicios, tuple(vetor[ordem] for vetor in vetores))
+
+    quantidade_valida = quantidades > 0
+    preco_valido = precos > 0
+    quantidades_validas = por_ativo(quantidade_valida.astype(np.int64))
+    precos_validos = por_ativo(preco_valido.astype(np.int64))
+    soma_quantidades = por_ativo(np.where(quantidade_valida, quantidades, 0))
+    soma_precos_validos = por_ativo(np.where(preco_valido, precos, 0))
+
+    # Inválidos viram o neutro da operação; sem válidos, None
+    minimo = np.minimum.reduceat(np.where(preco_valido, precos, _LIMITE_INT64)[ordem], inicios).tolist()
+    maximo = np.maximum.reduceat(np.where(preco_valido, precos, 0)[ordem], inicios).tolist()
+    minimo = [menor if validos > 0 else None for menor, validos in zip(minimo, precos_validos)]
+    maximo = [maior if validos > 0 else None for maior, validos in zip(maximo, precos_validos)]
+
+    # Imputação, em vetor, com o substituto de cada ativo
+    substitutos_quantidade = np.asarray(list(map(_substituto, soma_quantidades, quantidades_validas)),
+                                        dtype=np.int64)
+    substitutos_preco = np.asarray(list(map(_substituto, soma_precos_validos, precos_validos)),
+                                   dtype=np.int64)
+    quantidades = np.where(quantidade_valida, quantidades, substitutos_quantidade[codigos])
+    precos = np.where(preco_valido, precos, substitutos_preco[codigos])
+
+    somas = {
+        "registros": registros.tolist(), "quantidades_validas": quantidades_validas,
+        "precos_validos": precos_validos, "preco_minimo": minimo, "preco_maximo": maximo,
+        "volume":              por_ativo(quantidades),
+        "soma_precos":         por_ativo(precos),
+        "financeiro":          por_ativo(quantidades, precos),
+        "financeiro_preco":    por_ativo(quantidades, precos, precos),
+        "financeiro_quadrado": por_ativo(quantidades, quantidades, precos, precos),
+    }
+    return somas, quantidades, precos
+
+
+# ─────────────────────────────────────────────────────────────
+# GRAVAÇÃO E EXIBIÇÃO
+# ─────────────────────────────────────────────────────────────
+
+def salvar_precos(nome_arquivo: str, tickers: list, codigos, quantidades, precos,
+                  casas: int = CASAS_PADRAO) -> int:
+    """
+    Grava registros 'ticker,quantidade,preco' (preço com 'casas'
+    decimais exatas), de forma atômica. Retorna a quantidade gravada.
+    """
+    codigos, quantidades, precos = (vetor.tolist() if hasattr(vetor, "tolist") else vetor
+                                    for vetor in (codigos, quantidades, precos))
+    escala = 10 ** casas
+    # Preços corrigidos são ≥ 0: divisão inteira direto na f-string,
+    # sem uma chamada a formatar_preco() por linha
+    direto = casas > 0 and min(precos, default=0) >= 0
+
+    registros = list(zip(codigos, quantidades, precos))
+    with arquivo_atomico(nome_arquivo) as arquivo:
+        passo = 1 << 16
+        for inicio in range(0, len(registros), passo):
+            trecho = registros[inicio:inicio + passo]
+            if direto:
+                texto = "".join(f"{tickers[codigo]},{quantidade},{preco // escala}.{preco % escala:0{casas}d}\n"
+                                for codigo, quantidade, preco in trecho)
+            else:
+                texto = "".join(f"{tickers[codigo]},{quantidade},{formatar_preco(preco, casas)}\n"
+                                for codigo, quantidade, preco in trecho)
+            arquivo.write(texto.encode("utf-8"))
+    return len(registros)
+
+
+def formatar_grupos(grupos: dict, casas: int = CASAS_PADRAO) -> dict:
+    """
+    Cópia das colunas com os valores em ponto fixo ('financeiro',
+    'preco_minimo', 'preco_maximo') como texto decimal exato, para
+    gravação em CSV ou relatório.
+    """
+    formatados = dict(grupos)
+    for coluna in ("financeiro", "preco_minimo", "preco_maximo"):
+        formatados[coluna] = [None if valor is None else formatar_preco(valor, casas)
+                              for valor in grupos[coluna]]
+    return formatados
+
+
+def exibir_precos(grupos: dict, casas: int = CASAS_PADRAO, limite: int = ATIVOS_EXIBIDOS) -> None:
+    """
+    Exibe as métricas ponderadas dos primeiros 'limite' ativos (na
+    ordem de primeira aparição no arquivo).
+    """
+    def numero(valor, largura):
+        return f"{'-':>{largura}}" if valor is None else f"{valor:>{largura}.{casas}f}"
+
+    def preco(valor, largura):
+        return f"{'-' if valor is None else formatar_preco(valor, casas):>{largura}}"
+
+    total = len(grupos["ticker"])
+    print("\n" + "=" * 108)
+    print(f"  {'Ticker':<10}{'Regs':>8}{'Inv.q':>6}{'Inv.p':>6}{'Volume':>11}{'Financeiro':>15}"
+          f"{'Mín':>10}{'Máx':>10}{'VWAP':>11}{'Desv.pond':>11}{'Fin.médio':>12}")
+    print("=" * 108)
+    for indice in range(min(total, limite)):
+        print(f"  {grupos['ticker'][indice]:<10}{grupos['registros'][indice]:>8}"
+              f"{grupos['quantidades_invalidas'][indice]:>6}{grupos['precos_invalidos'][indice]:>6}"
+              f"{grupos['volume'][indice]:>11}{preco(grupos['financeiro'][indice], 15)}"
+              f"{preco(grupos['preco_minimo'][indice], 10)}{preco(grupos['preco_maximo'][indice], 10)}"
+              f"{numero(grupos['vwap'][indice], 11)}{numero(grupos['desvio_ponderado'][indice], 11)}"
+              f"{numero(grupos['financeiro_medio'][indice], 12)}")
+    if total > limite:
+        print(f"  ... e mais {total - limite} ativo(s) (use --por-ativo para gravar todos).")
+    print("=" * 108)
@@ -0,0 +1,357 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Processamento paralelo de vários arquivos (shards)
+=============================================================
+Objetivo:
+  Processar vários arquivos dados_*.txt (um por mesa por dia)
+  em paralelo, com um pool de processos, aplicando as regras
+  das Etapas 2 e 4 com as estatísticas GLOBAIS do conjunto:
+
+  1ª passada (paralela): cada processo devolve um agregado
+     parcial do seu arquivo — contagem, Σx e Σx² dos válidos,
+     mínimo, máximo, quantidade de inválidos e um esboço de
+     quantis. Os parciais são combinados EXATAMENTE no processo
+     principal (somas inteiras).
+  Estatísticas globais: média dos válidos (Etapa 2); média e
+     desvio padrão do vetor corrigido (Etapa 4), obtidos das
+     mesmas somas, sem outra leitura dos arquivos.
+  2ª passada (paralela): cada processo substitui os inválidos
+     pela média global, remove outliers com os limites globais
+     e grava os arquivos de saída do seu shard. Na mesma passada,
+     monta os momentos e o histograma logarítmico (grade fixa,
+     histograma.py) do que manteve; o processo principal os soma
+     na distribuição exata do conjunto sem outliers.
+
+  Shards arquivados como .gz ou .xz são lidos diretamente, sem
+  descompressão prévia para o disco (descompressao.py).
+
+Uso:
+  python3 processamento_paralelo.py "dados_*.txt" --saida saida_shards
+  python3 processamento_paralelo.py pasta_com_shards/ --trabalhadores 8
+=============================================================
+"""
+
+import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from operator import mul
+
+from escrita import EXTENSOES_COMPRESSAO, arquivo_atomico
+from estatisticas_exatas import desvio_padrao_exato
+from histograma import Histograma, Momentos, exibir_forma, exibir_histograma
+from leitura import iterar_blocos
+from quantis import QUANTIS_PADRAO, EsbocoQuantis
+
+# Padrão de nomes procurado quando a entrada é uma pasta
+PADRAO_SHARDS = "dados_*.txt"
+PADROES_SHARDS = (PADRAO_SHARDS,) + tuple(PADRAO_SHARDS + extensao for extensao in EXTENSOES_COMPRESSAO)
+PASTA_SAIDA = "saida_shards"
+
+
+# ─────────────────────────────────────────────────────────────
+# AGREGADOS PARCIAIS E COMBINAÇÃO
+# ─────────────────────────────────────────────────────────────
+
+def agregar_shard(caminho: str) -> dict:
+    """
+    1ª passada sobre um shard: agrega os valores válidos (> 0).
+
+    Retorna:
+        parcial (dict): 'contagem', 'soma', 'soma_quadrados',
+                        'minimo', 'maximo', 'invalidos',
+                        'linhas_invalidas' e 'esboco'.
+    """
+    contagem = 0
+    soma = 0
+    soma_quadrados = 0
+    invalidos = 0
+    minimo = None
+    maximo = None
+    esboco = EsbocoQuantis()
+    linhas_invalidas = []
+
+    for bloco in iterar_blocos(caminho, linhas_invalidas):
+        validos = [valor for valor in bloco if valor > 0]
+        invalidos = invalidos + len(bloco) - len(validos)
+        if not validos:
+            continue
+
+        contagem = contagem + len(validos)
+        soma = soma + sum(validos)
+        soma_quadrados = soma_quadrados + sum(map(mul, validos, validos))
+        menor, maior = min(validos), max(validos)
+        if minimo is None or menor < minimo:
+            minimo = menor
+        if maximo is None or maior > maximo:
+            maximo = maior
+        esboco.adicionar_bloco(validos)
+
+    return {
+        "contagem":         contagem,
+        "soma":             soma,
+        "soma_quadrados":   soma_quadrados,
+        "minimo":           minimo,
+        "maximo":           maximo,
+        "invalidos":        invalidos,
+        "linhas_invalidas": len(linhas_invalidas),
+        "esboco":           esboco,
+    }
+
+
+def combinar_parciais(parciais: list) -> dict:
+    """
+    Combina agregados parciais em um agregado global.
+    Contagens e somas são inteiras, portanto a combinação é exata.
+    """
+    global_ = {
+        "contagem":         0,
+        "soma":             0,
+        "soma_quadrados":   0,
+        "minimo":           None,
+        "maximo":           None,
+        "invalidos":        0,
+        "linhas_invalidas": 0,
+        "esboco":           EsbocoQuantis(),
+    }
+
+    for parcial in parciais:
+        for chave in ("contagem", "soma", "soma_quadrados", "invalidos", "linhas_invalidas"):
+            global_[chave] = global_[chave] + parcial[chave]
+        if parcial["minimo"] is not None:
+            if global_["minimo"] is None or parcial["minimo"] < global_["minimo"]:
+                global_["minimo"] = parcial["minimo"]
+            if global_["maximo"] is None or parcial["maximo"] > global_["maximo"]:
+                global_["maximo"] = parcial["maximo"]
+        global_["esboco"].combinar(parcial["esboco"])
+
+    return global_
+
+
+def calcular_limites(global_: dict, fator: float = 2.0) -> dict:
+    """
+    Deriva das somas globais a média de substituição (Etapa 2) e a
+    média, o desvio e os limites de outliers do vetor corrigido (Etapa 4).
+
+    Após substituir os k inválidos por m = int(média dos válidos):
+      n  = válidos + k
+      Σx = soma + k·m
+      Σx² = soma_quadrados + k·m²
+    """
+    contagem = global_["contagem"]
+    media_validos = global_["soma"] / contagem if contagem > 0 else 0.0
+    substituto = int(media_validos)
+
+    k = global_["invalidos"]
+    n = contagem + k
+    soma = global_["soma"] + k * substituto
+    soma_quadrados = global_["soma_quadrados"] + k * substituto * substituto
+
+    media = soma / n if n > 0 else 0.0
+    desvio = desvio_padrao_exato(n, soma, soma_quadrados) if n >= 2 else 0.0
+
+    return {
+        "media_validos":   media_validos,
+        "substituto":      substituto,
+        "media":           media,
+        "desvio":          desvio,
+        "limite_superior": media + fator * desvio,
+        "limite_inferior": media - fator * desvio,
+    }
+
+
+# ─────────────────────────────────────────────────────────────
+# 2ª PASSADA: SUBSTITUIÇÃO E FILTRAGEM POR SHARD
+# ─────────────────────────────────────────────────────────────
+
+def nome_base_shard(caminho: str) -> str:
+    """
+    Nome usado nos arquivos de saída do shard: o nome do arquivo sem
+    a extensão nem a compressão (pasta/dados_x.txt.gz → dados_x).
+    """
+    base = os.path.basename(caminho)
+    if os.path.splitext(base)[1].lower() in EXTENSOES_COMPRESSAO:
+        base = os.path.splitext(base)[0]  # dados_x.txt.gz → dados_x.txt
+    return os.path.splitext(base)[0]
+
+
+def verificar_nomes_saida(caminhos: list) -> None:
+    """
+    Garante que cada shard grave arquivos de saída próprios. Shards
+    de pastas diferentes com o mesmo nome, ou o mesmo shard em texto
+    e comprimido (dados_x.txt e dados_x.txt.gz), gravariam as mesmas
+    saídas ao mesmo tempo, uma sobrescrevendo a outra.
+
+    Lança:
+        ValueError: se dois caminhos produzem o mesmo nome de saída.
+    """
+    por_nome = {}
+    for caminho in caminhos:
+        por_nome.setdefault(nome_base_shard(caminho), []).append(caminho)
+
+    colisoes = {nome: lista for nome, lista in por_nome.items() if len(lista) > 1}
+    if colisoes:
+        detalhes = "; ".join(f"{nome}: {', '.join(lista)}" for nome, lista in sorted(colisoes.items()))
+        raise ValueError(f"shards com o mesmo nome de saída ({detalhes}). "
+                         "Renomeie os arquivos ou processe-os separadamente.")
+
+
+def processar_shard(caminho: str, pasta_saida: str, limites: dict) -> dict:
+    """
+    2ª passada sobre um shard: substitui inválidos pela média global,
+    remove outliers com os limites globais e grava:
+      <pasta_saida>/<nome>_corrigidos.txt
+      <pasta_saida>/<nome>_sem_outliers.txt
+    """
+    base = nome_base_shard(caminho)
+    arquivo_corrigido = os.path.join(pasta_saida, f"{base}_corrigidos.txt")
+    arquivo_filtrado = os.path.join(pasta_saida, f"{base}_sem_outliers.txt")
+
+    substituto = limites["substituto"]
+    superior = limites["limite_superior"]
+    inferior = limites["limite_inferior"]
+
+    substituidos = 0
+    removidos = 0
+    mantidos = 0
+    momentos = Momentos()
+    histograma = Histograma.logaritmico()
+
+    with arquivo_atomico(arquivo_corrigido) as corrigido, \
+         arquivo_atomico(arquivo_filtrado) as filtrado:
+        for bloco in iterar_blocos(caminho):
+            bloco_corrigido = [valor if valor > 0 else substituto for valor in bloco]
+            substituidos = substituidos + sum(1 for valor in bloco if valor <= 0)
+
+            bloco_filtrado = [valor for valor in bloco_corrigido if inferior <= valor <= superior]
+            removidos = removidos + len(bloco_corrigido) - len(bloco_filtrado)
+            mantidos = mantidos + len(bloco_filtrado)
+            momentos.adicionar_bloco(bloco_filtrado)
+            histograma.adicionar_bloco(bloco_filtrado)
+
+            if bloco_corrigido:
+                corrigido.write(("\n".join(map(str, bloco_corrigido)) + "\n").encode("ascii"))
+            if bloco_filtrado:
+                filtrado.write(("\n".join(map(str, bloco_filtrado)) + "\n").encode("ascii"))
+
+    return {
+        "arquivo":      caminho,
+        "substituidos": substituidos,
+        "removidos":    removidos,
+        "mantidos":     mantidos,
+        "momentos":     momentos,
+        "histograma":   histograma,
+    }
+
+
+def listar_shards(entrada: str) -> list:
+    """
+    Resolve a entrada (pasta ou padrão glob) na lista ordenada de
+    shards. Em uma pasta, inclui os shards comprimidos (.gz, .xz).
+    """
+    if os.path.isdir(entrada):
+        return sorted(caminho for padrao in PADROES_SHARDS
+                      for caminho in glob.glob(os.path.join(entrada, padrao)))
+    return sorted(glob.glob(entrada))
+
+
+def processar_shards(caminhos: list, pasta_saida: str = PASTA_SAIDA,
+                     trabalhadores: int = None, fator: float = 2.0) -> dict:
+    """
+    Executa as duas passadas em paralelo sobre todos os shards.
+
+    Retorna:
+        resultado (dict): 'global' (agregado combinado), 'limites',
+                          'shards' (resumo da 2ª passada de cada arquivo)
+                          e 'distribuicao' (momentos e histograma
+                          combinados dos valores mantidos).
+
+    Lança:
+        ValueError: se dois shards gravariam os mesmos arquivos de
+                    saída (ver verificar_nomes_saida()).
+    """
+    verificar_nomes_saida(caminhos)
+    os.makedirs(pasta_saida, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=trabalhadores) as pool:
+        parciais = list(pool.map(agregar_shard, caminhos))
+        global_ = combinar_parciais(parciais)
+        limites = calcular_limites(global_, fator)
+
+        n = len(caminhos)
+        shards = list(pool.map(processar_shard, caminhos, [pasta_saida] * n, [limites] * n))
+
+    # Histogramas de mesma grade e somas inteiras: combinação exata
+    momentos = Momentos()
+    histograma = Histograma.logaritmico()
+    for shard in shards:
+        momentos.combinar(shard.pop("momentos"))
+        histograma.combinar(shard.pop("histograma"))
+
+    return {"global": global_, "limites": limites, "shards": shards,
+            "distribuicao": {"momentos": momentos, "histograma": histograma}}
+
+
+def exibir_resultado(resultado: dict) -> None:
+    """
+    Exibe o resumo global e o resumo por shard.
+    """
+    global_ = resultado["global"]
+    limites = resultado["limites"]
+
+    print("\n" + "=" * 60)
+    print("  RESULTADO GLOBAL (todos os shards)")
+    print("=" * 60)
+    print(f"  Válidos        : {global_['contagem']}")
+    print(f"  Inválidos      : {global_['invalidos']}")
+    print(f"  Linhas ignoradas: {global_['linhas_invalidas']}")
+    print(f"  Máximo         : {global_['maximo']}")
+    print(f"  Mínimo         : {global_['minimo']}")
+    print(f"  Média (válidos): {limites['media_validos']:.2f}")
+    if global_["esboco"].contagem > 0:
+        print(f"  Mediana (aprox): {global_['esboco'].quantil(0.5):.2f}")
+        for p, valor in global_["esboco"].quantis(QUANTIS_PADRAO).items():
+            rotulo = f"p{p * 100:g} (aprox)"
+            print(f"  {rotulo:<15}: {valor:.2f}")
+    print(f"  Média corrigida: {limites['media']:.2f}")
+    print(f"  Desvio Padrão  : {limites['desvio']:.2f}")
+    print(f"  Limite superior: {limites['limite_superior']:.2f}")
+    print(f"  Limite inferior: {limites['limite_inferior']:.2f}")
+    print("=" * 60)
+
+    distribuicao = resultado["distribuicao"]
+    if distribuicao["momentos"].contagem > 0:
+        print("  Distribuição dos valores mantidos (todos os shards):")
+        exibir_forma(distribuicao["momentos"])
+        exibir_histograma("Histograma (escala logarítmica)", distribuicao["histograma"], aparar=True)
+        print("=" * 60)
+
+    for shard in resultado["shards"]:
+        print(f"  {shard['arquivo']}: {shard['substituidos']} substituído(s), "
+              f"{shard['removidos']} outlier(s) removido(s), {shard['mantidos']} mantido(s)")
+
+
+# ─────────────────────────────────────────────────────────────
+# Ponto de entrada principal do programa
+# ─────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Processamento paralelo de shards dados_*.txt")
+    parser.add_argument("entrada", help=f"pasta (procura {', '.join(PADROES_SHARDS)}) ou padrão glob")
+    parser.add_argument("--saida", default=PASTA_SAIDA, help="pasta dos arquivos de saída")
+    parser.add_argument("--trabalhadores", type=int, default=None,
+                        help="número de processos (padrão: número de núcleos)")
+    argumentos = parser.parse_args()
+
+    caminhos = listar_shards(argumentos.entrada)
+    if not caminhos:
+        print(f"✘ Nenhum arquivo encontrado em '{argumentos.entrada}'.")
+    else:
+        print(f"✔ {len(caminhos)} shard(s) encontrado(s).")
+        try:
+            resultado = processar_shards(caminhos, argumentos.saida, argumentos.trabalhadores)
+        except ValueError as erro:
+            print(f"✘ {erro}")
+        else:
+            exibir_resultado(resultado)
+            print(f"\n✔ Arquivos gravados em '{argumentos.saida}'.")
@@ -0,0 +1,382 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Mediana e quantis por seleção + esboço de quantis para fluxos
+=============================================================
+Objetivo:
+  Obter a mediana e quantis arbitrários SEM ordenar o vetor
+  inteiro. A seleção (quickselect com partição em três vias, ou
+  numpy.partition quando o NumPy está instalado) encontra o
+  k-ésimo menor valor em tempo linear esperado.
+
+  Para fluxos e processamento em partes (shards), o esboço
+  EsbocoQuantis (estilo t-digest) resume a distribuição em
+  poucos centróides, pode ser combinado com outros esboços e
+  tem erro controlado pelo parâmetro 'compressao'.
+
+Definições:
+  - mediana(): igual a statistics.median().
+  - quantil(): interpolação linear entre as ordens vizinhas,
+    posição h = (n − 1) · p (mesmo método padrão do NumPy).
+=============================================================
+"""
+
+import math
+import random
+
+try:
+    import numpy as np  # Opcional: seleção vetorizada com numpy.partition
+except ImportError:
+    np = None
+
+# Quantis exibidos junto com a mediana no relatório da Etapa 3
+QUANTIS_PADRAO = (0.01, 0.05, 0.25, 0.75, 0.95, 0.99)
+
+# Abaixo deste tamanho, ordenar um trecho é mais barato que particioná-lo
+_LIMIAR_ORDENACAO = 32
+
+
+# ─────────────────────────────────────────────────────────────
+# SELEÇÃO EXATA
+# ─────────────────────────────────────────────────────────────
+
+def selecionar_ordens(valores, ordens) -> dict:
+    """
+    Encontra os valores de várias ordens (posições no vetor ordenado,
+    a partir de 0) sem ordenar o vetor inteiro.
+
+    Parâmetros:
+        valores (sequência): inteiros (list, array('q'), memoryview...).
+        ordens  (iterável) : posições desejadas, 0 ≤ ordem < len(valores).
+
+    Retorna:
+        resultado (dict): ordem → valor.
+    """
+    ordens = sorted(set(ordens))
+    if not ordens:
+        return {}
+    if ordens[0] < 0 or ordens[-1] >= len(valores):
+        raise IndexError("ordem fora do intervalo do vetor")
+
+    if np is not None:
+        vetor = np.asarray(valores)
+        particionado = np.partition(vetor, ordens)
+        return {ordem: particionado[ordem].item() for ordem in ordens}
+
+    resultado = {}
+    _selecionar(list(valores), 0, ordens, resultado, _profundidade_maxima(len(valores)))
+    return resultado
+
+
+def _profundidade_maxima(n: int) -> int:
+    """
+    Limite de recursão do introselect: passado esse ponto, o trecho
+    é ordenado, garantindo O(n log n) no pior caso.
+    """
+    return 2 * max(n, 1).bit_length()
+
+
+def _selecionar(trecho: list, deslocamento: int, ordens: list, resultado: dict, profundidade: int) -> None:
+    """
+    Quickselect com partição em três vias (menores, iguais, maiores).
+    'deslocamento' é a ordem global do primeiro elemento do trecho;
+    só os grupos que contêm alguma ordem pedida são visitados.
+    """
+    if len(trecho) <= _LIMIAR_ORDENACAO or profundidade == 0:
+        trecho.sort()
+        for ordem in ordens:
+            resultado[ordem] = trecho[ordem - deslocamento]
+        return
+
+    pivo = _mediana_de_tres(trecho)
+    menores = [valor for valor in trecho if valor < pivo]
+    maiores = [valor for valor in trecho if valor > pivo]
+    inicio_iguais = deslocamento + len(menores)
+    inicio_maiores = deslocamento + len(trecho) - len(maiores)
+    del trecho  # Libera o trecho antes de descer na recursão
+
+    ordens_menores = [ordem for ordem in ordens if ordem < inicio_iguais]
+    ordens_maiores = [ordem for ordem in ordens if ordem >= inicio_maiores]
+
+    for ordem in ordens:
+        if inicio_iguais <= ordem < inicio_maiores:
+            resultado[ordem] = pivo
+
+    if ordens_menores:
+        _selecionar(menores, deslocamento, ordens_menores, resultado, profundidade - 1)
+    if ordens_maiores:
+        _selecionar(maiores, inicio_maiores, ordens_maiores, resultado, profundidade - 1)
+
+
+def _mediana_de_tres(trecho: list):
+    """
+    Pivô: mediana de três elementos sorteados do trecho.
+    """
+    a, b, c = random.choice(trecho), random.choice(trecho), random.choice(trecho)
+    if a > b:
+        a, b = b, a
+    if b > c:
+        b = c
+    return a if a > b else b
+
+
+def mediana(valores):
+    """
+    Mediana por seleção, igual a statistics.median(): o valor do
+    meio (n ímpar) ou a média dos dois valores do meio (n par).
+    """
+    n = len(valores)
+    if n == 0:
+        raise ValueError("mediana requer pelo menos um valor")
+
+    meio = n // 2
+    if n % 2 == 1:
+        return selecionar_ordens(valores, [meio])[meio]
+
+    selecionados = selecionar_ordens(valores, [meio - 1, meio])
+    return (selecionados[meio - 1] + selecionados[meio]) / 2
+
+
+def quantis(valores, probabilidades=QUANTIS_PADRAO) -> dict:
+    """
+    Quantis exatos por seleção, com interpolação linear entre as
+    ordens vizinhas (posição h = (n − 1) · p).
+
+    Parâmetros:
+        valores        (sequência): inteiros.
+        probabilidades (iterável) : valores de p entre 0 e 1.
+
+    Retorna:
+        resultado (dict): p → quantil.
+    """
+    n = len(valores)
+    if n == 0:
+        raise ValueError("quantis requerem pelo menos um valor")
+
+    posicoes = {}
+    ordens = set()
+    for p in probabilidades:
+        if not 0 <= p <= 1:
+            raise ValueError(f"probabilidade fora de [0, 1]: {p}")
+        h = (n - 1) * p
+        inferior = math.floor(h)
+        superior = min(inferior + 1, n - 1)
+        posicoes[p] = (h - inferior, inferior, superior)
+        ordens.add(inferior)
+        ordens.add(superior)
+
+    selecionados = selecionar_ordens(valores, ordens)
+
+    resultado = {}
+    for p, (fracao, inferior, superior) in posicoes.items():
+        base = selecionados[inferior]
+        if fracao == 0:
+            resultado[p] = base
+        else:
+            resultado[p] = base + fracao * (selecionados[superior] - base)
+    return resultado
+
+
+def quantil(valores, p: float):
+    """
+    Um único quantil exato (ver quantis()).
+    """
+    return quantis(valores, [p])[p]
+
+
+# ─────────────────────────────────────────────────────────────
+# ESBOÇO APROXIMADO E COMBINÁVEL (estilo t-digest)
+# ─────────────────────────────────────────────────────────────
+
+class EsbocoQuantis:
+    """
+    Resumo aproximado da distribuição em centróides (média, peso).
+
+    Os centróides são pequenos nas caudas e maiores no centro
+    (função de escala k₁ do t-digest), o que mantém p1/p99 precisos.
+    O número de centróides fica em torno de 'compressao', e o erro
+    em posição é da ordem de 1/compressao no centro, bem menor nas
+    caudas. Mínimo e máximo são mantidos exatamente.
+    """
+
+    def __init__(self, compressao: int = 200):
+        if compressao < 10:
+            raise ValueError("compressao deve ser pelo menos 10")
+        self.compressao = compressao
+        self.medias = []    # Médias dos centróides (ordenadas)
+        self.pesos = []     # Pesos (quantidade de valores) dos centróides
+        self._peso_total = 0
+        self.minimo = None
+        self.maximo = None
+        self._pendentes = []
+        self._limite_pendentes = 10 * compressao
+
+    @property
+    def contagem(self) -> int:
+        """Quantidade de valores incorporados ao esboço."""
+        return self._peso_total + len(self._pendentes)
+
+    def adicionar(self, valor) -> None:
+        """
+        Incorpora um valor ao esboço.
+        """
+        self._pendentes.append(valor)
+        if len(self._pendentes) >= self._limite_pendentes:
+            self._compactar()
+
+    def adicionar_bloco(self, bloco) -> None:
+        """
+        Incorpora um bloco de valores ao esboço.
+        """
+        self._pendentes.extend(bloco)
+        if len(self._pendentes) >= self._limite_pendentes:
+            self._compactar()
+
+    def combinar(self, outro: "EsbocoQuantis") -> None:
+        """
+        Junta outro esboço a este (por exemplo, de outro shard).
+        """
+        outro._compactar()
+        self._compactar()
+        self._fundir(list(zip(outro.medias, outro.pesos)), outro.minimo, outro.maximo)
+
+    def quantil(self, p: float) -> float:
+        """
+        Quantil aproximado, interpolando entre os centros dos centróides.
+        """
+        if not 0 <= p <= 1:
+            raise ValueError(f"probabilidade fora de [0, 1]: {p}")
+        self._compactar()
+        if self.contagem == 0:
+            raise ValueError("esboço vazio")
+
+        alvo = p * self.contagem
+        if alvo <= self.pesos[0] / 2:
+            # Entre o mínimo exato e o centro do primeiro centróide
+            return self._interpolar(0, self.minimo, self.pesos[0] / 2, self.medias[0], alvo)
+
+        acumulado = 0.0
+        for i in range(len(self.medias) - 1):
+            centro_atual = acumulado + self.pesos[i] / 2
+            centro_proximo = acumulado + self.pesos[i] + self.pesos[i + 1] / 2
+            if alvo <= centro_proximo:
+                return self._interpolar(centro_atual, self.medias[i],
+                                        centro_proximo, self.medias[i + 1], alvo)
+            acumulado = acumulado + self.pesos[i]
+
+        # Entre o centro do último centróide e o máximo exato
+        centro_ultimo = self.contagem - self.pesos[-1] / 2
+        return self._interpolar(centro_ultimo, self.medias[-1], self.contagem, self.maximo, alvo)
+
+    def quantis(self, probabilidades=QUANTIS_PADRAO) -> dict:
+        """
+        Vários quantis aproximados: p → quantil.
+        """
+        return {p: self.quantil(p) for p in probabilidades}
+
+    def para_dict(self) -> dict:
+        """
+        Representação serializável (JSON) do esboço.
+        """
+        self._compactar()
+        return {
+            "compressao": self.compressao,
+            "medias":     self.medias,
+            "pesos":      self.pesos,
+            "minimo":     self.minimo,
+            "maximo":     self.maximo,
+        }
+
+    @classmethod
+    def de_dict(cls, dados: dict) -> "EsbocoQuantis":
+        """
+        Reconstrói um esboço a partir de para_dict().
+        """
+        esboco = cls(dados["compressao"])
+        esboco.medias = list(dados["medias"])
+        esboco.pesos = list(dados["pesos"])
+        esboco.minimo = dados["minimo"]
+        esboco.maximo = dados["maximo"]
+        total = 0
+        for peso in esboco.pesos:
+            total = total + peso
+        esboco._peso_total = total
+        return esboco
+
+    @staticmethod
+    def _interpolar(x0: float, y0, x1: float, y1, x: float) -> float:
+        if x1 <= x0:
+            return y0
+        return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+    def _compactar(self) -> None:
+        """
+        Incorpora os valores pendentes aos centróides.
+        """
+        if not self._pendentes:
+            return
+        pendentes = self._pendentes
+        self._pendentes = []
+        self._fundir([(valor, 1) for valor in pendentes], min(pendentes), max(pendentes))
+
+    def _fundir(self, novos: list, minimo, maximo) -> None:
+        """
+        Junta centróides novos aos existentes e os reagrupa de modo
+        que cada centróide ocupe no máximo uma unidade da escala k₁.
+        """
+        if not novos:
+            return
+
+        if self.minimo is None or minimo < self.minimo:
+            self.minimo = minimo
+        if self.maximo is None or maximo > self.maximo:
+            self.maximo = maximo
+
+        centroides = list(zip(self.medias, self.pesos))
+        centroides.extend(novos)
+        centroides.sort()
+
+        total = 0
+        for _, peso in centroides:
+            total = total + peso
+
+        medias = []
+        pesos = []
+        media_atual, peso_atual = centroides[0]
+        acumulado = 0  # Peso anterior ao centróide em construção
+        limite = self._escala_inversa(self._escala(0, total) + 1, total)
+
+        for media, peso in centroides[1:]:
+            if acumulado + peso_atual + peso <= limite:
+                # Cabe no centróide atual: média ponderada
+                peso_atual = peso_atual + peso
+                media_atual = media_atual + (media - media_atual) * peso / peso_atual
+            else:
+                medias.append(media_atual)
+                pesos.append(peso_atual)
+                acumulado = acumulado + peso_atual
+                limite = self._escala_inversa(self._escala(acumulado, total) + 1, total)
+                media_atual, peso_atual = media, peso
+
+        medias.append(media_atual)
+        pesos.append(peso_atual)
+
+        self.medias = medias
+        self.pesos = pesos
+        self._peso_total = total
+
+    def _escala(self, peso: float, total: float) -> float:
+        """
+        Função de escala k₁(q) = δ / (2π) · asen(2q − 1).
+        """
+        q = peso / total
+        return self.compressao / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _escala_inversa(self, k: float, total: float) -> float:
+        """
+        Inversa de _escala(): peso acumulado correspondente a k.
+        """
+        if k >= self.compressao / 4:
+            return total
+        q = (math.sin(k * 2 * math.pi / self.compressao) + 1) / 2
+        return q * total
@@ -0,0 +1,196 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Relatório estruturado das etapas (JSON/CSV, modo silencioso)
+=============================================================
+Objetivo:
+  Substituir as listas impressas valor a valor no terminal por
+  um resumo estruturado:
+    - métricas e contagens de cada seção da etapa;
+    - amostras LIMITADAS de listas longas (valores removidos e
+      seus índices, linhas inválidas): os primeiros N itens ou
+      uma amostra aleatória uniforme de N itens (reservatório),
+      sempre com o total;
+    - exportação em JSON ou CSV (secao, chave, valor), com
+      gravação atômica (escrita.py).
+
+  Os vetores completos nunca entram no relatório; quando pedidos,
+  vão para um arquivo próprio (gravar_pares()).
+
+Uso:
+  relatorio = Relatorio("etapa3")
+  amostra = AmostraLimitada()
+  for indice, valor in removidos:
+      amostra.adicionar((indice, valor))
+  relatorio.registrar("outliers", {"removidos": amostra.total, "amostra": amostra})
+  relatorio.exportar("relatorio.json")
+=============================================================
+"""
+
+import csv
+import io
+import json
+import random
+
+from escrita import arquivo_atomico
+
+FORMATOS = ("json", "csv")
+
+# Itens guardados por amostra (e exibidos no terminal)
+LIMITE_AMOSTRA = 10
+
+
+class AmostraLimitada:
+    """
+    Guarda no máximo 'limite' itens de uma sequência de tamanho
+    desconhecido, contando todos: os primeiros, ou uma amostra
+    aleatória uniforme (algoritmo R de reservatório).
+    """
+
+    def __init__(self, limite: int = LIMITE_AMOSTRA, aleatoria: bool = False, semente: int = None):
+        """
+        Parâmetros:
+            limite    (int) : itens guardados no máximo.
+            aleatoria (bool): amostra uniforme em vez dos primeiros itens.
+            semente   (int) : semente da amostra aleatória (reprodutível).
+        """
+        if limite < 0:
+            raise ValueError("o limite da amostra não pode ser negativo")
+        self.limite = limite
+        self.itens = []
+        self.total = 0
+        self._sorteio = random.Random(semente) if aleatoria else None
+
+    def adicionar(self, item) -> None:
+        self.total = self.total + 1
+        if len(self.itens) < self.limite:
+            self.itens.append(item)
+        elif self._sorteio is not None:
+            # O item substitui um guardado com probabilidade limite/total
+            posicao = self._sorteio.randrange(self.total)
+            if posicao < self.limite:
+                self.itens[posicao] = item
+
+    @property
+    def restantes(self) -> int:
+        """Itens contados, mas não guardados."""
+        return self.total - len(self.itens)
+
+    def texto(self) -> str:
+        """
+        Representação curta: os itens guardados e '... (+N)'.
+        """
+        sufixo = f" ... (+{self.restantes})" if self.restantes > 0 else ""
+        return f"{self.itens}{sufixo}"
+
+    def para_dict(self) -> dict:
+        return {
+            "total":     self.total,
+            "aleatoria": self._sorteio is not None,
+            "itens":     [list(item) if isinstance(item, tuple) else item for item in self.itens],
+        }
+
+
+def _serializavel(valor):
+    """
+    Converte amostras, tuplas e vetores para tipos do JSON.
+    """
+    if isinstance(valor, AmostraLimitada):
+        return valor.para_dict()
+    if isinstance(valor, dict):
+        return {str(chave): _serializavel(item) for chave, item in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_serializavel(item) for item in valor]
+    return valor
+
+
+def _achatar(prefixo: str, valor, linhas: list) -> None:
+    """
+    Dicts aninhados viram chaves com pontos; listas e amostras
+    ocupam uma célula, em JSON.
+    """
+    if isinstance(valor, dict):
+        for chave, item in valor.items():
+            _achatar(f"{prefixo}.{chave}" if prefixo else str(chave), item, linhas)
+    elif isinstance(valor, list):
+        linhas.append((prefixo, json.dumps(valor)))
+    else:
+        linhas.append((prefixo, "" if valor is None else valor))
+
+
+class Relatorio:
+    """
+    Resumo estruturado de uma etapa, organizado em seções.
+    """
+
+    def __init__(self, etapa: str):
+        self.etapa = etapa
+        self.secoes = {}
+
+    def registrar(self, secao: str, dados: dict) -> None:
+        """
+        Acrescenta (ou atualiza) métricas de uma seção.
+        """
+        self.secoes.setdefault(secao, {}).update(dados)
+
+    def resumo(self) -> dict:
+        """
+        Relatório em tipos do JSON: 'etapa' e uma chave por seção.
+        """
+        return {"etapa": self.etapa, **_serializavel(self.secoes)}
+
+    def para_csv(self) -> str:
+        """
+        Relatório em CSV, uma linha por métrica: secao,chave,valor.
+        """
+        saida = io.StringIO()
+        escritor = csv.writer(saida, lineterminator="\n")
+        escritor.writerow(("secao", "chave", "valor"))
+        for secao, dados in self.resumo().items():
+            if secao == "etapa":
+                escritor.writerow(("", "etapa", dados))
+                continue
+            linhas = []
+            _achatar("", dados, linhas)
+            for chave, valor in linhas:
+                escritor.writerow((secao, chave, valor))
+        return saida.getvalue()
+
+    def exportar(self, nome_arquivo: str, formato: str = None) -> None:
+        """
+        Grava o relatório em JSON ou CSV (sem 'formato': CSV para a
+        extensão .csv, JSON nos demais casos), de forma atômica.
+        """
+        if formato is None:
+            formato = "csv" if nome_arquivo.lower().endswith(".csv") else "json"
+        if formato not in FORMATOS:
+            raise ValueError(f"formato de relatório desconhecido: {formato!r} (use um de {FORMATOS})")
+
+        if formato == "json":
+            conteudo = json.dumps(self.resumo(), indent=2, ensure_ascii=False) + "\n"
+        else:
+            conteudo = self.para_csv()
+        with arquivo_atomico(nome_arquivo) as arquivo:
+            arquivo.write(conteudo.encode("utf-8"))
+
+
+def gravar_pares(pares, nome_arquivo: str, cabecalho: tuple = ("indice", "valor")) -> int:
+    """
+    Grava uma lista completa de pares (por exemplo, índice e valor
+    de cada outlier removido) em CSV, de forma atômica. Usado só
+    quando o vetor inteiro é pedido explicitamente.
+
+    Retorna:
+        total (int): quantidade de pares gravados.
+    """
+    total = 0
+    with arquivo_atomico(nome_arquivo) as arquivo:
+        texto = io.TextIOWrapper(arquivo, encoding="utf-8", newline="")
+        escritor = csv.writer(texto, lineterminator="\n")
+        escritor.writerow(cabecalho)
+        for par in pares:
+            escritor.writerow(par)
+            total = total + 1
+        texto.flush()
+        texto.detach()  # Devolve o arquivo ao arquivo_atomico() sem fechá-lo
+    return total
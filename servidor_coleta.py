@@ -0,0 +1,261 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Etapa 1 – Modo servidor (coleta concorrente com asyncio)
+=============================================================
+Objetivo:
+  Aceitar conexões TCP ou Unix socket de vários produtores ao
+  mesmo tempo (por exemplo, uma por mesa de operações). Cada
+  produtor envia inteiros, um por linha; as regras de validação
+  são as de coletar_dados(): linhas vazias são ignoradas, 'fim'
+  encerra a sessão e entradas não inteiras ou fora do int64 são
+  rejeitadas.
+
+Gravação em grupo (group commit):
+  Os valores aceitos de todas as conexões vão para uma fila única.
+  Uma tarefa gravadora acrescenta a fila ao arquivo em lotes,
+  quando ela atinge 'tamanho_lote' valores ou a cada 'intervalo'
+  segundos, com fsync opcional. Ao encerrar a sessão, o produtor
+  só recebe a resposta depois que seus valores foram gravados:
+
+    aceitos=<n> rejeitados=<m>
+
+Contrapressão:
+  Se a fila atinge 'limite_pendentes', as conexões deixam de ler
+  do socket até a próxima gravação; o próprio TCP então segura os
+  produtores mais rápidos.
+=============================================================
+"""
+
+import asyncio
+import os
+
+from vetor import verificar_int64
+
+# Parâmetros padrão da gravação em grupo
+TAMANHO_LOTE = 10_000          # Valores por gravação
+INTERVALO_COMMIT = 0.05        # Segundos máximos entre gravações
+LIMITE_PENDENTES = 200_000     # Valores na fila antes da contrapressão
+TAMANHO_LEITURA = 1 << 16      # Bytes lidos do socket por vez
+TAMANHO_MAXIMO_LINHA = 1 << 10  # Linhas maiores são rejeitadas
+
+
+class ServidorColeta:
+    """
+    Servidor de coleta: recebe inteiros de várias conexões e os
+    acrescenta a um único arquivo, com gravação em grupo.
+    """
+
+    def __init__(self, nome_arquivo: str, tamanho_lote: int = TAMANHO_LOTE,
+                 intervalo: float = INTERVALO_COMMIT, fsync: bool = False,
+                 limite_pendentes: int = LIMITE_PENDENTES):
+        self.nome_arquivo = nome_arquivo
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.fsync = fsync
+        self.limite_pendentes = limite_pendentes
+
+        self.totais = {"conexoes": 0, "aceitos": 0, "rejeitados": 0}
+
+        self._pendentes = []    # Linhas já validadas, aguardando gravação
+        self._enfileirados = 0  # Total de valores já colocados na fila
+        self._gravados = 0      # Total de valores já gravados no arquivo
+        self._condicao = None
+        self._ha_dados = None
+        self._lote_cheio = None
+        self._arquivo = None
+        self._encerrando = False
+
+    # ── Validação ────────────────────────────────────────────
+
+    @staticmethod
+    def _validar(linhas: list) -> tuple:
+        """
+        Aplica as regras de coletar_dados() a um bloco de linhas.
+
+        Retorna:
+            (aceitos, rejeitados, fim) (tuple): textos normalizados
+            dos inteiros aceitos, quantidade de rejeitados e se a
+            linha 'fim' foi encontrada.
+        """
+        aceitos = []
+        rejeitados = 0
+        for linha in linhas:
+            linha = linha.strip()
+            if not linha:
+                continue
+            if linha.lower() == b"fim":
+                return aceitos, rejeitados, True
+            try:
+                aceitos.append(str(verificar_int64(int(linha))))
+            except (ValueError, OverflowError):
+                rejeitados = rejeitados + 1
+        return aceitos, rejeitados, False
+
+    # ── Fila e gravação em grupo ─────────────────────────────
+
+    async def _enfileirar(self, valores: list) -> int:
+        """
+        Coloca valores na fila, esperando se ela estiver cheia.
+        Retorna o número de sequência do último valor enfileirado.
+        """
+        async with self._condicao:
+            await self._condicao.wait_for(lambda: len(self._pendentes) < self.limite_pendentes)
+            self._pendentes.extend(valores)
+            self._enfileirados = self._enfileirados + len(valores)
+            sequencia = self._enfileirados
+            if len(self._pendentes) >= self.tamanho_lote:
+                self._lote_cheio.set()
+        self._ha_dados.set()
+        return sequencia
+
+    async def _aguardar_gravacao(self, sequencia: int) -> None:
+        """
+        Espera até que todos os valores até 'sequencia' estejam gravados.
+        """
+        async with self._condicao:
+            await self._condicao.wait_for(lambda: self._gravados >= sequencia)
+
+    def _gravar(self, lote: list) -> None:
+        """
+        Grava um lote com uma única escrita (executado em uma thread).
+        """
+        self._arquivo.write("\n".join(lote))
+        self._arquivo.write("\n")
+        self._arquivo.flush()
+        if self.fsync:
+            os.fsync(self._arquivo.fileno())
+
+    async def _gravador(self) -> None:
+        """
+        Tarefa gravadora: a cada lote cheio ou intervalo, grava a fila
+        e libera as conexões que esperam confirmação ou espaço.
+
+        No encerramento, só termina depois de uma gravação iniciada
+        com o pedido já visível e que deixou a fila vazia: valores
+        enfileirados durante a gravação anterior (em outra thread)
+        nunca ficam para trás.
+        """
+        while True:
+            encerrando = self._encerrando  # Lido antes de esperar e gravar
+            if not encerrando:
+                await self._ha_dados.wait()
+                try:
+                    await asyncio.wait_for(self._lote_cheio.wait(), self.intervalo)
+                except asyncio.TimeoutError:
+                    pass
+            await self._descarregar()
+            if encerrando and not self._pendentes:
+                break
+
+    async def _descarregar(self) -> None:
+        """
+        Grava tudo o que está na fila e notifica as conexões.
+        """
+        async with self._condicao:
+            lote = self._pendentes
+            self._pendentes = []
+            sequencia = self._enfileirados
+            self._ha_dados.clear()
+            self._lote_cheio.clear()
+
+        if lote:
+            await asyncio.to_thread(self._gravar, lote)
+
+        async with self._condicao:
+            self._gravados = sequencia
+            self._condicao.notify_all()
+
+    # ── Conexões ─────────────────────────────────────────────
+
+    async def _tratar_conexao(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        """
+        Atende um produtor: lê blocos, valida, enfileira e, ao final
+        da sessão, responde com as contagens da conexão.
+        """
+        self.totais["conexoes"] = self.totais["conexoes"] + 1
+        origem = escritor.get_extra_info("peername") or "unix"
+        aceitos = 0
+        rejeitados = 0
+        sequencia = 0
+        resto = b""
+        descartando = False  # Dentro de uma linha longa demais, até o próximo '\n'
+        fim = False
+
+        try:
+            while not fim:
+                dados = await leitor.read(TAMANHO_LEITURA)
+                if dados and descartando:
+                    corte = dados.find(b"\n")
+                    if corte == -1:
+                        continue
+                    dados, descartando = dados[corte + 1:], False
+                    if not dados:
+                        continue
+                if not dados:
+                    linhas, resto = [resto], b""
+                else:
+                    dados = resto + dados
+                    corte = dados.rfind(b"\n")
+                    if corte == -1:
+                        if len(dados) > TAMANHO_MAXIMO_LINHA:
+                            # Linha longa demais: o resto dela também é descartado
+                            rejeitados = rejeitados + 1
+                            dados, descartando = b"", True
+                        resto = dados
+                        continue
+                    linhas, resto = dados[:corte].split(b"\n"), dados[corte + 1:]
+
+                validos, invalidos, fim = self._validar(linhas)
+                rejeitados = rejeitados + invalidos
+                if validos:
+                    aceitos = aceitos + len(validos)
+                    sequencia = await self._enfileirar(validos)
+                if not dados:
+                    break
+
+            # Só responde depois que os valores da conexão foram gravados
+            await self._aguardar_gravacao(sequencia)
+            escritor.write(f"aceitos={aceitos} rejeitados={rejeitados}\n".encode())
+            await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.totais["aceitos"] = self.totais["aceitos"] + aceitos
+            self.totais["rejeitados"] = self.totais["rejeitados"] + rejeitados
+            print(f"  ✔ Conexão {origem}: {aceitos} aceito(s), {rejeitados} rejeitado(s).")
+            escritor.close()
+
+    # ── Execução ─────────────────────────────────────────────
+
+    async def executar(self, host: str = "127.0.0.1", porta: int = 9500,
+                       caminho_unix: str = None) -> None:
+        """
+        Inicia o servidor (TCP em host:porta, ou Unix socket se
+        'caminho_unix' for informado) e atende até ser cancelado.
+        """
+        self._condicao = asyncio.Condition()
+        self._ha_dados = asyncio.Event()
+        self._lote_cheio = asyncio.Event()
+        self._arquivo = open(self.nome_arquivo, "a", encoding="utf-8")
+
+        if caminho_unix:
+            servidor = await asyncio.start_unix_server(self._tratar_conexao, path=caminho_unix)
+            print(f"✔ Servidor de coleta ouvindo em unix:{caminho_unix}")
+        else:
+            servidor = await asyncio.start_server(self._tratar_conexao, host, porta)
+            print(f"✔ Servidor de coleta ouvindo em {host}:{porta}")
+        print(f"  Gravando em '{self.nome_arquivo}' (Ctrl+C para encerrar).")
+
+        gravador = asyncio.create_task(self._gravador())
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            # Em vez de cancelar o gravador (e perder um lote sendo gravado
+            # na thread), pede que ele termine: a última volta grava a fila
+            self._encerrando = True
+            self._ha_dados.set()
+            self._lote_cheio.set()
+            await gravador
+            self._arquivo.close()
@@ -0,0 +1,225 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Servidor de consultas por intervalo (dados residentes)
+=============================================================
+Objetivo:
+  Carregar um arquivo de dados uma única vez, construir o índice
+  de intervalos (intervalos.py) e responder, sem reler o arquivo,
+  às estatísticas de qualquer trecho [inicio, fim) dos registros:
+  média, variância, desvio padrão, mínimo e máximo (Etapa 3) e os
+  agregados dos valores válidos (Etapa 2).
+
+Protocolo de linhas (TCP ou Unix socket), uma resposta JSON por
+linha recebida:
+    <inicio> <fim>   estatísticas do trecho [inicio, fim)
+    <inicio>         do registro 'inicio' até o final
+    tudo (ou vazia)  estatísticas de todos os registros
+    info             arquivo, número de registros e tamanho do bloco
+    fim              encerra a conexão
+  Erros são respondidos como {"erro": "<mensagem>"}.
+
+HTTP (para painéis e curl), na mesma porta:
+    GET /estatisticas?inicio=<i>&fim=<j>
+    GET /info
+
+Uso:
+  python3 servidor_consultas.py dados_corrigidos.txt --porta 9600
+  python3 servidor_consultas.py dados_acoes.txt --unix /tmp/consultas.sock
+=============================================================
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from intervalos import TAMANHO_BLOCO_INDICE, IndiceIntervalos
+from leitura import carregar_inteiros
+
+PORTA_PADRAO = 9600
+TAMANHO_MAXIMO_LINHA = 1 << 10  # Consultas maiores são rejeitadas
+
+STATUS_HTTP = {200: "OK", 400: "Bad Request", 404: "Not Found"}
+
+
+class ServidorConsultas:
+    """
+    Servidor de consultas: mantém o índice de intervalos em memória
+    e atende várias conexões ao mesmo tempo.
+    """
+
+    def __init__(self, nome_arquivo: str, tamanho_bloco: int = TAMANHO_BLOCO_INDICE):
+        self.nome_arquivo = nome_arquivo
+        self.totais = {"conexoes": 0, "consultas": 0, "erros": 0}
+
+        inicio = time.perf_counter()
+        valores, self.invalidas = carregar_inteiros(nome_arquivo)
+        self.indice = IndiceIntervalos(valores, tamanho_bloco)
+        self.tempo_construcao = time.perf_counter() - inicio
+
+    # ── Consultas ────────────────────────────────────────────
+
+    def info(self) -> dict:
+        return {
+            "arquivo":          self.nome_arquivo,
+            "registros":        self.indice.tamanho,
+            "linhas_invalidas": len(self.invalidas),
+            "tamanho_bloco":    self.indice.tamanho_bloco,
+        }
+
+    def consultar(self, inicio=None, fim=None) -> dict:
+        """
+        Estatísticas do trecho [inicio, fim); sem limites, de todos
+        os registros.
+
+        Levanta:
+            ValueError: limites não inteiros ou fora do vetor.
+        """
+        try:
+            limites = (0 if inicio is None else int(inicio), None if fim is None else int(fim))
+        except ValueError:
+            raise ValueError(f"limites inválidos: {inicio!r}, {fim!r} (use inteiros)") from None
+        return self.indice.estatisticas(*limites)
+
+    def _responder_linha(self, linha: str):
+        """
+        Resposta (dict) a uma linha do protocolo, ou None para 'fim'.
+        """
+        partes = linha.split()
+        comando = partes[0].lower() if partes else "tudo"
+        if comando == "fim":
+            return None
+        if comando == "info":
+            return self.info()
+        if comando == "tudo":
+            return self.consultar()
+        if len(partes) > 2:
+            raise ValueError("use '<inicio> <fim>', '<inicio>', 'tudo', 'info' ou 'fim'")
+        return self.consultar(*partes)
+
+    def _responder_http(self, alvo: str) -> tuple:
+        """
+        (status, corpo) de uma requisição GET.
+        """
+        endereco = urlsplit(alvo)
+        parametros = {chave: valores[-1] for chave, valores in parse_qs(endereco.query).items()}
+        if endereco.path == "/info":
+            return 200, self.info()
+        if endereco.path == "/estatisticas":
+            try:
+                return 200, self.consultar(parametros.get("inicio"), parametros.get("fim"))
+            except ValueError as erro:
+                return 400, {"erro": str(erro)}
+        return 404, {"erro": f"caminho desconhecido: {endereco.path}"}
+
+    # ── Conexões ─────────────────────────────────────────────
+
+    async def _tratar_conexao(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        """
+        Atende um cliente: HTTP se a primeira linha for um GET;
+        senão, o protocolo de linhas até 'fim' ou o fechamento.
+        """
+        self.totais["conexoes"] = self.totais["conexoes"] + 1
+        try:
+            linha = await leitor.readline()
+            if linha.startswith(b"GET "):
+                await self._atender_http(linha, leitor, escritor)
+                return
+
+            while linha:
+                if len(linha) > TAMANHO_MAXIMO_LINHA:
+                    resposta = {"erro": "consulta longa demais"}
+                else:
+                    try:
+                        resposta = self._responder_linha(linha.decode("utf-8", errors="replace"))
+                    except ValueError as erro:
+                        resposta = {"erro": str(erro)}
+                    if resposta is None:
+                        break
+                self._contar(resposta)
+                escritor.write(json.dumps(resposta).encode() + b"\n")
+                await escritor.drain()
+                linha = await leitor.readline()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _atender_http(self, linha: bytes, leitor: asyncio.StreamReader,
+                            escritor: asyncio.StreamWriter) -> None:
+        # Descarta os cabeçalhos da requisição
+        while (await leitor.readline()).strip():
+            pass
+
+        partes = linha.decode("latin-1").split()
+        status, corpo = self._responder_http(partes[1] if len(partes) > 1 else "/")
+        self._contar(corpo)
+        conteudo = json.dumps(corpo).encode()
+        escritor.write(
+            f"HTTP/1.1 {status} {STATUS_HTTP[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(conteudo)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + conteudo
+        )
+        await escritor.drain()
+
+    def _contar(self, resposta: dict) -> None:
+        self.totais["consultas"] = self.totais["consultas"] + 1
+        if "erro" in resposta:
+            self.totais["erros"] = self.totais["erros"] + 1
+
+    # ── Execução ─────────────────────────────────────────────
+
+    async def executar(self, host: str = "127.0.0.1", porta: int = PORTA_PADRAO,
+                       caminho_unix: str = None) -> None:
+        """
+        Inicia o servidor (TCP em host:porta, ou Unix socket se
+        'caminho_unix' for informado) e atende até ser cancelado.
+        """
+        if caminho_unix:
+            servidor = await asyncio.start_unix_server(self._tratar_conexao, path=caminho_unix)
+            print(f"✔ Servidor de consultas ouvindo em unix:{caminho_unix}")
+        else:
+            servidor = await asyncio.start_server(self._tratar_conexao, host, porta)
+            print(f"✔ Servidor de consultas ouvindo em {host}:{porta} (também HTTP GET)")
+        print("  Ctrl+C para encerrar.")
+
+        async with servidor:
+            await servidor.serve_forever()
+
+
+# ─────────────────────────────────────────────────────────────
+# Ponto de entrada principal do programa
+# ─────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de estatísticas por intervalo")
+    parser.add_argument("arquivo", help="arquivo de dados (texto, .gz/.xz ou .bin)")
+    parser.add_argument("--host", default="127.0.0.1", help="endereço TCP (padrão: 127.0.0.1)")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO,
+                        help=f"porta TCP (padrão: {PORTA_PADRAO})")
+    parser.add_argument("--unix", default=None, metavar="CAMINHO",
+                        help="ouve em um Unix socket em vez de TCP")
+    parser.add_argument("--bloco", type=int, default=TAMANHO_BLOCO_INDICE,
+                        help=f"valores por bloco da tabela esparsa (padrão: {TAMANHO_BLOCO_INDICE})")
+    argumentos = parser.parse_args()
+
+    try:
+        servidor = ServidorConsultas(argumentos.arquivo, argumentos.bloco)
+    except FileNotFoundError:
+        print(f"✘ Arquivo '{argumentos.arquivo}' não encontrado.")
+        raise SystemExit(1)
+    except (ValueError, OverflowError) as erro:
+        print(f"✘ {erro}")
+        raise SystemExit(1)
+
+    print(f"✔ Índice construído: {servidor.indice.tamanho} registros "
+          f"em {servidor.tempo_construcao:.2f} s")
+    try:
+        asyncio.run(servidor.executar(argumentos.host, argumentos.porta, argumentos.unix))
+    except KeyboardInterrupt:
+        pass
+    totais = servidor.totais
+    print(f"\n✔ Servidor encerrado: {totais['conexoes']} conexão(ões), "
+          f"{totais['consultas']} consulta(s), {totais['erros']} com erro.")
@@ -0,0 +1,115 @@
+"""
+=============================================================
+SISTEMA DE ANÁLISE DE DADOS FINANCEIROS
+Vetor compacto de inteiros (int64)
+=============================================================
+Objetivo:
+  Guardar os dados das etapas em um buffer contíguo de int64
+  (array('q')) em vez de uma lista de objetos int:
+    - lista : 8 bytes do ponteiro + 28 bytes do objeto int
+              ≈ 36 bytes por valor, espalhados pela memória;
+    - vetor : 8 bytes por valor, contíguos.
+  Um dia com 50 milhões de registros ocupa ≈ 400 MB, e não
+  vários gigabytes.
+
+Convenção:
+  - Os leitores devolvem um vetor compacto: array('q') para
+    arquivos texto, ou uma memoryview de int64 sobre o arquivo
+    mapeado para o formato binário (sem cópia).
+  - As funções das etapas aceitam qualquer sequência de inteiros
+    (list, array('q'), memoryview, ndarray) e, quando produzem um
+    vetor novo, devolvem array('q').
+
+Estouro:
+  array('q') não guarda valores fora de [−2⁶³, 2⁶³ − 1]. Em vez
+  do erro genérico do módulo array, criar_vetor() e
+  verificar_int64() levantam OverflowError indicando o valor.
+=============================================================
+"""
+
+from array import array
+
+try:
+    import numpy as np  # Opcional: conversão de ndarray sem laço Python
+except ImportError:
+    np = None
+
+TIPO = "q"  # Código de tipo do array: int64 com sinal
+
+MINIMO_INT64 = -2 ** 63
+MAXIMO_INT64 = 2 ** 63 - 1
+
+
+def verificar_int64(valor: int) -> int:
+    """
+    Devolve o próprio valor, ou levanta OverflowError se ele não
+    couber em int64.
+    """
+    if not MINIMO_INT64 <= valor <= MAXIMO_INT64:
+        raise OverflowError(f"valor {valor} fora do intervalo int64")
+    return valor
+
+
+def vetor_vazio() -> array:
+    """
+    Vetor compacto vazio, pronto para receber append()/extend().
+    """
+    return array(TIPO)
+
+
+def eh_compacto(valores) -> bool:
+    """
+    Indica se a sequência já é um buffer contíguo de int64.
+    """
+    if isinstance(valores, array):
+        return valores.typecode == TIPO
+    if isinstance(valores, memoryview):
+        return valores.format == TIPO and valores.ndim == 1
+    if np is not None and isinstance(valores, np.ndarray):
+        return valores.dtype == np.int64 and valores.ndim == 1
+    return False
+
+
+def criar_vetor(valores=()) -> array:
+    """
+    Copia uma sequência de inteiros para um novo array('q').
+
+    Levanta:
+        OverflowError: se algum valor não couber em int64.
+    """
+    if np is not None and isinstance(valores, np.ndarray):
+        if valores.size and valores.dtype != np.int64:
+            verificar_int64(int(valores.max()))
+            verificar_int64(int(valores.min()))
+        vetor = array(TIPO)
+        vetor.frombytes(np.ascontiguousarray(valores, dtype=np.int64).tobytes())
+        return vetor
+
+    if hasattr(valores, "__getitem__"):
+        try:
+            return array(TIPO, valores)  # Conversão em C
+        except OverflowError:
+            pass
+
+    # Iteradores (uma única passada) ou sequência com estouro:
+    # valor a valor, para indicar qual deles não cabe em int64
+    vetor = array(TIPO)
+    anexar = vetor.append
+    for valor in valores:
+        try:
+            anexar(valor)
+        except OverflowError:
+            verificar_int64(valor)
+            raise
+    return vetor
+
+
+def como_vetor(valores):
+    """
+    Vetor compacto com os mesmos valores: devolve a própria
+    sequência se ela já for um buffer de int64 (sem cópia), ou
+    uma cópia em array('q') caso contrário.
+    """
+    if eh_compacto(valores):
+        return valores
+    return criar_vetor(valores)